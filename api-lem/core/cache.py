@@ -6,7 +6,7 @@ L2: Redis, 1hr TTL for historical economic indicators
 import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Optional, Any, Callable
+from typing import Optional, Any
 import asyncio
 import logging
 
@@ -87,7 +87,12 @@ async def init_cache():
     if settings.REDIS_URL:
         try:
             import redis.asyncio as redis
-            _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            _redis_client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            )
             await _redis_client.ping()
             logger.info("L2 Redis cache connected")
         except Exception as e:
@@ -97,6 +102,11 @@ async def init_cache():
         _redis_client = None
 
 
+def get_redis_client():
+    """L2 Redis client, or None when Redis is not configured or unreachable"""
+    return _redis_client
+
+
 async def close_cache():
     global _redis_client
     if _redis_client:
@@ -104,30 +114,5 @@ async def close_cache():
         _redis_client = None
 
 
-async def cached(
-    prefix: str,
-    ttl_layer: str = "l2",  # "l1" (60s) or "l2" (3600s)
-) -> Callable:
-    """Decorator for caching async function results"""
-
-    def decorator(func: Callable):
-        async def wrapper(*args, **kwargs):
-            key = _make_key(prefix, *args, **kwargs)
-            layer = L1Cache if ttl_layer == "l1" else L2Cache
-            val = await layer.get(key)
-            if val is not None:
-                return val
-            try:
-                result = await func(*args, **kwargs)
-                await layer.set(key, result)
-                return result
-            except Exception:
-                raise
-
-        return wrapper
-
-    return decorator
-
-
 def cache_key(prefix: str, *args, **kwargs) -> str:
     return _make_key(prefix, *args, **kwargs)
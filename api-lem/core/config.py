@@ -29,15 +29,24 @@ class Settings(BaseSettings):
     # L2: Redis, 1hr for historical indicators (GDP, CPI, etc.)
     L2_TTL: int = 3600
     REDIS_URL: Optional[str] = None
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # seconds; the limiter falls back to local limits after this
+    REDIS_CONNECT_TIMEOUT: float = 0.5
 
     ENABLE_AUTH: bool = False
     API_KEY_NAME: str = "X-API-Key"
     API_KEYS: List[str] = []
+    ADMIN_API_KEYS: List[str] = []  # allowed to request profiles (X-Profile header / ?profile=1)
     SECRET_KEY: str = "lem-secret-change-in-production"
 
     ENABLE_RATE_LIMITING: bool = True
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60
+    RATE_LIMIT_MAX_CLIENTS: int = 100000  # clients tracked by the limiter (LRU)
+    RATE_LIMIT_DISTRIBUTED: bool = True  # share limits across workers via REDIS_URL, if set
+
+    ENABLE_PROFILING: bool = True  # only with ADMIN_API_KEYS set
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: str = "profiles"
 
     # Provider resilience
     PROVIDER_TIMEOUT: float = 10.0
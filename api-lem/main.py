@@ -27,6 +27,7 @@ from api_lem.core.cache import init_cache, close_cache
 from api.routers import economic_indicators, countries, markets, analytics
 from api_lem.middleware.rate_limit import RateLimitMiddleware
 from api_lem.middleware.auth import AuthMiddleware
+from api.middleware.profiling import ProfilingMiddleware
 
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
 logger = logging.getLogger(__name__)
@@ -61,6 +62,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.ENABLE_PROFILING and settings.ADMIN_API_KEYS:
+    app.add_middleware(
+        ProfilingMiddleware,
+        admin_keys=settings.ADMIN_API_KEYS,
+        key_header=settings.API_KEY_NAME,
+        interval=settings.PROFILING_INTERVAL,
+        directory=settings.PROFILING_DIR,
+    )
 if settings.ENABLE_RATE_LIMITING:
     app.add_middleware(RateLimitMiddleware)
 if settings.ENABLE_AUTH:
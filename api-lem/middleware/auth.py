@@ -1,6 +1,7 @@
-"""LEM Engine authentication"""
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import ORJSONResponse
+"""LEM Engine authentication (pure ASGI)"""
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 import time
 
 from api_lem.core.config import settings
@@ -9,22 +10,28 @@ from api_lem.core.config import settings
 PUBLIC_PATHS = ["/", "/health", "/docs", "/openapi.json", "/redoc", "/api/v1/sources"]
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        path = request.url.path
-        if any(path == p or path.startswith(p.rstrip("/") + "/") for p in PUBLIC_PATHS if p != "/"):
-            return await call_next(request)
-        if path == "/":
-            return await call_next(request)
-        api_key = request.headers.get(settings.API_KEY_NAME)
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.api_keys = frozenset(settings.API_KEYS)  # O(1) lookup
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        if path == "/" or any(path == p or path.startswith(p.rstrip("/") + "/") for p in PUBLIC_PATHS if p != "/"):
+            return await self.app(scope, receive, send)
+        api_key = Headers(scope=scope).get(settings.API_KEY_NAME)
         if not api_key:
-            return ORJSONResponse(
+            response = ORJSONResponse(
                 status_code=401,
                 content={"error": "Authentication required", "timestamp": time.time()},
             )
-        if settings.API_KEYS and api_key not in settings.API_KEYS:
-            return ORJSONResponse(
+            return await response(scope, receive, send)
+        if self.api_keys and api_key not in self.api_keys:
+            response = ORJSONResponse(
                 status_code=403,
                 content={"error": "Invalid API key", "timestamp": time.time()},
             )
-        return await call_next(request)
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
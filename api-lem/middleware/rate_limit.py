@@ -1,44 +1,80 @@
-"""LEM Engine rate limiting"""
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import ORJSONResponse
+"""
+LEM Engine rate limiting (GCRA: one timestamp per client, O(1) checks)
+
+The limiters are the economic data API's (``api.middleware.rate_limit``) with
+a single tier. With Redis configured (REDIS_URL, the L2 cache connection) the
+limits are shared by all workers through its atomic Lua script; while Redis
+is down each worker falls back to its local limiter.
+"""
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import logging
+import math
 import time
-from collections import defaultdict
-from typing import Dict
-import asyncio
 
+from api.core.quotas import DEFAULT_TIER, Tier, hash_api_key
+from api.middleware.rate_limit import Decision, QuotaLimiter, RedisGCRALimiter
+from api_lem.core import cache
 from api_lem.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lem:ratelimit:"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI; X-RateLimit-* headers are added to http.response.start"""
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_minute: int = None, window_size: int = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, requests_per_minute: int = None, window_size: int = None, max_clients: int = None):
+        self.app = app
         self.requests_per_minute = requests_per_minute or settings.RATE_LIMIT_REQUESTS
         self.window_size = window_size or settings.RATE_LIMIT_WINDOW
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.lock = asyncio.Lock()
+        self.limiter = QuotaLimiter(
+            {DEFAULT_TIER: Tier(DEFAULT_TIER, self.requests_per_minute, 0)},
+            self.window_size, max_clients or settings.RATE_LIMIT_MAX_CLIENTS
+        )
+        self.shared_limiter: Optional[RedisGCRALimiter] = None
+        self._limit_header = (b"x-ratelimit-limit", str(self.requests_per_minute).encode())
 
-    async def dispatch(self, request, call_next):
-        client_id = getattr(request.client, "host", "unknown") if request.client else "unknown"
-        api_key = request.headers.get("X-API-Key")
+    async def check(self, client_id: str) -> Decision:
+        """Charge a request, through Redis once the L2 cache is connected (in the app lifespan)"""
+        client = cache.get_redis_client() if settings.RATE_LIMIT_DISTRIBUTED else None
+        if client is None:
+            return self.limiter.check(DEFAULT_TIER, client_id)
+        if self.shared_limiter is None or self.shared_limiter.client is not client:
+            self.shared_limiter = RedisGCRALimiter(client, self.limiter, key_prefix=KEY_PREFIX)
+        return await self.shared_limiter.check(DEFAULT_TIER, client_id)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        api_key = Headers(scope=scope).get("X-API-Key")
         if api_key:
-            client_id = api_key
+            client_id = hash_api_key(api_key)
+        else:
+            client_id = scope["client"][0] if scope.get("client") else "unknown"
         now = time.time()
-        async with self.lock:
-            self.requests[client_id] = [t for t in self.requests[client_id] if now - t < self.window_size]
-            if len(self.requests) > 1000:
-                self.requests = {k: v for k, v in self.requests.items() if v}
-            if len(self.requests[client_id]) >= self.requests_per_minute:
-                return ORJSONResponse(
-                    status_code=429,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "retry_after": self.window_size,
-                        "timestamp": now,
-                    },
-                    headers={"Retry-After": str(self.window_size)},
-                )
-            self.requests[client_id].append(now)
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(self.requests_per_minute - len(self.requests[client_id]))
-        return response
+        decision = await self.check(client_id)
+        if not decision.allowed:
+            retry_after = math.ceil(decision.reset)
+            response = ORJSONResponse(
+                status_code=429,
+                content={
+                    "error": "Rate limit exceeded",
+                    "retry_after": retry_after,
+                    "timestamp": now,
+                },
+                headers={"Retry-After": str(retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        rate_headers = [self._limit_header, (b"x-ratelimit-remaining", str(decision.remaining).encode())]
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *rate_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
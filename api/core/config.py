@@ -2,7 +2,7 @@
 Configuration management for Economic Data API
 """
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 from functools import lru_cache
 import os
 
@@ -34,12 +34,33 @@ class Settings(BaseSettings):
     
     # Redis Configuration (for caching)
     REDIS_URL: Optional[str] = None
+    # A slow Redis must not stall requests: calls fail (and the limiter falls back) after these
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # seconds
+    REDIS_CONNECT_TIMEOUT: float = 0.5  # seconds
     CACHE_TTL: int = 3600  # 1 hour default
+    # Series are cached until their next expected release, at most (per frequency):
+    CACHE_TTL_DAILY: int = 4 * 3600
+    CACHE_TTL_WEEKLY: int = 12 * 3600
+    CACHE_TTL_MONTHLY: int = 24 * 3600
+    CACHE_TTL_QUARTERLY: int = 2 * 24 * 3600
+    CACHE_TTL_ANNUAL: int = 7 * 24 * 3600
+    CACHE_TTL_MIN: int = 900  # polling interval once a release is due
+    HTTP_CACHE_MAX_AGE: int = 300  # Cache-Control max-age cap for data endpoints
+    METADATA_CACHE_TTL: int = 86400  # Provider series/indicator metadata, 1 day
+    NEGATIVE_CACHE_TTL: int = 600  # Series no source could serve, 10 minutes
+    NEGATIVE_CACHE_CAPACITY: int = 100000  # Max entries (oldest dropped), also sizes the Bloom filter
+    COMPUTE_CACHE_MAX_ENTRIES: int = 2048  # Derived/analytics intermediates (least recently used dropped)
+    DELTA_SYNC_OVERLAP_PERIODS: int = 3  # Periods re-fetched before the last stored date to catch revisions
+    SERIES_STORE_MAX_SERIES: int = 50000  # Series kept in the local series store (LRU)
+    SERIES_STORE_MAX_OBSERVATIONS: int = 10000000  # Observations over all stored series (~16 bytes each)
     
     # Authentication
     ENABLE_AUTH: bool = False
     API_KEY_NAME: str = "X-API-Key"
-    API_KEYS: List[str] = []  # Add your API keys here
+    API_KEYS: List[str] = []  # Add your API keys here (default tier)
+    API_KEY_TIERS: Dict[str, str] = {}  # key or "sha256:<hex digest>" -> tier in RATE_LIMIT_TIERS
+    # Keys or "sha256:<hex digest>" for profiling and /admin (also list them in API_KEYS with auth on)
+    ADMIN_API_KEYS: List[str] = []
     # WARNING: Change this secret key in production!
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     
@@ -47,6 +68,24 @@ class Settings(BaseSettings):
     ENABLE_RATE_LIMITING: bool = True
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_MAX_CLIENTS: int = 100000  # clients tracked by the limiter (LRU)
+    RATE_LIMIT_DISTRIBUTED: bool = True  # share limits across workers via REDIS_URL, if set
+    RATE_LIMIT_DAILY_QUOTA: int = 0  # cost units per UTC day for anonymous/default clients, 0 = unlimited
+    RATE_LIMIT_TIERS: Dict[str, Dict[str, int]] = {
+        "basic": {"requests": 100, "daily_quota": 10000},
+        "pro": {"requests": 1000, "daily_quota": 500000},
+    }
+    # Cost units charged per request (default 1); "*" patterns match any characters
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {
+        "/metrics": 0,
+        "/api/v1/indicators/compare": 5,
+        "/api/v1/indicators/*/cross-section": 10,
+        "/api/v1/analytics/calculate": 5,
+        "/api/v1/analytics/correlation": 20,
+        "/api/v1/analytics/cross-correlation": 50,
+        "/api/v1/analytics/derived": 5,
+        "/api/v1/analytics/summary/*": 5,
+    }
     
     # External API Keys
     FRED_API_KEY: Optional[str] = None
@@ -67,6 +106,55 @@ class Settings(BaseSettings):
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 1
     
+    # Upstream throttling (per provider, see api/core/resilience.py)
+    PROVIDER_REQUESTS_PER_SECOND: float = 10.0
+    PROVIDER_MAX_IN_FLIGHT: int = 10
+    FRED_REQUESTS_PER_SECOND: float = 2.0  # FRED allows 120 requests/minute per key
+    FRED_MAX_IN_FLIGHT: int = 4
+    WORLD_BANK_REQUESTS_PER_SECOND: float = 10.0
+    WORLD_BANK_MAX_IN_FLIGHT: int = 8
+    OECD_REQUESTS_PER_SECOND: float = 1.0
+    OECD_MAX_IN_FLIGHT: int = 2
+    
+    # Circuit breakers (per provider)
+    CIRCUIT_BREAKER_THRESHOLD: int = 5  # consecutive failures before opening
+    CIRCUIT_BREAKER_RESET_TIMEOUT: int = 30  # seconds before a half-open probe
+    
+    # Request logging (APIRequestLog, written in batches)
+    ENABLE_REQUEST_LOGGING: bool = False
+    REQUEST_LOG_FLUSH_INTERVAL: int = 5  # seconds
+    
+    # Background ingestion of hot series (api/ingestion.py)
+    ENABLE_INGESTION: bool = False  # run the scheduler inside the API process
+    INGESTION_SERIES: List[str] = [
+        "GDP:USA", "INFLATION:USA", "UNEMPLOYMENT:USA", "INTEREST_RATE:USA"
+    ]  # "INDICATOR:COUNTRY" pairs always kept warm
+    INGESTION_TOP_N: int = 50  # most requested series (from APIRequestLog) kept warm
+    INGESTION_POPULARITY_WINDOW_HOURS: int = 24
+    INGESTION_CONCURRENCY: int = 4
+    INGESTION_TICK: int = 30  # seconds between scheduler passes
+    INGESTION_TARGETS_REFRESH: int = 600  # seconds between popularity queries
+    INGESTION_RETRY_INTERVAL: int = 900  # retry delay for series that failed to refresh
+    INGESTION_READ_PERSISTED: bool = False  # read cached_data on store misses (set with a standalone daemon)
+    
+    # Monitoring
+    ENABLE_METRICS: bool = True  # Prometheus /metrics (public like /health: keep it off the public proxy)
+    SERVER_TIMING_HEADER: bool = True  # send per-stage timings to clients (always aggregated in-process)
+    LOOP_LAG_INTERVAL: float = 0.1  # seconds between event-loop lag measurements
+    LOOP_SLOW_CALLBACK_THRESHOLD: float = 0.25  # stall (seconds) that logs the blocking stack; 0 disables
+    ENABLE_PROFILING: bool = True  # per-request profiles for ADMIN_API_KEYS (X-Profile header / ?profile=1)
+    PROFILING_INTERVAL: float = 0.001  # seconds between stack samples
+    PROFILING_DIR: str = "profiles"  # where stored speedscope profiles are written
+    
+    # Load shedding (503 + Retry-After while the worker is overloaded; 0 disables a threshold)
+    ENABLE_LOAD_SHEDDING: bool = True
+    LOAD_SHED_LOW_PRIORITY_PATHS: List[str] = ["/api/v1/analytics", "/api/v1/marketing"]  # shed first
+    LOAD_SHED_LAG_THRESHOLD: float = 0.1  # event-loop lag (seconds) shedding low-priority routes
+    LOAD_SHED_IN_FLIGHT_THRESHOLD: int = 200  # requests in flight shedding low-priority routes
+    LOAD_SHED_CRITICAL_LAG: float = 0.5  # event-loop lag shedding every route but /health and /metrics
+    LOAD_SHED_MAX_IN_FLIGHT: int = 1000  # requests in flight shedding every route but /health and /metrics
+    LOAD_SHED_RETRY_AFTER: int = 5  # seconds
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -39,6 +39,7 @@ metadata = MetaData()
 async def init_db():
     """Initialize database tables"""
     try:
+        import api.models.database  # noqa: F401 - registers the models on Base
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
     except Exception as e:
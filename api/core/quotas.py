@@ -0,0 +1,243 @@
+"""
+API key tiers, route costs and daily quotas
+
+Every request is charged a cost (``RATE_LIMIT_ROUTE_COSTS``, 1 by default)
+against the rate limit and daily quota of its client's tier. Keys are mapped
+to tiers by their SHA-256 digest, so a lookup is one hash and one dict access
+and the configuration may hold digests instead of the keys themselves.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Tuple
+import fnmatch
+import hashlib
+import re
+import time
+
+from api.core.config import settings
+
+ANONYMOUS_TIER = "anonymous"  # requests without a (registered) API key
+DEFAULT_TIER = "default"  # keys from API_KEYS, or any key when no keys are configured
+DIGEST_PREFIX = "sha256:"
+SECONDS_PER_DAY = 86400
+
+
+class Tier(NamedTuple):
+    """Limits of one tier"""
+    name: str
+    requests: int  # cost units per RATE_LIMIT_WINDOW
+    daily_quota: int  # cost units per UTC day, 0 for unlimited
+
+    @property
+    def max_cost(self) -> int:
+        """Largest request cost the tier can ever admit"""
+        return min(self.requests, self.daily_quota) if self.daily_quota else self.requests
+
+
+def hash_api_key(api_key: str) -> str:
+    """SHA-256 hex digest of an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def key_digest(key: str) -> str:
+    """Digest of a configured key, given in plain text or as ``sha256:<hex digest>``"""
+    return key[len(DIGEST_PREFIX):].lower() if key.startswith(DIGEST_PREFIX) else hash_api_key(key)
+
+
+def load_tiers() -> Dict[str, Tier]:
+    """
+    Tiers from settings
+
+    ``anonymous`` and ``default`` use ``RATE_LIMIT_REQUESTS`` and
+    ``RATE_LIMIT_DAILY_QUOTA`` unless ``RATE_LIMIT_TIERS`` overrides them.
+
+    Returns:
+        Tiers keyed by name
+    """
+    base = {"requests": settings.RATE_LIMIT_REQUESTS, "daily_quota": settings.RATE_LIMIT_DAILY_QUOTA}
+    tiers = {name: Tier(name, **base) for name in (ANONYMOUS_TIER, DEFAULT_TIER)}
+    for name, limits in settings.RATE_LIMIT_TIERS.items():
+        tiers[name] = Tier(
+            name,
+            int(limits.get("requests", base["requests"])),
+            int(limits.get("daily_quota", base["daily_quota"]))
+        )
+    return tiers
+
+
+class APIKeyRegistry:
+    """
+    API key digest -> tier name
+
+    Usage:
+        registry = APIKeyRegistry.from_settings()
+        tier = registry.tier_for(api_key)  # None for unknown keys
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = (),
+        tiers: Optional[Mapping[str, str]] = None,
+        default_tier: str = DEFAULT_TIER
+    ):
+        """
+        Initialize registry
+
+        Args:
+            keys: Keys in the default tier
+            tiers: Key (or ``sha256:<digest>``) -> tier name
+            default_tier: Tier of ``keys``
+        """
+        self.default_tier = default_tier
+        self._tiers: Dict[str, str] = {}
+        for key in keys:
+            self.register(key, default_tier)
+        for key, tier in (tiers or {}).items():
+            self.register(key, tier)
+
+    @classmethod
+    def from_settings(cls) -> "APIKeyRegistry":
+        """Registry for ``API_KEYS`` and ``API_KEY_TIERS``"""
+        return cls(settings.API_KEYS, settings.API_KEY_TIERS)
+
+    def register(self, key: str, tier: str) -> None:
+        """
+        Register a key
+
+        Args:
+            key: Plain key or ``sha256:<hex digest>``
+            tier: Tier name
+        """
+        self._tiers[key_digest(key)] = tier
+
+    @property
+    def restricted(self) -> bool:
+        """Whether only registered keys are valid"""
+        return bool(self._tiers)
+
+    def tier_for(self, api_key: str) -> Optional[str]:
+        """
+        Tier of a key
+
+        Args:
+            api_key: Key presented by the client
+
+        Returns:
+            Tier name, the default tier for any key if no keys are registered,
+            or None for unknown keys
+        """
+        if not self._tiers:
+            return self.default_tier
+        return self._tiers.get(hash_api_key(api_key))
+
+
+class AdminKeys:
+    """
+    Digests of the keys allowed to use admin features (``/admin``, profiling)
+
+    Usage:
+        if admin_keys().is_admin(api_key):
+            ...
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        """
+        Initialize admin keys
+
+        Args:
+            keys: Plain keys or ``sha256:<hex digest>``
+        """
+        self.digests = frozenset(key_digest(key) for key in keys)
+
+    def __bool__(self) -> bool:
+        return bool(self.digests)
+
+    def is_admin(self, api_key: Optional[str]) -> bool:
+        """Whether a key presented by a client is an admin key"""
+        return bool(api_key) and hash_api_key(api_key) in self.digests
+
+
+_admin_keys: Tuple[Tuple[str, ...], AdminKeys] = ((), AdminKeys())
+
+
+def admin_keys() -> AdminKeys:
+    """Admin keys of ``ADMIN_API_KEYS``, hashed again only when the setting changes"""
+    global _admin_keys
+    configured = tuple(settings.ADMIN_API_KEYS)
+    if configured != _admin_keys[0]:
+        _admin_keys = (configured, AdminKeys(configured))
+    return _admin_keys[1]
+
+
+class RouteCosts:
+    """
+    Request cost by path
+
+    Patterns without ``*`` match the path exactly (one dict lookup); patterns
+    with ``*`` are shell-style wildcards tried in configuration order.
+    """
+
+    def __init__(self, costs: Mapping[str, int], default: int = 1):
+        self.costs = dict(costs)
+        self.default = default
+        self._exact = {path: cost for path, cost in costs.items() if "*" not in path}
+        self._patterns = [
+            (re.compile(fnmatch.translate(pattern)), cost)
+            for pattern, cost in costs.items() if "*" in pattern
+        ]
+
+    @classmethod
+    def from_settings(cls) -> "RouteCosts":
+        return cls(settings.RATE_LIMIT_ROUTE_COSTS)
+
+    def cost(self, path: str) -> int:
+        """Cost of a request to ``path``"""
+        cost = self._exact.get(path)
+        if cost is not None:
+            return cost
+        for pattern, cost in self._patterns:
+            if pattern.match(path):
+                return cost
+        return self.default
+
+
+class DailyQuota:
+    """
+    Cost units used per client in the current UTC day
+
+    One (day, used) pair per client in an LRU map bounded by ``max_clients``;
+    a stale day counts as nothing used.
+    """
+
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        self._used: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+
+    def used(self, client_id: str, day: int) -> int:
+        """Cost units the client used on ``day``"""
+        entry = self._used.get(client_id)
+        return entry[1] if entry is not None and entry[0] == day else 0
+
+    def consume(self, client_id: str, cost: int, day: int) -> int:
+        """
+        Charge a request
+
+        Returns:
+            Cost units used on ``day`` including this request
+        """
+        used = self.used(client_id, day) + cost
+        self._used[client_id] = (day, used)
+        self._used.move_to_end(client_id)
+        if len(self._used) > self.max_clients:
+            self._used.popitem(last=False)
+        return used
+
+
+def utc_day(now: Optional[float] = None) -> Tuple[int, float]:
+    """
+    Current UTC day number and seconds until it ends
+
+    Args:
+        now: Unix time (time.time() if None)
+    """
+    now = time.time() if now is None else now
+    return int(now // SECONDS_PER_DAY), SECONDS_PER_DAY - now % SECONDS_PER_DAY
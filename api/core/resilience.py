@@ -0,0 +1,338 @@
+"""
+Upstream provider resilience
+
+Each upstream source gets one ``ProviderThrottle`` shared by every request to
+that source: a token bucket caps the request rate, a semaphore caps the number
+of requests in flight, and the rate adapts to the upstream's feedback (AIMD):
+it is halved on every 429 and grows back additively on successes. A
+``Retry-After`` header pauses the whole bucket, so concurrent callers back off
+together instead of each retrying on its own schedule.
+
+Each source also gets a ``CircuitBreaker``: after repeated transport failures
+(timeouts, connection errors, 5xx) the source is skipped outright until a
+single probe request succeeds again.
+"""
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import time
+
+from api.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# AIMD tuning: halve the rate on a 429, recover 1/20th of the ceiling per success
+RATE_DECREASE_FACTOR = 0.5
+RATE_INCREASE_FRACTION = 0.05
+MIN_RATE_FRACTION = 0.05
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ProviderThrottle:
+    """
+    Adaptive rate limiter and concurrency governor for one upstream source
+
+    Usage:
+        async with throttle:
+            response = await session.get(...)
+        throttle.record_success()  # or throttle.record_rate_limited(retry_after)
+
+    Callers are served in arrival order: waiting for the in-flight semaphore
+    and for a token both queue FIFO.
+    """
+
+    def __init__(self, name: str, requests_per_second: float, max_in_flight: int):
+        self.name = name
+        self.max_rate = float(requests_per_second)
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.max_in_flight = max_in_flight
+        self.rate = self.max_rate
+        # Allow a short burst of up to one second's worth of requests
+        self.capacity = max(1.0, self.max_rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+        self.rate_limited_count = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _primitives(self):
+        # asyncio primitives belong to one event loop, recreate them if the
+        # throttle is used from a new loop (e.g. between test clients)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._token_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._token_lock, self._semaphore
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait for an in-flight slot and a token"""
+        token_lock, semaphore = self._primitives()
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+            try:
+                async with token_lock:
+                    while True:
+                        now = time.monotonic()
+                        wait = self._paused_until - now
+                        if wait <= 0:
+                            self._refill(now)
+                            if self._tokens >= 1:
+                                self._tokens -= 1
+                                break
+                            wait = (1 - self._tokens) / self.rate
+                        await asyncio.sleep(wait)
+            except BaseException:
+                semaphore.release()
+                raise
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def release(self) -> None:
+        """Give back the in-flight slot"""
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "ProviderThrottle":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def record_success(self) -> None:
+        """Additive increase after a successful request"""
+        if self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_INCREASE_FRACTION)
+
+    def record_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease after a 429
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait, pauses every
+                caller of this source
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        self.rate_limited_count += 1
+        logger.warning(
+            f"Rate limited by {self.name}, rate reduced to {self.rate:.2f} req/s"
+            + (f", pausing {retry_after:.1f}s" if retry_after else "")
+        )
+
+    def get_stats(self) -> dict:
+        """
+        Get throttle statistics
+
+        Returns:
+            Dictionary with throttle stats
+        """
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": self._waiting,
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            "rate_limited": self.rate_limited_count
+        }
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one upstream source
+
+    * closed: requests flow; ``failure_threshold`` consecutive failures open it
+    * open: requests are rejected until ``reset_timeout`` seconds have passed
+    * half_open: one probe request is let through; success closes the
+      breaker, failure opens it again
+
+    Every state transition is counted for metrics.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self.failure_count = 0  # total, never reset
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self.transitions: Dict[str, int] = {}
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half_open once the reset timeout has passed"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def _probing(self) -> bool:
+        # A probe that never reported back (e.g. a cancelled request) expires
+        # after another reset timeout so the breaker cannot get stuck
+        return (
+            self._probe_started_at is not None
+            and time.monotonic() - self._probe_started_at < self.reset_timeout
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether a request would currently be let through (without claiming the probe)"""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probing)
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent
+
+        In half-open state only the first caller is allowed, as the probe.
+
+        Returns:
+            True if the request may proceed
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probe_started_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a request that reached a healthy upstream"""
+        self._failures = 0
+        self._probe_started_at = None
+        if self._state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a timeout, connection error or server error"""
+        self._failures += 1
+        self.failure_count += 1
+        self._probe_started_at = None
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self._failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    def reset(self) -> None:
+        """Force the breaker closed and forget consecutive failures"""
+        self.record_success()
+
+    def _transition(self, state: str) -> None:
+        key = f"{self._state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Circuit breaker for {self.name}: {self._state} -> {state}")
+        self._state = state
+
+    def get_stats(self) -> dict:
+        """
+        Get circuit breaker statistics
+
+        Returns:
+            Dictionary with breaker stats
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "transitions": dict(self.transitions)
+        }
+
+
+_throttles: Dict[str, ProviderThrottle] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_throttle(name: str) -> ProviderThrottle:
+    """
+    Get the shared throttle for a provider
+
+    Limits are read from ``<NAME>_REQUESTS_PER_SECOND`` and
+    ``<NAME>_MAX_IN_FLIGHT`` settings (e.g. ``FRED_MAX_IN_FLIGHT``), falling
+    back to the ``PROVIDER_*`` defaults.
+
+    Args:
+        name: Provider name, e.g. "FRED" or "World Bank"
+
+    Returns:
+        Throttle shared by every instance of the provider
+    """
+    throttle = _throttles.get(name)
+    if throttle is None:
+        prefix = name.upper().replace(" ", "_")
+        throttle = ProviderThrottle(
+            name,
+            getattr(settings, f"{prefix}_REQUESTS_PER_SECOND", settings.PROVIDER_REQUESTS_PER_SECOND),
+            getattr(settings, f"{prefix}_MAX_IN_FLIGHT", settings.PROVIDER_MAX_IN_FLIGHT)
+        )
+        _throttles[name] = throttle
+    return throttle
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the shared circuit breaker for a provider
+
+    Args:
+        name: Provider name, e.g. "FRED" or "World Bank"
+
+    Returns:
+        Circuit breaker shared by every instance of the provider
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name, settings.CIRCUIT_BREAKER_THRESHOLD, settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+        )
+        _breakers[name] = breaker
+    return breaker
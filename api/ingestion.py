@@ -0,0 +1,380 @@
+"""
+Background ingestion of hot series
+
+Keeps frequently requested indicator/country pairs warm by refreshing them on
+a schedule instead of waiting for the first user after expiry. The set of
+series is the configured ``INGESTION_SERIES`` plus the most requested series
+from ``APIRequestLog``; each is refreshed (as a delta sync) whenever its
+frequency-aware TTL (``ttl_for_series``) runs out, with bounded concurrency.
+
+Refreshed series go into the in-process series store and are persisted to the
+``cached_data`` table. The API loads that table into its store on startup and,
+with ``INGESTION_READ_PERSISTED``, reads it again whenever a series is missing
+from its store or stale, so it picks up a standalone daemon's refreshes.
+
+Run inside the API process with ``ENABLE_INGESTION=true``, or standalone:
+
+    python -m api.ingestion
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import heapq
+import signal
+import time
+
+from api.core.config import settings
+from api.core.database import SessionLocal, init_db
+from api.models.schemas import DataSource, EconomicIndicatorResponse
+from api.providers.manager import ProviderManager, provider_manager
+from api.utils.series_store import StoredSeries, series_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+Series = Tuple[str, str]  # (indicator ID, country code)
+
+INDICATORS_PREFIX = f"{settings.API_V1_STR}/indicators/"
+# Sub-routes of the indicators router that are not indicator IDs
+NON_INDICATOR_PATHS = {"", "compare", "categories", "search"}
+
+
+def configured_series() -> List[Series]:
+    """Series from ``INGESTION_SERIES`` ("INDICATOR:COUNTRY" entries)"""
+    series = []
+    for entry in settings.INGESTION_SERIES:
+        indicator, _, country = entry.partition(":")
+        if indicator and len(country) == 3:
+            series.append((indicator.upper(), country.upper()))
+        else:
+            logger.warning(f"Ignoring invalid INGESTION_SERIES entry: {entry}")
+    return series
+
+
+def parse_indicator_endpoint(endpoint: str) -> Optional[Series]:
+    """
+    Extract the series from a logged ``/api/v1/indicators/{id}?country=`` request
+
+    Args:
+        endpoint: Logged request path with query string
+
+    Returns:
+        Tuple of (indicator ID, country code) or None
+    """
+    url = urlsplit(endpoint)
+    if not url.path.startswith(INDICATORS_PREFIX):
+        return None
+    parts = url.path[len(INDICATORS_PREFIX):].split("/")
+    if len(parts) != 1 or parts[0] in NON_INDICATOR_PATHS:
+        return None
+    country = parse_qs(url.query).get("country", [""])[0]
+    if len(country) != 3:
+        return None
+    return parts[0].upper(), country.upper()
+
+
+def popular_series(limit: int, window_hours: int) -> List[Series]:
+    """
+    Most requested series according to ``APIRequestLog``
+
+    Args:
+        limit: Maximum number of series
+        window_hours: Only count requests from the last N hours
+
+    Returns:
+        Series ordered by request count, most popular first
+    """
+    from api.models.database import APIRequestLog
+
+    since = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(APIRequestLog.endpoint)
+            .filter(
+                APIRequestLog.endpoint.like(f"{INDICATORS_PREFIX}%"),
+                # Revalidated (304) requests are reads of the series too
+                APIRequestLog.status_code.in_((200, 304)),
+                APIRequestLog.timestamp >= since
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+    counts = Counter(filter(None, (parse_indicator_endpoint(endpoint) for (endpoint,) in rows)))
+    return [series for series, _ in counts.most_common(limit)]
+
+
+def _isoformat(day: Optional[date]) -> Optional[str]:
+    return day.isoformat() if day is not None else None
+
+
+def persist_series(series: List[StoredSeries]) -> None:
+    """Write refreshed series to the ``cached_data`` table in one transaction"""
+    from api.models.database import CachedData
+
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        for stored in series:
+            source = stored.response.source
+            cache_key = f"series:{stored.indicator_id}:{stored.country_code}:{source.value}"
+            row = db.query(CachedData).filter(CachedData.cache_key == cache_key).one_or_none()
+            if row is None:
+                row = CachedData(
+                    cache_key=cache_key, indicator_id=stored.indicator_id,
+                    country_code=stored.country_code, source=source.value
+                )
+                db.add(row)
+            row.data = {
+                **stored.to_response().model_dump(mode="json"),
+                "covered_from": _isoformat(stored.covered_from),
+                "covered_to": _isoformat(stored.covered_to)
+            }
+            row.expires_at = now + timedelta(seconds=stored.ttl)
+        db.commit()
+    finally:
+        db.close()
+
+
+def load_cached_series() -> int:
+    """
+    Load unexpired series persisted by the ingestion daemon into the series store
+
+    Returns:
+        Number of series loaded
+    """
+    return _load_persisted()
+
+
+def load_persisted_series(
+    indicator_id: str,
+    country_codes: Iterable[str],
+    source: Optional[DataSource] = None
+) -> int:
+    """
+    Load the unexpired persisted copies of some series into the series store
+
+    Args:
+        indicator_id: Canonical indicator ID
+        country_codes: Country codes
+        source: Only load copies from this source (any if None)
+
+    Returns:
+        Number of series loaded
+    """
+    from api.models.database import CachedData
+
+    filters = [
+        CachedData.indicator_id == indicator_id.upper(),
+        CachedData.country_code.in_([code.upper() for code in country_codes])
+    ]
+    if source is not None:
+        filters.append(CachedData.source == source.value)
+    return _load_persisted(*filters)
+
+
+def _load_persisted(*filters) -> int:
+    """Load unexpired ``series:`` rows of ``cached_data`` matching ``filters`` into the series store"""
+    from api.models.database import CachedData
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(CachedData)
+            .filter(
+                CachedData.cache_key.like("series:%"),
+                CachedData.expires_at > datetime.now(timezone.utc),
+                *filters
+            )
+            .all()
+        )
+        loaded = 0
+        for row in rows:
+            data = dict(row.data)
+            # Rows written before the coverage was persisted hold the response only
+            coverage = {
+                key: date.fromisoformat(data.pop(key)) if data.get(key) else None
+                for key in ("covered_from", "covered_to") if key in data
+            }
+            try:
+                response = EconomicIndicatorResponse.model_validate(data)
+            except ValueError as e:
+                logger.warning(f"Skipping invalid cached series {row.cache_key}: {e}")
+                continue
+            # Age the series by the time it already spent persisted so it
+            # expires from the store when the row does
+            expires_at = row.expires_at
+            if expires_at.tzinfo is None:  # SQLite drops the timezone
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            stored = series_store.put(row.indicator_id, response, **coverage)
+            stored.updated_at -= max(0.0, stored.ttl - remaining)
+            loaded += 1
+    finally:
+        db.close()
+    return loaded
+
+
+class IngestionScheduler:
+    """
+    Refreshes hot series whenever their TTL runs out
+
+    Due series are kept in a heap ordered by next run time. The target set is
+    recomputed every ``INGESTION_TARGETS_REFRESH`` seconds; series that drop
+    out of it are no longer scheduled. Each series has at most one live heap
+    entry: entries carry the generation they were scheduled with and those
+    left behind by dropped (or dropped and re-added) series are skipped.
+    """
+
+    def __init__(
+        self,
+        manager: ProviderManager = provider_manager,
+        concurrency: int = None,
+        persist: bool = True
+    ):
+        self.manager = manager
+        self.concurrency = concurrency or settings.INGESTION_CONCURRENCY
+        self.persist = persist
+        self._queue: List[Tuple[float, int, Series]] = []
+        self._queued: Dict[Series, int] = {}  # generation of each series' live heap entry
+        self._generation = 0
+        self._targets: set = set()
+        self._targets_at = 0.0
+        self.refreshed = 0
+        self.failed = 0
+
+    def targets(self) -> List[Series]:
+        """Configured series followed by the most popular ones"""
+        series = configured_series()
+        try:
+            series += popular_series(settings.INGESTION_TOP_N, settings.INGESTION_POPULARITY_WINDOW_HOURS)
+        except Exception as e:
+            logger.warning(f"Could not read request popularity: {e}")
+        return list(dict.fromkeys(series))
+
+    def _update_targets(self) -> None:
+        targets = set(self.targets())
+        now = time.monotonic()
+        for series in self._targets - targets:
+            self._queued.pop(series, None)
+        for series in targets:
+            if series not in self._queued:
+                self._schedule(series, now)
+        self._targets = targets
+        self._targets_at = now
+        logger.info(f"Ingestion targets: {len(targets)} series")
+
+    def _schedule(self, series: Series, when: float) -> None:
+        self._generation += 1
+        self._queued[series] = self._generation
+        heapq.heappush(self._queue, (when, self._generation, series))
+
+    def _interval(self, stored: Optional[StoredSeries]) -> int:
+        if stored is None:
+            return settings.INGESTION_RETRY_INTERVAL
+        return stored.ttl
+
+    async def refresh(self, series: Series) -> Optional[StoredSeries]:
+        """Refresh one series"""
+        indicator_id, country_code = series
+        try:
+            stored = await self.manager.refresh_indicator(indicator_id, country_code)
+        except Exception as e:
+            logger.error(f"Ingestion of {indicator_id} for {country_code} failed: {e}")
+            stored = None
+        if stored is None:
+            self.failed += 1
+            return None
+
+        self.refreshed += 1
+        return stored
+
+    async def run_once(self) -> int:
+        """
+        Refresh every series that is due
+
+        Returns:
+            Number of series processed
+        """
+        if time.monotonic() - self._targets_at >= settings.INGESTION_TARGETS_REFRESH:
+            await asyncio.to_thread(self._update_targets)
+
+        now = time.monotonic()
+        due: List[Series] = []
+        while self._queue and self._queue[0][0] <= now:
+            _, generation, series = heapq.heappop(self._queue)
+            if self._queued.get(series) == generation:
+                del self._queued[series]
+                due.append(series)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(series: Series) -> Optional[StoredSeries]:
+            async with semaphore:
+                stored = await self.refresh(series)
+            if series in self._targets:
+                self._schedule(series, time.monotonic() + self._interval(stored))
+            return stored
+
+        refreshed = [stored for stored in await asyncio.gather(*(run(s) for s in due)) if stored]
+        if refreshed and self.persist:
+            try:
+                await asyncio.to_thread(persist_series, refreshed)
+            except Exception as e:
+                logger.error(f"Could not persist {len(refreshed)} refreshed series: {e}")
+        return len(due)
+
+    async def run_forever(self, tick: float = None) -> None:
+        """Run the schedule until cancelled"""
+        tick = tick or settings.INGESTION_TICK
+        logger.info(f"Ingestion scheduler started (concurrency={self.concurrency})")
+        while True:
+            processed = await self.run_once()
+            if processed:
+                logger.info(
+                    f"Ingestion pass: {processed} series "
+                    f"(total refreshed={self.refreshed}, failed={self.failed})"
+                )
+            await asyncio.sleep(tick)
+
+    def get_stats(self) -> dict:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dictionary with scheduler stats
+        """
+        return {
+            "targets": len(self._targets),
+            "queued": len(self._queued),
+            "refreshed": self.refreshed,
+            "failed": self.failed
+        }
+
+
+async def main() -> None:
+    """Run the ingestion daemon as a standalone process"""
+    await init_db()
+    scheduler = IngestionScheduler()
+    task = asyncio.create_task(scheduler.run_forever())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:  # Windows
+            pass
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info("Ingestion daemon stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+    asyncio.run(main())
@@ -10,13 +10,25 @@ from fastapi.responses import JSONResponse
 from typing import Optional, List
 import time
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from api.routers import economic_indicators, countries, markets, analytics, marketing
+from api.routers import economic_indicators, countries, markets, analytics, marketing, monitoring, admin
 from api.core.config import settings
 from api.core.database import init_db
+from api.providers.manager import provider_manager
+from api.utils.request_log import request_log
+from api.utils.metrics import stage_latency
+from api.utils.loop_monitor import loop_monitor
+from api.ingestion import IngestionScheduler, load_cached_series
 from api.middleware.rate_limit import RateLimitMiddleware
 from api.middleware.auth import AuthMiddleware
+from api.middleware.request_log import RequestLogMiddleware
+from api.middleware.security import SecurityHeadersMiddleware
+from api.middleware.timing import ServerTimingMiddleware
+from api.middleware.metrics import MetricsMiddleware
+from api.middleware.load_shed import LoadSheddingMiddleware
+from api.middleware.profiling import ProfilingMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,8 +41,26 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Economic Data API...")
     await init_db()
     logger.info("Database initialized")
+    
+    try:
+        loaded = await asyncio.to_thread(load_cached_series)
+        if loaded:
+            logger.info(f"Loaded {loaded} series persisted by the ingestion daemon")
+    except Exception as e:
+        logger.warning(f"Could not load persisted series: {e}")
+    
+    # Event-loop lag (load shedding) and the slow-callback watchdog
+    tasks = [asyncio.create_task(loop_monitor.run())]
+    if settings.ENABLE_REQUEST_LOGGING:
+        tasks.append(asyncio.create_task(request_log.run()))
+    if settings.ENABLE_INGESTION:
+        tasks.append(asyncio.create_task(IngestionScheduler().run_forever()))
+    
     yield
     logger.info("Shutting down Economic Data API...")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 # Create FastAPI application
 app = FastAPI(
@@ -96,15 +126,24 @@ app.add_middleware(
 )
 
 # Add Security Headers Middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
-    return response
+app.add_middleware(SecurityHeadersMiddleware)
+
+# Per-stage timings (Server-Timing header, in-process histograms)
+app.add_middleware(ServerTimingMiddleware)
+
+# On-demand request profiles for admin keys (not added without any)
+if settings.ENABLE_PROFILING and settings.ADMIN_API_KEYS:
+    app.add_middleware(
+        ProfilingMiddleware,
+        admin_keys=settings.ADMIN_API_KEYS,
+        key_header=settings.API_KEY_NAME,
+        interval=settings.PROFILING_INTERVAL,
+        directory=settings.PROFILING_DIR
+    )
+
+# Request logging (feeds APIRequestLog, used by the ingestion daemon)
+if settings.ENABLE_REQUEST_LOGGING:
+    app.add_middleware(RequestLogMiddleware)
 
 # Add custom middleware
 if settings.ENABLE_RATE_LIMITING:
@@ -113,6 +152,14 @@ if settings.ENABLE_RATE_LIMITING:
 if settings.ENABLE_AUTH:
     app.add_middleware(AuthMiddleware)
 
+# Admission control: overloaded workers reject before any other work is done
+if settings.ENABLE_LOAD_SHEDDING:
+    app.add_middleware(LoadSheddingMiddleware)
+
+# Outermost, so requests rejected by auth or rate limiting are counted too
+if settings.ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(
     economic_indicators.router,
@@ -139,6 +186,16 @@ app.include_router(
     prefix="/api/v1/marketing",
     tags=["Marketing Team"]
 )
+app.include_router(
+    monitoring.router,
+    tags=["Monitoring"]
+)
+app.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["Admin"],
+    include_in_schema=False
+)
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -162,10 +219,18 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint"""
+    providers = provider_manager.get_provider_health()
     return {
         "status": "healthy",
         "timestamp": time.time(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "providers": providers,
+        "degraded_providers": [
+            source for source, health in providers.items()
+            if health["circuit_breaker"]["state"] != "closed"
+        ],
+        "stage_latency": stage_latency.snapshot(),
+        "event_loop": loop_monitor.get_stats()
     }
 
 @app.get("/api/v1/sources", tags=["Data Sources"])
@@ -1,39 +1,57 @@
 """
 Authentication middleware
 """
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 import time
 from api.core.config import settings
+from api.core.quotas import APIKeyRegistry
 
-class AuthMiddleware(BaseHTTPMiddleware):
+class AuthMiddleware:
     """
-    Simple API key authentication middleware
+    Simple API key authentication middleware (pure ASGI)
+
+    Keys are looked up by SHA-256 digest in an ``APIKeyRegistry`` built from
+    ``API_KEYS`` and ``API_KEY_TIERS``; with no keys configured any key is
+    accepted.
     """
-    
+
     # Public endpoints that don't require authentication
     PUBLIC_ENDPOINTS = [
         "/",
         "/health",
+        "/metrics",
         "/docs",
         "/openapi.json",
         "/redoc",
         "/api/v1/sources"
     ]
-    
-    async def dispatch(self, request: Request, call_next):
-        # Check if endpoint is public
-        path = request.url.path
-        if any(path.startswith(endpoint) for endpoint in self.PUBLIC_ENDPOINTS):
-            return await call_next(request)
-        
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.registry = APIKeyRegistry.from_settings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Check if endpoint is public ("/" itself only, the others with sub-paths)
+        path = scope["path"]
+        if any(
+            path == endpoint or (endpoint != "/" and path.startswith(endpoint.rstrip("/") + "/"))
+            for endpoint in self.PUBLIC_ENDPOINTS
+        ):
+            await self.app(scope, receive, send)
+            return
+
         # Get API key from header
-        api_key = request.headers.get(settings.API_KEY_NAME)
-        
+        api_key = Headers(scope=scope).get(settings.API_KEY_NAME)
+
         # Validate API key
         if not api_key:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=401,
                 content={
                     "error": "Authentication required",
@@ -41,9 +59,11 @@ class AuthMiddleware(BaseHTTPMiddleware):
                     "timestamp": time.time()
                 }
             )
-        
-        if settings.API_KEYS and api_key not in settings.API_KEYS:
-            return JSONResponse(
+            await response(scope, receive, send)
+            return
+
+        if self.registry.tier_for(api_key) is None:
+            response = JSONResponse(
                 status_code=403,
                 content={
                     "error": "Invalid API key",
@@ -51,8 +71,8 @@ class AuthMiddleware(BaseHTTPMiddleware):
                     "timestamp": time.time()
                 }
             )
-        
-        # Continue with request
-        response = await call_next(request)
-        return response
+            await response(scope, receive, send)
+            return
 
+        # Continue with request
+        await self.app(scope, receive, send)
@@ -0,0 +1,106 @@
+"""
+Load shedding middleware
+
+Admission control by event-loop lag and requests in flight. Low-priority
+routes (analytics, marketing) are rejected first, at the soft thresholds;
+every other route only at the critical ones, so core indicator reads keep
+their latency while the worker is saturated. Rejected requests get a 503
+with ``Retry-After`` and never reach authentication, rate limiting or the
+handlers.
+"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Optional, Sequence
+import time
+
+from api.core.config import settings
+from api.utils.loop_monitor import LoopLagMonitor, loop_monitor
+from api.utils.metrics import load_shed_rejections
+
+LOW_PRIORITY = "low"
+NORMAL_PRIORITY = "normal"
+
+
+class LoadSheddingMiddleware:
+    """
+    Rejects requests with 503 while the worker is overloaded (pure ASGI)
+
+    A threshold of 0 disables that check.
+    """
+
+    # Never shed: probes and scrapes must see an overloaded worker
+    EXEMPT_ENDPOINTS = ("/health", "/metrics")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        monitor: LoopLagMonitor = None,
+        low_priority_paths: Sequence[str] = None,
+        lag_threshold: float = None,
+        in_flight_threshold: int = None,
+        critical_lag: float = None,
+        max_in_flight: int = None,
+        retry_after: int = None
+    ):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+        self.low_priority_paths = tuple(
+            settings.LOAD_SHED_LOW_PRIORITY_PATHS if low_priority_paths is None else low_priority_paths
+        )
+        self.limits = {
+            LOW_PRIORITY: (
+                settings.LOAD_SHED_LAG_THRESHOLD if lag_threshold is None else lag_threshold,
+                settings.LOAD_SHED_IN_FLIGHT_THRESHOLD if in_flight_threshold is None else in_flight_threshold
+            ),
+            NORMAL_PRIORITY: (
+                settings.LOAD_SHED_CRITICAL_LAG if critical_lag is None else critical_lag,
+                settings.LOAD_SHED_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+            )
+        }
+        self.retry_after = settings.LOAD_SHED_RETRY_AFTER if retry_after is None else retry_after
+        self.in_flight = 0
+
+    def priority(self, path: str) -> Optional[str]:
+        """Priority of a path, None for exempt endpoints"""
+        if path in self.EXEMPT_ENDPOINTS:
+            return None
+        if path.startswith(self.low_priority_paths):
+            return LOW_PRIORITY
+        return NORMAL_PRIORITY
+
+    def overload(self, priority: str) -> Optional[str]:
+        """Which limit of a priority is exceeded ("lag" or "in_flight"), if any"""
+        max_lag, max_in_flight = self.limits[priority]
+        if max_lag and self.monitor.lag >= max_lag:
+            return "lag"
+        if max_in_flight and self.in_flight >= max_in_flight:
+            return "in_flight"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.priority(scope["path"])
+        reason = priority and self.overload(priority)
+        if reason:
+            load_shed_rejections.inc(priority, reason)
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error": "Service overloaded",
+                    "message": "The server is shedding load, retry later",
+                    "retry_after": self.retry_after,
+                    "timestamp": time.time()
+                },
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
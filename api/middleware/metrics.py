@@ -0,0 +1,62 @@
+"""
+Request metrics middleware
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter
+
+from api.utils.metrics import http_request_duration, http_requests, http_requests_in_flight
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that handled a request
+
+    The router writes the matched route into the scope. Routes of included
+    routers carry the prefixed template in FastAPI's effective route context
+    (``route.path_format`` is relative to the router there).
+    """
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    if context is not None and getattr(context, "path_format", None):
+        return context.path_format
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    return scope["path"] if "endpoint" in scope else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and their duration per route template (pure ASGI)
+
+    Routes are labelled by their path template (``/api/v1/indicators/{indicator}``)
+    so the label set stays bounded; paths that match no route share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            template = route_template(scope)
+            method = scope["method"]
+            http_requests.inc(method, template, str(status_code))
+            http_request_duration.labels(method, template).observe(perf_counter() - started)
@@ -0,0 +1,131 @@
+"""
+Request profiling middleware
+
+Requests carrying an ``X-Profile`` header or a ``profile`` query parameter
+from an admin key are run under the sampling profiler
+(``api.utils.profiler``). ``1`` stores the speedscope profile in the profile
+directory and names it in the ``X-Profile-Id`` response header; ``return``
+responds with the profile instead of the endpoint's response. Flags from other
+clients are ignored.
+
+Used by both the API and the LEM engine; each passes its own settings.
+"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterable, Optional
+from urllib.parse import parse_qs
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import os
+import time
+
+from api.core.quotas import AdminKeys
+from api.utils.profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_PARAM = "profile"
+RETURN_MODE = "return"
+OFF_VALUES = ("", "0", "false", "no")
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests of admin keys that ask for it (pure ASGI)
+
+    Only add it with admin keys configured: every other request then pays one
+    pass over its headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admin_keys: Iterable[str],
+        key_header: str = "X-API-Key",
+        interval: float = 0.001,
+        directory: str = "profiles"
+    ):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped application
+            admin_keys: Keys (plain or ``sha256:<hex digest>``) allowed to profile
+            key_header: Header carrying the API key
+            interval: Seconds between stack samples
+            directory: Where stored profiles are written
+        """
+        self.app = app
+        self.admin_keys = AdminKeys(admin_keys)
+        self.key_header = key_header.lower().encode("latin-1")
+        self.interval = interval
+        self.directory = directory
+
+    def mode(self, scope: Scope) -> Optional[str]:
+        """Profiling mode requested by an admin key ("store" or "return"), if any"""
+        flag = api_key = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                flag = value.decode("latin-1")
+            elif name == self.key_header:
+                api_key = value.decode("latin-1")
+        if flag is None and PROFILE_PARAM.encode() in scope.get("query_string", b""):
+            flag = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_PARAM, [None])[-1]
+        if flag is None or flag.strip().lower() in OFF_VALUES:
+            return None
+        if not self.admin_keys.is_admin(api_key):
+            logger.debug(f"Ignoring profiling flag without an admin key on {scope['path']}")
+            return None
+        return RETURN_MODE if flag.strip().lower() == RETURN_MODE else "store"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        mode = self.mode(scope) if scope["type"] == "http" and self.admin_keys else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}"
+        name = f"{scope['method']} {scope['path']}"
+        status_code = 500
+
+        async def send_profiled(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if mode == RETURN_MODE:
+                    return
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", profile_id.encode())]
+            elif mode == RETURN_MODE:
+                return  # the profile replaces the body
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            profiler.stop()
+        profile = profiler.speedscope(f"{name} ({status_code})")
+        logger.info(
+            f"Profiled {name}: {status_code} in {profiler.duration * 1000:.1f} ms, "
+            f"{len(profiler.samples)} samples (profile {profile_id})"
+        )
+
+        if mode == RETURN_MODE:
+            response = JSONResponse(profile, headers={
+                "X-Profile-Id": profile_id, "X-Profiled-Status": str(status_code)
+            })
+            await response(scope, receive, send)
+        else:
+            await asyncio.to_thread(self.store, profile_id, profile)
+
+    def store(self, profile_id: str, profile: dict) -> str:
+        """Write a profile to ``<directory>/<profile_id>.speedscope.json``"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{profile_id}.speedscope.json")
+        with open(path, "w") as f:
+            json.dump(profile, f)
+        return path
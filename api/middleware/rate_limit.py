@@ -1,86 +1,447 @@
 """
 Rate limiting middleware
+
+Limits are enforced per client with GCRA. By default the state lives in the
+worker's memory; with ``REDIS_URL`` set it is shared by every worker through
+an atomic Lua script in Redis, falling back to the local limiter while Redis
+is unreachable.
+
+Each request is charged its route cost against the rate limit and daily
+quota of the client's tier (see ``api.core.quotas``). API keys are tracked
+by their digest, so neither worker memory nor Redis holds the keys.
 """
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+import math
 import time
-from collections import defaultdict
-from typing import Dict
-import asyncio
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+from api.core.config import settings
+from api.core.quotas import (
+    ANONYMOUS_TIER, DEFAULT_TIER, APIKeyRegistry, DailyQuota, RouteCosts, Tier, hash_api_key, load_tiers,
+    utc_day
+)
+from api.utils.memory import stores
+from api.utils.metrics import rate_limit_rejections
+import logging
+
+logger = logging.getLogger(__name__)
+
+# GCRA plus daily quota in one atomic step. Uses the Redis clock so workers on
+# different hosts agree on time. KEYS[1]: client key, KEYS[2]: client's quota
+# key for the day; ARGV: emission interval, window (seconds), cost, daily
+# quota (0 for none). Returns {allowed, remaining, seconds, quota remaining
+# (-1 for none), quota exceeded} with seconds as a string (Lua numbers are
+# truncated to integers on the way out).
+GCRA_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()  -- Redis < 5: allow writes after TIME
+end
+local emission_interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local quota = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local quota_left = -1
+if quota > 0 then
+    quota_left = quota - (tonumber(redis.call('GET', KEYS[2])) or 0)
+    if quota_left < cost then
+        return {0, 0, tostring(86400 - now % 86400), math.max(quota_left, 0), 1}
+    end
+end
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission_interval * cost
+local allow_at = new_tat - window
+if allow_at - now > 1e-6 then  -- epoch times: tolerate sub-microsecond error
+    return {0, 0, tostring(allow_at - now), quota_left, 0}
+end
+redis.call('SET', KEYS[1], string.format('%.6f', new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+if quota > 0 then
+    quota_left = quota - redis.call('INCRBY', KEYS[2], cost)
+    redis.call('EXPIRE', KEYS[2], 172800)
+end
+return {1, math.floor((window - (new_tat - now)) / emission_interval + 1e-6), tostring(new_tat - now), quota_left, 0}
+"""
+
+
+class Decision(NamedTuple):
+    """Outcome of a rate limit check"""
+    allowed: bool
+    remaining: int  # cost units left in the window
+    reset: float  # seconds until the window is full again, or until retry if rejected
+    quota_remaining: Optional[int] = None  # cost units left today, None without a daily quota
+    quota_exceeded: bool = False  # rejected by the daily quota rather than the rate
+
+
+class GCRALimiter:
     """
-    Rate limiting middleware using sliding window algorithm
+    Generic cell rate algorithm (GCRA) limiter
+
+    Equivalent to a token bucket of ``limit`` tokens refilled over ``window``
+    seconds, but each client is a single number: its theoretical arrival time
+    (TAT), the time at which its bucket will be full again. A check is O(1) and
+    involves no awaits, so it is atomic on the event loop without a lock.
+
+    Clients live in an LRU map bounded by ``max_clients``. A client whose TAT
+    has passed has a full bucket, which is the same as not being tracked, so
+    evicting the least recently seen client (normally long idle) loses nothing.
     """
-    
-    def __init__(self, app, requests_per_minute: int = 100, window_size: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.window_size = window_size
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.lock = asyncio.Lock()
-    
-    async def dispatch(self, request: Request, call_next):
-        # Get client identifier (IP address or API key)
-        client_id = request.client.host if request.client else "unknown-client"
-        api_key = request.headers.get("X-API-Key")
-        if api_key:
-            client_id = api_key
-        
-        current_time = time.time()
-        
-        async with self.lock:
-            # Clean old requests outside the window
-            self.requests[client_id] = [
-                req_time for req_time in self.requests[client_id]
-                if current_time - req_time < self.window_size
-            ]
-            
-            # Periodic cleanup of all clients to prevent memory leaks
-            # Trigger cleanup if we have too many clients tracked
-            if len(self.requests) > 1000:
-                clients_to_remove = []
-                for cid, reqs in self.requests.items():
-                    # Filter valid requests
-                    valid_reqs = [t for t in reqs if current_time - t < self.window_size]
-                    if not valid_reqs:
-                        clients_to_remove.append(cid)
-                    else:
-                        self.requests[cid] = valid_reqs
-                
-                for cid in clients_to_remove:
-                    del self.requests[cid]
-            
-            # Check rate limit
-            if len(self.requests[client_id]) >= self.requests_per_minute:
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "message": f"Maximum {self.requests_per_minute} requests per {self.window_size} seconds",
-                        "retry_after": self.window_size,
-                        "timestamp": current_time
-                    },
-                    headers={
-                        "Retry-After": str(self.window_size),
-                        "X-RateLimit-Limit": str(self.requests_per_minute),
-                        "X-RateLimit-Remaining": "0",
-                        "X-RateLimit-Reset": str(int(current_time + self.window_size))
-                    }
+
+    def __init__(self, limit: int, window: float, max_clients: int = 100000):
+        """
+        Initialize limiter
+
+        Args:
+            limit: Requests allowed per window (also the burst size)
+            window: Window length in seconds
+            max_clients: Maximum number of tracked clients
+        """
+        self.limit = limit
+        self.window = float(window)
+        self.max_clients = max_clients
+        self.emission_interval = self.window / limit
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def check(self, client_id: str, now: Optional[float] = None, cost: int = 1) -> Tuple[bool, int, float]:
+        """
+        Count a request against a client's quota
+
+        Args:
+            client_id: Client identifier
+            now: Current monotonic time (time.monotonic() if None)
+            cost: Requests the call counts as
+
+        Returns:
+            Tuple of (allowed, remaining requests, seconds until the quota is
+            back in full if allowed, otherwise seconds until the next request
+            is allowed)
+        """
+        if now is None:
+            now = time.monotonic()
+        tat = max(self._tat.get(client_id, now), now)
+        new_tat = tat + self.emission_interval * cost
+        allow_at = new_tat - self.window
+        if allow_at - now > 1e-9:  # tolerate float drift of the summed intervals
+            return False, 0, allow_at - now
+
+        self._tat[client_id] = new_tat
+        self._tat.move_to_end(client_id)
+        if len(self._tat) > self.max_clients:
+            self._tat.popitem(last=False)
+        remaining = int((self.window - (new_tat - now)) / self.emission_interval + 1e-9)
+        return True, remaining, new_tat - now
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class QuotaLimiter:
+    """
+    Per-tier GCRA limits plus daily quotas, in worker memory
+
+    Usage:
+        limiter = QuotaLimiter(load_tiers(), window=60)
+        decision = limiter.check("pro", api_key, cost=5)
+    """
+
+    def __init__(self, tiers: Mapping[str, Tier], window: float, max_clients: int = 100000):
+        """
+        Initialize limiter
+
+        Args:
+            tiers: Tiers keyed by name (must include ``default``)
+            window: Window length in seconds
+            max_clients: Maximum number of tracked clients per tier
+        """
+        self.tiers = dict(tiers)
+        self.window = float(window)
+        self.limiters: Dict[str, GCRALimiter] = {
+            name: GCRALimiter(tier.requests, window, max_clients) for name, tier in self.tiers.items()
+        }
+        self.daily = DailyQuota(max_clients)
+
+    def tier(self, name: str) -> Tier:
+        """Tier by name, the default tier for unknown names"""
+        return self.tiers.get(name) or self.tiers[DEFAULT_TIER]
+
+    def check(self, tier: str, client_id: str, cost: int = 1, now: Optional[float] = None) -> Decision:
+        """
+        Charge a request against the client's rate limit and daily quota
+
+        Args:
+            tier: Client's tier
+            client_id: Client identifier
+            cost: Cost units of the request
+            now: Current monotonic time (time.monotonic() if None)
+
+        Returns:
+            Decision; the daily quota is only charged for allowed requests
+        """
+        limits = self.tier(tier)
+        quota_left = None
+        if limits.daily_quota:
+            day, day_left = utc_day()
+            quota_left = limits.daily_quota - self.daily.used(client_id, day)
+            if quota_left < cost:
+                return Decision(False, 0, day_left, max(quota_left, 0), True)
+
+        allowed, remaining, reset = self.limiters[limits.name].check(client_id, now, cost)
+        if allowed and quota_left is not None:
+            quota_left = limits.daily_quota - self.daily.consume(client_id, cost, day)
+        return Decision(allowed, remaining, reset, quota_left)
+
+
+class RedisGCRALimiter:
+    """
+    GCRA limiter whose state is shared through Redis
+
+    Each check is one ``EVALSHA`` round trip (redis-py loads the script on
+    the first call and after a Redis restart). When Redis fails, checks go to
+    the local ``fallback`` limiter and Redis is retried after
+    ``retry_interval`` seconds, so an outage degrades to per-worker limits
+    instead of failing requests.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        fallback: QuotaLimiter,
+        key_prefix: str = "ratelimit:",
+        retry_interval: float = 30.0
+    ):
+        """
+        Initialize limiter
+
+        Args:
+            client: ``redis.asyncio`` client
+            fallback: Local limiter with the same tiers and window
+            key_prefix: Prefix of the per-client keys
+            retry_interval: Seconds to use the fallback after a Redis error
+        """
+        self.client = client
+        self.fallback = fallback
+        self.key_prefix = key_prefix
+        self.retry_interval = retry_interval
+        self._script = client.register_script(GCRA_SCRIPT)
+        self._down_until = 0.0
+        self.fallback_checks = 0
+
+    async def check(self, tier: str, client_id: str, cost: int = 1) -> Decision:
+        """
+        Charge a request against the client's rate limit and daily quota
+
+        Args:
+            tier: Client's tier
+            client_id: Client identifier
+            cost: Cost units of the request
+
+        Returns:
+            Same as ``QuotaLimiter.check``
+        """
+        if time.monotonic() >= self._down_until:
+            limits = self.fallback.tier(tier)
+            limiter = self.fallback.limiters[limits.name]
+            day, _ = utc_day()
+            try:
+                allowed, remaining, seconds, quota_left, exceeded = await self._script(
+                    keys=[self.key_prefix + client_id, f"{self.key_prefix}quota:{day}:{client_id}"],
+                    args=[limiter.emission_interval, limiter.window, cost, limits.daily_quota]
                 )
-            
-            # Add current request
-            self.requests[client_id].append(current_time)
-        
-        # Process request
-        response = await call_next(request)
-        
+                return Decision(
+                    bool(allowed), int(remaining), float(seconds),
+                    None if int(quota_left) < 0 else int(quota_left), bool(exceeded)
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Redis rate limiter unavailable, using local limits for {self.retry_interval:.0f}s: {e}"
+                )
+                self._down_until = time.monotonic() + self.retry_interval
+        self.fallback_checks += 1
+        return self.fallback.check(tier, client_id, cost)
+
+
+def create_redis_limiter(fallback: QuotaLimiter) -> Optional[RedisGCRALimiter]:
+    """
+    Build the shared limiter if ``REDIS_URL`` is configured
+
+    Args:
+        fallback: Local limiter used while Redis is unavailable
+
+    Returns:
+        Redis-backed limiter, or None to limit per worker only
+    """
+    if not settings.REDIS_URL or not settings.RATE_LIMIT_DISTRIBUTED:
+        return None
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed, rate limits are per worker")
+        return None
+    # Connections are opened lazily; a Redis that is down or slow is handled per check
+    client = redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT
+    )
+    return RedisGCRALimiter(client, fallback)
+
+
+class RateLimitMiddleware:
+    """
+    Rate limiting middleware using the generic cell rate algorithm
+    (shared across workers through Redis when ``REDIS_URL`` is set)
+
+    Clients with a registered API key are limited per key in the key's tier,
+    everyone else per IP address in the anonymous tier. Requests are charged
+    their route cost; zero-cost routes are not limited.
+
+    Pure ASGI: the ``X-RateLimit-*`` headers are added to the
+    ``http.response.start`` message, the body is passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = None,
+        window_size: int = None,
+        max_clients: int = None
+    ):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application
+            requests_per_minute: Limit of the anonymous and default tiers
+                (RATE_LIMIT_REQUESTS if None)
+            window_size: Window length in seconds (RATE_LIMIT_WINDOW if None)
+            max_clients: Clients tracked per tier (RATE_LIMIT_MAX_CLIENTS if None)
+        """
+        self.app = app
+        self.requests_per_minute = requests_per_minute or settings.RATE_LIMIT_REQUESTS
+        self.window_size = window_size or settings.RATE_LIMIT_WINDOW
+        tiers = load_tiers()
+        for name in (ANONYMOUS_TIER, DEFAULT_TIER):
+            tiers[name] = tiers[name]._replace(requests=self.requests_per_minute)
+        self.registry = APIKeyRegistry.from_settings()
+        self.route_costs = RouteCosts.from_settings()
+        self.limiter = QuotaLimiter(tiers, self.window_size, max_clients or settings.RATE_LIMIT_MAX_CLIENTS)
+        self.shared_limiter = create_redis_limiter(self.limiter)
+        for name, limiter in self.limiter.limiters.items():
+            stores.register(f"rate_limit.{name}", lambda limiter=limiter: limiter._tat)
+        stores.register("rate_limit.daily_quota", lambda daily=self.limiter.daily: daily._used)
+        self._limit_headers = {
+            name: (b"x-ratelimit-limit", str(tier.requests).encode()) for name, tier in tiers.items()
+        }
+        for name, tier in tiers.items():
+            too_costly = sorted(
+                path for path, cost in {**self.route_costs.costs, "*": self.route_costs.default}.items()
+                if cost > tier.max_cost
+            )
+            if too_costly:
+                logger.warning(
+                    f"Rate limit tier '{name}' admits at most {tier.max_cost} cost units, "
+                    f"requests to {', '.join(too_costly)} cost more and will always be rejected"
+                )
+
+    def identify(self, scope: Scope) -> Tuple[str, str]:
+        """
+        Tier and identifier of the client
+
+        Returns:
+            Tuple of (tier name, client identifier: the API key's digest or
+            the client's IP address)
+        """
+        api_key = Headers(scope=scope).get(settings.API_KEY_NAME)
+        tier = self.registry.tier_for(api_key) if api_key else None
+        if tier is not None:
+            return tier, hash_api_key(api_key)
+        client = scope.get("client")
+        return ANONYMOUS_TIER, client[0] if client else "unknown-client"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.route_costs.cost(scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        tier, client_id = self.identify(scope)
+        current_time = time.time()
+        limits = self.limiter.tier(tier)
+        if cost > limits.max_cost:
+            # Waiting would not help, so there is no Retry-After
+            rate_limit_rejections.inc(tier, "cost")
+            response = JSONResponse(
+                status_code=403,
+                content={
+                    "error": "Request cost exceeds tier limit",
+                    "message": f"This request costs {cost} cost units, tier '{limits.name}' "
+                               f"admits at most {limits.max_cost}",
+                    "cost": cost,
+                    "timestamp": current_time
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        if self.shared_limiter is not None:
+            decision = await self.shared_limiter.check(tier, client_id, cost)
+        else:
+            decision = self.limiter.check(tier, client_id, cost)
+        limit_header = self._limit_headers.get(tier) or self._limit_headers[DEFAULT_TIER]
+
+        # Check rate limit
+        if not decision.allowed:
+            rate_limit_rejections.inc(tier, "quota" if decision.quota_exceeded else "rate")
+            retry_after = math.ceil(decision.reset)
+            headers = {
+                "Retry-After": str(retry_after),
+                "X-RateLimit-Limit": limit_header[1].decode(),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(current_time + retry_after))
+            }
+            if decision.quota_remaining is not None:
+                headers["X-Quota-Remaining"] = str(decision.quota_remaining)
+            if decision.quota_exceeded:
+                message = f"Daily quota of {self.limiter.tier(tier).daily_quota} cost units used"
+            else:
+                message = f"Maximum {limit_header[1].decode()} cost units per {self.window_size} seconds"
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "error": "Daily quota exceeded" if decision.quota_exceeded else "Rate limit exceeded",
+                    "message": message,
+                    "cost": cost,
+                    "retry_after": retry_after,
+                    "timestamp": current_time
+                },
+                headers=headers
+            )
+            await response(scope, receive, send)
+            return
+
         # Add rate limit headers
-        remaining = self.requests_per_minute - len(self.requests[client_id])
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + self.window_size))
-        
-        return response
+        rate_headers = [
+            limit_header,
+            (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+            (b"x-ratelimit-reset", str(int(current_time + math.ceil(decision.reset))).encode())
+        ]
+        if decision.quota_remaining is not None:
+            rate_headers.append((b"x-quota-remaining", str(decision.quota_remaining).encode()))
 
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *rate_headers]
+            await send(message)
+
+        # Process request
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,50 @@
+"""
+Request logging middleware (feeds APIRequestLog, used by the ingestion daemon)
+"""
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from api.core.config import settings
+from api.utils.request_log import RequestLogBuffer, request_log
+
+
+class RequestLogMiddleware:
+    """
+    Records every HTTP request in the request log buffer (pure ASGI)
+
+    The status comes from ``http.response.start``; the response time covers
+    the whole exchange including the body.
+    """
+
+    def __init__(self, app: ASGIApp, buffer: RequestLogBuffer = request_log):
+        self.app = app
+        self.buffer = buffer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            query = scope.get("query_string", b"").decode("latin-1")
+            headers = Headers(scope=scope)
+            client = scope.get("client")
+            self.buffer.record(
+                scope["path"] + (f"?{query}" if query else ""), scope["method"], status_code,
+                time.perf_counter() - started,
+                ip_address=client[0] if client else None,
+                user_agent=headers.get("user-agent"),
+                api_key=headers.get(settings.API_KEY_NAME)
+            )
@@ -0,0 +1,48 @@
+"""
+Server-Timing middleware
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter
+
+from api.core.config import settings
+from api.utils.timing import end_request, record, start_request
+
+
+class ServerTimingMiddleware:
+    """
+    Collects stage timings per request and reports them in a
+    ``Server-Timing`` header (pure ASGI)
+
+    Adds ``render`` (endpoint return to response start) and ``total``
+    (middleware entry to response start) to the spans recorded while the
+    request was handled. With ``SERVER_TIMING_HEADER`` off the stages are
+    still aggregated into the histograms but not sent to clients.
+    """
+
+    def __init__(self, app: ASGIApp, send_header: bool = None):
+        self.app = app
+        self.send_header = settings.SERVER_TIMING_HEADER if send_header is None else send_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token, timings = start_request()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                now = perf_counter()
+                if timings.handler_done is not None:
+                    record("render", now - timings.handler_done)
+                record("total", now - timings.started)
+                if self.send_header:
+                    message["headers"] = [
+                        *message.get("headers", ()), (b"server-timing", timings.header_value().encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
@@ -157,6 +157,42 @@ class AnalyticsRequest(BaseModel):
         description="List of calculations to perform"
     )
 
+class CrossCorrelationRequest(BaseModel):
+    """Request for lead/lag cross-correlation analysis"""
+    indicators: List[str] = Field(
+        default=["GDP", "INFLATION", "UNEMPLOYMENT", "INTEREST_RATE", "GOVERNMENT_DEBT"],
+        description="Indicators to correlate (all pairs unless `pairs` is given)"
+    )
+    countries: List[str] = Field(..., description="List of country codes")
+    pairs: Optional[List[List[str]]] = Field(
+        None, description="Explicit [leader, follower] indicator pairs"
+    )
+    max_lag: int = Field(8, ge=1, le=120, description="Maximum lag in periods")
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    
+    @validator('indicators')
+    def validate_indicators(cls, v):
+        if len(v) > 20:
+            raise ValueError('Maximum 20 indicators allowed for cross-correlation')
+        return [i.upper() for i in v]
+    
+    @validator('countries')
+    def validate_countries(cls, v):
+        if not v:
+            raise ValueError('At least 1 country required')
+        if len(v) > 20:
+            raise ValueError('Maximum 20 countries allowed for cross-correlation')
+        return [c.upper() for c in v]
+    
+    @validator('pairs')
+    def validate_pairs(cls, v):
+        if v is None:
+            return v
+        if any(len(pair) != 2 for pair in v):
+            raise ValueError('Each pair must contain exactly 2 indicators')
+        return [[a.upper(), b.upper()] for a, b in v]
+
 class AnalyticsResponse(BaseModel):
     """Response for analytics"""
     indicator: str
@@ -2,13 +2,19 @@
 Base class for data providers
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable, FrozenSet
 from datetime import date, datetime
 import aiohttp
 import asyncio
 from api.models.schemas import DataPoint, EconomicIndicatorResponse
 from api.core.config import settings
+from api.core.resilience import (
+    CircuitBreaker, ProviderThrottle, get_breaker, get_throttle, parse_retry_after
+)
+from api.utils.metrics import upstream_request_duration, upstream_requests
+from api.utils.timing import span
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +23,28 @@ class BaseDataProvider(ABC):
     Abstract base class for economic data providers
     """
     
+    # Canonical indicator ID -> upstream ID
+    INDICATOR_MAP: Dict[str, str] = {}
+    
+    # Countries the provider covers (None: any country)
+    COUNTRIES: Optional[FrozenSet[str]] = None
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
         self.base_url = ""
         self.name = "Base Provider"
         self.timeout = aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
     
+    @property
+    def throttle(self) -> ProviderThrottle:
+        """Rate limiter and concurrency governor shared by this source"""
+        return get_throttle(self.name)
+    
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by this source"""
+        return get_breaker(self.name)
+    
     @abstractmethod
     async def get_indicator(
         self,
@@ -72,8 +94,9 @@ class BaseDataProvider(ABC):
         url: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
-        max_retries: int = None
-    ) -> Optional[Dict[str, Any]]:
+        max_retries: int = None,
+        reader: Optional[Callable[[aiohttp.ClientResponse], Awaitable[Any]]] = None
+    ) -> Optional[Any]:
         """
         Fetch data with retry logic
         
@@ -82,38 +105,86 @@ class BaseDataProvider(ABC):
             params: Query parameters
             headers: HTTP headers
             max_retries: Maximum number of retries
+            reader: Coroutine that consumes a successful response (e.g. to
+                parse the body incrementally); defaults to decoding JSON
             
         Returns:
-            JSON response or None
+            JSON response (or the reader's result) or None
         """
         if max_retries is None:
             max_retries = settings.MAX_RETRIES
         
         for attempt in range(max_retries):
+            if not self.breaker.allow_request():
+                logger.info(f"Circuit open for {self.name}, skipping {url}")
+                return None
+            started = None
             try:
                 async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                    async with session.get(url, params=params, headers=headers) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        elif response.status == 429:
-                            # Rate limited, wait and retry
-                            wait_time = settings.RETRY_DELAY * (attempt + 1)
-                            logger.warning(f"Rate limited by {self.name}, waiting {wait_time}s")
-                            await asyncio.sleep(wait_time)
-                        else:
-                            logger.error(f"HTTP {response.status} from {self.name}: {url}")
-                            return None
+                    async with self.throttle:
+                        with span("upstream"):
+                            started = time.perf_counter()
+                            async with session.get(url, params=params, headers=headers) as response:
+                                if response.status == 200:
+                                    self.breaker.record_success()
+                                    self.throttle.record_success()
+                                    try:
+                                        if reader is not None:
+                                            result = await reader(response)
+                                        else:
+                                            result = await response.json()
+                                    except (asyncio.TimeoutError, aiohttp.ClientConnectionError,
+                                            aiohttp.ClientPayloadError):
+                                        raise  # transport failure while reading: retried below
+                                    except Exception as e:
+                                        # The upstream answered but the body is unusable:
+                                        # retrying would get the same payload
+                                        self._record_upstream("bad_payload", started)
+                                        logger.error(f"Unparseable response from {self.name}: {url}: {e}")
+                                        return None
+                                    self._record_upstream("ok", started)
+                                    return result
+                                elif response.status == 429:
+                                    self._record_upstream("rate_limited", started)
+                                    self.breaker.record_success()  # Upstream is up, just busy
+                                    # Rate limited: slow down every caller of this source; the
+                                    # next attempt waits for the throttle instead of sleeping here
+                                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                    self.throttle.record_rate_limited(
+                                        retry_after or settings.RETRY_DELAY * (attempt + 1)
+                                    )
+                                else:
+                                    if response.status >= 500:
+                                        self._record_upstream("server_error", started)
+                                        self.breaker.record_failure()
+                                    else:
+                                        self._record_upstream("client_error", started)
+                                        self.breaker.record_success()
+                                    logger.error(f"HTTP {response.status} from {self.name}: {url}")
+                                    return None
             except asyncio.TimeoutError:
+                self._record_upstream("timeout", started)
+                self.breaker.record_failure()
                 logger.warning(f"Timeout fetching from {self.name}, attempt {attempt + 1}/{max_retries}")
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(settings.RETRY_DELAY)
+                    with span("retry_wait"):
+                        await asyncio.sleep(settings.RETRY_DELAY)
             except Exception as e:
+                self._record_upstream("error", started)
+                self.breaker.record_failure()
                 logger.error(f"Error fetching from {self.name}: {e}")
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(settings.RETRY_DELAY)
+                    with span("retry_wait"):
+                        await asyncio.sleep(settings.RETRY_DELAY)
         
         return None
     
+    def _record_upstream(self, outcome: str, started: Optional[float]) -> None:
+        """Count an upstream call (timed from ``started`` if it was sent)"""
+        upstream_requests.inc(self.name, outcome)
+        if started is not None:
+            upstream_request_duration.labels(self.name).observe(time.perf_counter() - started)
+    
     def parse_date(self, date_str: str) -> Optional[date]:
         """
         Parse date string to date object
@@ -3,12 +3,14 @@ FRED (Federal Reserve Economic Data) provider
 """
 from typing import List, Optional, Dict, Any
 from datetime import date
+import asyncio
 from api.providers.base import BaseDataProvider
 from api.models.schemas import (
     DataPoint, EconomicIndicatorResponse, DataSource,
     Frequency, IndicatorCategory
 )
 from api.core.config import settings
+from api.utils.cache import CacheManager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,10 +36,13 @@ class FREDProvider(BaseDataProvider):
         "M2": "M2SL",  # Money Supply
     }
     
+    COUNTRIES = frozenset({"USA"})
+    
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key or settings.FRED_API_KEY)
         self.base_url = "https://api.stlouisfed.org/fred"
         self.name = "FRED"
+        self._series_info_cache = CacheManager(default_ttl=settings.METADATA_CACHE_TTL)
     
     async def get_indicator(
         self,
@@ -63,16 +68,12 @@ class FREDProvider(BaseDataProvider):
         # Map indicator to FRED series ID
         series_id = self.INDICATOR_MAP.get(indicator_id.upper(), indicator_id)
         
-        # Fetch series info
-        series_info = await self._get_series_info(series_id)
-        if not series_info:
-            return None
-        
-        # Fetch observations
-        observations = await self._get_observations(
-            series_id, start_date, end_date
+        # Fetch series info and observations concurrently
+        series_info, observations = await asyncio.gather(
+            self._get_series_info(series_id),
+            self._get_observations(series_id, start_date, end_date)
         )
-        if not observations:
+        if not series_info or not observations:
             return None
         
         # Parse data points
@@ -108,7 +109,11 @@ class FREDProvider(BaseDataProvider):
         )
     
     async def _get_series_info(self, series_id: str) -> Optional[Dict[str, Any]]:
-        """Get series metadata"""
+        """Get series metadata (cached, it rarely changes)"""
+        series_info = self._series_info_cache.get(series_id)
+        if series_info is not None:
+            return series_info
+        
         url = f"{self.base_url}/series"
         params = {
             "series_id": series_id,
@@ -118,7 +123,9 @@ class FREDProvider(BaseDataProvider):
         
         result = await self.fetch_with_retry(url, params)
         if result and 'seriess' in result and result['seriess']:
-            return result['seriess'][0]
+            series_info = result['seriess'][0]
+            self._series_info_cache.set(series_id, series_info)
+            return series_info
         return None
     
     async def _get_observations(
@@ -2,14 +2,19 @@
 Data provider manager - coordinates multiple data sources
 """
 from typing import List, Optional, Dict, Any
-from datetime import date
+from datetime import date, timedelta
+import asyncio
+import time
 from api.providers.fred import FREDProvider
 from api.providers.world_bank import WorldBankProvider
 from api.providers.oecd import OECDProvider
-from api.models.schemas import (
-    EconomicIndicatorResponse, DataSource
-)
+from api.providers.routing import IndicatorRegistry, SourceRouter
+from api.models.schemas import EconomicIndicatorResponse, DataSource
 from api.core.config import settings
+from api.utils.series_store import StoredSeries, series_store
+from api.utils.cache import negative_cache
+from api.utils.series import PERIOD_DAYS
+from api.utils.timing import span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +36,9 @@ class ProviderManager:
         
         if settings.ENABLE_OECD:
             self.providers[DataSource.OECD] = OECDProvider()
+        
+        self.router = SourceRouter()
+        self.registry = IndicatorRegistry.from_providers(self.providers)
     
     async def get_indicator(
         self,
@@ -54,64 +62,405 @@ class ProviderManager:
             EconomicIndicatorResponse or None
         """
         
+        # Series that no source could serve a moment ago are not retried upstream
+        with span("cache"):
+            known_missing = negative_cache.contains(
+                self._missing_key(indicator_id, country_code, start_date, end_date)
+            )
+        if known_missing:
+            logger.info(f"{indicator_id} for {country_code} is known to be unavailable")
+            return None
+        
+        # Open-ended requests for a series we already hold are served from the
+        # store while it is fresh and otherwise only fetch what is new
+        if end_date is None:
+            source = None if preferred_source == DataSource.ALL else preferred_source
+            with span("store"):
+                stored = series_store.get(indicator_id, country_code, source)
+            if (stored is None or not stored.is_fresh) and settings.INGESTION_READ_PERSISTED:
+                # A standalone ingestion daemon may have refreshed it meanwhile
+                with span("store"):
+                    if await self._load_persisted(indicator_id, [country_code], source):
+                        stored = series_store.get(indicator_id, country_code, source)
+            if stored is not None and stored.covers(start_date) \
+                    and stored.response.source in self._capable_sources(indicator_id, country_code):
+                if stored.is_fresh:
+                    with span("store"):
+                        return stored.to_response(start_date)
+                refreshed = await self.refresh_indicator(indicator_id, country_code, stored.response.source)
+                if refreshed is not None:
+                    with span("store"):
+                        return refreshed.to_response(start_date)
+        
         # If specific source requested, try only that
-        if preferred_source != DataSource.ALL and preferred_source in self.providers:
+        if preferred_source != DataSource.ALL and self._is_available(preferred_source) \
+                and preferred_source in self._capable_sources(indicator_id, country_code):
+            started = time.perf_counter()
             try:
-                result = await self.providers[preferred_source].get_indicator(
-                    indicator_id, country_code, start_date, end_date
-                )
-                if result:
-                    return result
+                with span(f"provider.{preferred_source.value}"):
+                    result = await self.providers[preferred_source].get_indicator(
+                        indicator_id, country_code, start_date, end_date
+                    )
             except Exception as e:
                 logger.error(f"Error from {preferred_source}: {e}")
+                result = None
+            self.router.record(
+                preferred_source, indicator_id, country_code, time.perf_counter() - started, bool(result)
+            )
+            if result:
+                series_store.put(indicator_id, result, covered_from=start_date, covered_to=end_date)
+                return result
         
         # Try all providers in order of preference
-        source_order = self._get_source_order(country_code)
+        return await self._get_from_sources(
+            indicator_id, country_code, start_date, end_date,
+            self._get_source_order(country_code, indicator_id)
+        )
+    
+    def _serve_stored(
+        self,
+        results: Dict[str, EconomicIndicatorResponse],
+        indicator_id: str,
+        country_codes: List[str],
+        start_date: Optional[date],
+        source: Optional[DataSource]
+    ):
+        """Add the fresh stored series covering ``start_date`` of ``country_codes`` to ``results``"""
+        for code in country_codes:
+            stored = series_store.get(indicator_id, code, source)
+            if stored is not None and stored.is_fresh and stored.covers(start_date) \
+                    and stored.response.source in self._capable_sources(indicator_id, code):
+                results[code] = stored.to_response(start_date)
+    
+    async def _load_persisted(
+        self,
+        indicator_id: str,
+        country_codes: List[str],
+        source: Optional[DataSource]
+    ) -> int:
+        """
+        Load series persisted by the ingestion daemon (``cached_data``) into the series store
+        
+        Args:
+            indicator_id: Indicator identifier
+            country_codes: Country codes
+            source: Only load copies from this source (any if None)
+            
+        Returns:
+            Number of series loaded (0 if the database is unavailable)
+        """
+        from api.ingestion import load_persisted_series
+        
+        try:
+            return await asyncio.to_thread(load_persisted_series, indicator_id, country_codes, source)
+        except Exception as e:
+            logger.debug(f"Could not read persisted {indicator_id} series: {e}")
+            return 0
+    
+    async def _get_from_sources(
+        self,
+        indicator_id: str,
+        country_code: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        source_order: List[DataSource],
+        cache_missing: bool = True
+    ) -> Optional[EconomicIndicatorResponse]:
+        """
+        Try each source in order until one returns data
         
+        If every source answered cleanly without data (no errors, timeouts
+        or skipped circuit breakers), the series is recorded in the
+        negative cache when ``cache_missing`` is set.
+        """
+        clean = True
         for source in source_order:
-            if source not in self.providers:
+            if not self._is_available(source):
+                clean = False
                 continue
             
+            provider = self.providers[source]
+            failures = provider.breaker.failure_count
+            started = time.perf_counter()
             try:
-                result = await self.providers[source].get_indicator(
-                    indicator_id, country_code, start_date, end_date
-                )
-                if result:
-                    logger.info(f"Successfully fetched {indicator_id} for {country_code} from {source}")
-                    return result
+                with span(f"provider.{source.value}"):
+                    result = await provider.get_indicator(
+                        indicator_id, country_code, start_date, end_date
+                    )
             except Exception as e:
                 logger.error(f"Error fetching from {source}: {e}")
-                continue
+                result = None
+                clean = False
+            if provider.breaker.failure_count != failures:
+                # An upstream call failed (possibly a concurrent one), so a
+                # missing result does not prove the series does not exist
+                clean = False
+            self.router.record(
+                source, indicator_id, country_code, time.perf_counter() - started, bool(result)
+            )
+            if result:
+                logger.info(f"Successfully fetched {indicator_id} for {country_code} from {source}")
+                series_store.put(indicator_id, result, covered_from=start_date, covered_to=end_date)
+                # e.g. recorded missing by a concurrent request or before a refresh found it
+                negative_cache.discard(self._missing_key(indicator_id, country_code, start_date, end_date))
+                return result
         
         logger.warning(f"Could not fetch {indicator_id} for {country_code} from any source")
+        if clean and cache_missing:
+            negative_cache.add(self._missing_key(indicator_id, country_code, start_date, end_date))
         return None
     
-    def _get_source_order(self, country_code: str) -> List[DataSource]:
+    async def refresh_indicator(
+        self,
+        indicator_id: str,
+        country_code: str,
+        source: Optional[DataSource] = None
+    ) -> Optional[StoredSeries]:
         """
-        Determine optimal source order based on country
+        Bring a stored series up to date with an incremental fetch
+        
+        Only observations from the last stored date minus an overlap window
+        (DELTA_SYNC_OVERLAP_PERIODS periods of the series' frequency) are
+        requested. The overlap is compared with the stored values so upstream
+        revisions of recent observations are picked up and reported.
+        Series that are not stored yet are fetched in full.
         
         Args:
+            indicator_id: Indicator identifier
             country_code: Country code
+            source: Source of the stored series (most recently updated if None)
             
         Returns:
-            Ordered list of data sources to try
+            The updated stored series, or the stored series unchanged if the
+            upstream call failed, or None if nothing is stored or fetched
+        """
+        stored = series_store.get(indicator_id, country_code, source)
+        if stored is None or stored.last_date is None:
+            result = await self.get_indicator(
+                indicator_id, country_code,
+                preferred_source=source if source is not None else DataSource.ALL
+            )
+            return series_store.get(indicator_id, country_code, result.source) if result else None
+        
+        source = stored.response.source
+        if not self._is_available(source):
+            return stored
+        
+        overlap = PERIOD_DAYS.get(stored.response.frequency, 31) * settings.DELTA_SYNC_OVERLAP_PERIODS
+        delta_start = stored.last_date - timedelta(days=overlap)
+        
+        started = time.perf_counter()
+        try:
+            with span(f"provider.{source.value}"):
+                delta = await self.providers[source].get_indicator(
+                    indicator_id, country_code, delta_start, None
+                )
+        except Exception as e:
+            logger.error(f"Error refreshing {indicator_id} for {country_code} from {source}: {e}")
+            delta = None
+        self.router.record(source, indicator_id, country_code, time.perf_counter() - started, bool(delta))
+        if not delta:
+            logger.warning(f"Delta sync of {indicator_id} for {country_code} failed, serving stored data")
+            return stored
+        
+        updated = series_store.put(indicator_id, delta, covered_from=delta_start)
+        logger.info(
+            f"Delta sync of {indicator_id} for {country_code} from {source}: "
+            f"{len(delta.data)} observations since {delta_start}, {len(updated.revised_dates)} revised"
+        )
+        return updated
+    
+    @staticmethod
+    def _missing_key(
+        indicator_id: str,
+        country_code: str,
+        start_date: Optional[date],
+        end_date: Optional[date]
+    ) -> str:
+        """Negative cache key of a series request"""
+        return negative_cache.make_key(indicator_id, country_code, start_date, end_date)
+    
+    async def get_indicator_bulk(
+        self,
+        indicator_id: str,
+        country_codes: List[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        preferred_source: DataSource = DataSource.ALL
+    ) -> Dict[str, EconomicIndicatorResponse]:
         """
-        # US data: prefer FRED
-        if country_code == "USA":
-            return [DataSource.FRED, DataSource.WORLD_BANK, DataSource.OECD]
+        Fetch one indicator for many countries
         
-        # OECD countries: prefer OECD
-        oecd_countries = [
-            "AUS", "AUT", "BEL", "CAN", "CHL", "COL", "CZE", "DNK", "EST", "FIN",
-            "FRA", "DEU", "GRC", "HUN", "ISL", "IRL", "ISR", "ITA", "JPN", "KOR",
-            "LVA", "LTU", "LUX", "MEX", "NLD", "NZL", "NOR", "POL", "PRT", "SVK",
-            "SVN", "ESP", "SWE", "CHE", "TUR", "GBR"
-        ]
-        if country_code in oecd_countries:
-            return [DataSource.OECD, DataSource.WORLD_BANK, DataSource.FRED]
+        Open-ended requests for series held fresh in the series store are
+        served from it. Of the rest, countries whose preferred source is World
+        Bank are fetched together in one bulk request. The others, and any
+        country missing from the bulk response, go through the regular
+        per-country fallback chain concurrently.
         
-        # All others: prefer World Bank
-        return [DataSource.WORLD_BANK, DataSource.OECD, DataSource.FRED]
+        Args:
+            indicator_id: Indicator identifier
+            country_codes: Country codes (ISO 3166-1 alpha-3)
+            start_date: Start date
+            end_date: End date
+            preferred_source: Preferred data source
+            
+        Returns:
+            Dictionary mapping country code to indicator response
+        """
+        with span("cache"):
+            country_codes = [
+                code for code in dict.fromkeys(c.upper() for c in country_codes)
+                if not negative_cache.contains(self._missing_key(indicator_id, code, start_date, end_date))
+            ]
+        results: Dict[str, EconomicIndicatorResponse] = {}
+        
+        # Stale stored series are refetched with the others rather than
+        # delta-synced one by one, which would defeat the bulk request
+        if end_date is None:
+            source = None if preferred_source == DataSource.ALL else preferred_source
+            with span("store"):
+                self._serve_stored(results, indicator_id, country_codes, start_date, source)
+            missing = [c for c in country_codes if c not in results]
+            if missing and settings.INGESTION_READ_PERSISTED:
+                with span("store"):
+                    if await self._load_persisted(indicator_id, missing, source):
+                        self._serve_stored(results, indicator_id, missing, start_date, source)
+        pending = [c for c in country_codes if c not in results]
+        
+        world_bank = self.providers.get(DataSource.WORLD_BANK)
+        if not self._is_available(DataSource.WORLD_BANK):
+            world_bank = None
+        if preferred_source == DataSource.WORLD_BANK:
+            bulk_codes = [
+                c for c in pending
+                if DataSource.WORLD_BANK in self._capable_sources(indicator_id, c)
+            ]
+        elif preferred_source == DataSource.ALL:
+            bulk_codes = [
+                c for c in pending
+                if self._get_source_order(c, indicator_id)[:1] == [DataSource.WORLD_BANK]
+            ]
+        else:
+            bulk_codes = []
+        
+        if world_bank is not None and bulk_codes:
+            started = time.perf_counter()
+            try:
+                with span(f"provider.{DataSource.WORLD_BANK.value}"):
+                    bulk = await world_bank.get_indicator_bulk(indicator_id, bulk_codes, start_date, end_date)
+            except Exception as e:
+                logger.error(f"Error bulk fetching {indicator_id} from {DataSource.WORLD_BANK}: {e}")
+                bulk = {}
+            # Every country waited for the whole bulk call
+            latency = time.perf_counter() - started
+            for code in bulk_codes:
+                self.router.record(DataSource.WORLD_BANK, indicator_id, code, latency, code in bulk)
+            with span("store"):
+                for code, result in bulk.items():
+                    if code in bulk_codes:
+                        series_store.put(indicator_id, result, covered_from=start_date, covered_to=end_date)
+                        results[code] = result
+        
+        # Everything not served by the bulk request falls back per country
+        remaining = [c for c in country_codes if c not in results]
+        if remaining:
+            tried_bulk = set(bulk_codes) if world_bank is not None else set()
+            
+            async def fetch_one(code: str) -> Optional[EconomicIndicatorResponse]:
+                if preferred_source not in (DataSource.ALL, DataSource.WORLD_BANK):
+                    return await self.get_indicator(indicator_id, code, start_date, end_date, preferred_source)
+                order = self._get_source_order(code, indicator_id)
+                if code in tried_bulk:
+                    order = [s for s in order if s != DataSource.WORLD_BANK]
+                # A country missing from the bulk response does not prove the series
+                # is unavailable (the bulk call may have failed part way), so it is
+                # not recorded in the negative cache
+                return await self._get_from_sources(
+                    indicator_id, code, start_date, end_date, order, cache_missing=code not in tried_bulk
+                )
+            
+            fetched = await asyncio.gather(*(fetch_one(code) for code in remaining))
+            for code, result in zip(remaining, fetched):
+                if result:
+                    results[code] = result
+        
+        return {code: results[code] for code in country_codes if code in results}
+    
+    async def get_cross_section(
+        self,
+        indicator_id: str,
+        on_date: Optional[date] = None
+    ) -> Dict[str, EconomicIndicatorResponse]:
+        """
+        Load an indicator for all countries into the series store
+        
+        Only World Bank serves every country in one call; the panel is
+        fetched in bulk and written to the local series store.
+        
+        Args:
+            indicator_id: Indicator identifier
+            on_date: Reference date (latest if None)
+            
+        Returns:
+            Dictionary mapping country code to indicator response
+        """
+        sources = self.registry.sources_for(indicator_id)
+        if not self._is_available(DataSource.WORLD_BANK) \
+                or (sources is not None and DataSource.WORLD_BANK not in sources):
+            return {}
+        provider = self.providers[DataSource.WORLD_BANK]
+        
+        try:
+            with span(f"provider.{DataSource.WORLD_BANK.value}"):
+                responses = await provider.get_cross_section(indicator_id, on_date)
+        except Exception as e:
+            logger.error(f"Error fetching cross-section of {indicator_id}: {e}")
+            return {}
+        
+        for response in responses.values():
+            series_store.put(indicator_id, response, covered_to=on_date)
+        if responses:
+            series_store.mark_panel(
+                indicator_id, DataSource.WORLD_BANK, on_date.isoformat() if on_date else "latest"
+            )
+        return responses
+    
+    def _is_available(self, source: DataSource) -> bool:
+        """Whether a source is enabled and its circuit breaker lets requests through"""
+        provider = self.providers.get(source)
+        if provider is None:
+            return False
+        if not provider.breaker.available:
+            logger.info(f"Skipping {source}: circuit breaker is {provider.breaker.state}")
+            return False
+        return True
+    
+    def _capable_sources(self, indicator_id: str, country_code: str) -> List[DataSource]:
+        """Enabled sources that can serve the series (all of them for unknown indicators)"""
+        capable = self.registry.capable_sources(indicator_id, country_code)
+        if capable is None:
+            # Unknown ID: pass it through to every source as before
+            return list(self.providers.keys())
+        return [source for source in capable if source in self.providers]
+    
+    def _get_source_order(self, country_code: str, indicator_id: str) -> List[DataSource]:
+        """
+        Determine source order for a series
+        
+        Only sources that can serve the indicator for the country are
+        considered. They start from the static routing table for the country
+        and are re-ranked by their live latency and success rate.
+        
+        Args:
+            country_code: Country code
+            indicator_id: Indicator identifier
+            
+        Returns:
+            Ordered list of data sources to try
+        """
+        return self.router.order(
+            indicator_id, country_code, self._capable_sources(indicator_id, country_code)
+        )
     
     async def list_available_indicators(self) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -152,6 +501,21 @@ class ProviderManager:
     def get_available_sources(self) -> List[str]:
         """Get list of enabled data sources"""
         return [source.value for source in self.providers.keys()]
+    
+    def get_provider_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Circuit breaker and throttle state of each provider
+        
+        Returns:
+            Dictionary mapping source to breaker and throttle stats
+        """
+        return {
+            source.value: {
+                "circuit_breaker": provider.breaker.get_stats(),
+                "throttle": provider.throttle.get_stats()
+            }
+            for source, provider in self.providers.items()
+        }
 
 # Global provider manager instance
 provider_manager = ProviderManager()
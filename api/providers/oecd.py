@@ -4,6 +4,7 @@ OECD Data provider
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime
 from api.providers.base import BaseDataProvider
+from api.providers.routing import OECD_COUNTRIES
 from api.models.schemas import (
     DataPoint, EconomicIndicatorResponse, DataSource,
     Frequency, IndicatorCategory
@@ -29,6 +30,8 @@ class OECDProvider(BaseDataProvider):
         "CURRENT_ACCOUNT": "CAGDPPT",
     }
     
+    COUNTRIES = OECD_COUNTRIES
+    
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key)
         self.base_url = "https://stats.oecd.org/sdmx-json/data"
@@ -0,0 +1,289 @@
+"""
+Source routing for ProviderManager
+
+Decides which upstream source to try first for an indicator/country pair. A
+static routing table, precomputed once at import, gives the prior order (FRED
+for the US, OECD for members, World Bank elsewhere). Live statistics then
+re-rank it: every upstream call updates an exponentially weighted moving
+average of latency and success rate for its (source, indicator, country), and
+sources are ordered by expected time to a successful answer.
+
+Before any of that, the ``IndicatorRegistry`` (built once from the providers'
+indicator maps and country coverage) narrows the candidates to sources that
+can serve the series at all, so the fallback chain does not spend upstream
+round trips on IDs a provider would pass through verbatim and 404 on.
+"""
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+import time
+
+from api.models.schemas import DataSource
+import logging
+
+if TYPE_CHECKING:
+    from api.providers.base import BaseDataProvider
+
+logger = logging.getLogger(__name__)
+
+OECD_COUNTRIES = frozenset({
+    "AUS", "AUT", "BEL", "CAN", "CHL", "COL", "CZE", "DNK", "EST", "FIN",
+    "FRA", "DEU", "GRC", "HUN", "ISL", "IRL", "ISR", "ITA", "JPN", "KOR",
+    "LVA", "LTU", "LUX", "MEX", "NLD", "NZL", "NOR", "POL", "PRT", "SVK",
+    "SVN", "ESP", "SWE", "CHE", "TUR", "GBR", "USA"
+})
+
+US_ORDER = (DataSource.FRED, DataSource.WORLD_BANK, DataSource.OECD)
+OECD_ORDER = (DataSource.OECD, DataSource.WORLD_BANK, DataSource.FRED)
+DEFAULT_ORDER = (DataSource.WORLD_BANK, DataSource.OECD, DataSource.FRED)
+
+# Precomputed prior: country -> source order (DEFAULT_ORDER for anything else)
+STATIC_ROUTES: Dict[str, Tuple[DataSource, ...]] = {
+    **{country: OECD_ORDER for country in OECD_COUNTRIES},
+    "USA": US_ORDER,
+}
+
+EWMA_ALPHA = 0.2  # weight of the newest observation
+PRIOR_LATENCY = 1.0  # assumed latency (seconds) of a source without statistics
+PRIOR_RANK_PENALTY = 0.25  # seconds added per position in the static order
+MIN_SUCCESS_RATE = 0.05
+STATS_MAX_AGE = 3600  # ignore statistics not refreshed for an hour
+MAX_TRACKED_SERIES = 10000
+
+
+class IndicatorRegistry:
+    """
+    Canonical indicator ID -> sources (and their country coverage) that serve it
+
+    Upstream IDs from the providers' maps (e.g. FRED's ``UNRATE`` or World
+    Bank's ``SP.POP.TOTL``) are registered for their own source only, so
+    passing a native ID through still reaches the one source that knows it.
+    IDs that appear nowhere are unknown and keep the legacy behaviour of
+    being tried against every source.
+    """
+
+    def __init__(self):
+        # indicator -> source -> covered countries (None: any country)
+        self._canonical: Dict[str, Dict[DataSource, Optional[FrozenSet[str]]]] = {}
+        self._native: Dict[str, Dict[DataSource, Optional[FrozenSet[str]]]] = {}
+
+    @classmethod
+    def from_providers(cls, providers: Mapping[DataSource, "BaseDataProvider"]) -> "IndicatorRegistry":
+        """
+        Build the registry from provider indicator maps and country coverage
+
+        Args:
+            providers: Enabled providers keyed by source
+
+        Returns:
+            Populated registry
+        """
+        registry = cls()
+        for source, provider in providers.items():
+            for canonical_id, upstream_id in provider.INDICATOR_MAP.items():
+                registry.register(canonical_id, source, provider.COUNTRIES)
+                registry.register(upstream_id, source, provider.COUNTRIES, canonical=False)
+        return registry
+
+    def register(
+        self,
+        indicator_id: str,
+        source: DataSource,
+        countries: Optional[FrozenSet[str]] = None,
+        canonical: bool = True
+    ) -> None:
+        """
+        Register a source as able to serve an indicator
+
+        Args:
+            indicator_id: Indicator ID
+            source: Source serving it
+            countries: Countries covered (None: any country)
+            canonical: Whether the ID is canonical or a native upstream ID;
+                canonical registrations take precedence
+        """
+        registry = self._canonical if canonical else self._native
+        registry.setdefault(indicator_id.upper(), {})[source] = countries
+
+    def _sources(self, indicator_id: str) -> Optional[Dict[DataSource, Optional[FrozenSet[str]]]]:
+        indicator_id = indicator_id.upper()
+        sources = self._canonical.get(indicator_id)
+        return sources if sources is not None else self._native.get(indicator_id)
+
+    def is_known(self, indicator_id: str) -> bool:
+        """Whether any source registered the indicator"""
+        return self._sources(indicator_id) is not None
+
+    def sources_for(self, indicator_id: str) -> Optional[List[DataSource]]:
+        """Sources serving an indicator for at least one country, or None for unknown indicators"""
+        sources = self._sources(indicator_id)
+        return None if sources is None else list(sources)
+
+    def capable_sources(self, indicator_id: str, country_code: str) -> Optional[List[DataSource]]:
+        """
+        Sources able to serve an indicator for a country
+
+        Args:
+            indicator_id: Indicator ID
+            country_code: Country code
+
+        Returns:
+            Capable sources (possibly empty), or None for unknown indicators
+        """
+        sources = self._sources(indicator_id)
+        if sources is None:
+            return None
+        country_code = country_code.upper()
+        return [
+            source for source, countries in sources.items()
+            if countries is None or country_code in countries
+        ]
+
+    def get_indicators(self) -> Dict[str, List[str]]:
+        """Canonical indicator IDs and the sources serving them"""
+        return {
+            indicator: [source.value for source in sources]
+            for indicator, sources in self._canonical.items()
+        }
+
+
+def static_source_order(country_code: str) -> Tuple[DataSource, ...]:
+    """
+    Prior source order for a country
+
+    Args:
+        country_code: Country code (ISO 3166-1 alpha-3)
+
+    Returns:
+        Ordered tuple of data sources
+    """
+    return STATIC_ROUTES.get(country_code.upper(), DEFAULT_ORDER)
+
+
+class SourceStats:
+    """EWMA latency and success rate of one source for one series"""
+
+    __slots__ = ("latency", "success_rate", "samples", "updated_at")
+
+    def __init__(self, latency: float, success: bool):
+        self.latency = latency
+        self.success_rate = 1.0 if success else 0.0
+        self.samples = 1
+        self.updated_at = time.monotonic()
+
+    def update(self, latency: float, success: bool) -> None:
+        self.latency += EWMA_ALPHA * (latency - self.latency)
+        self.success_rate += EWMA_ALPHA * ((1.0 if success else 0.0) - self.success_rate)
+        self.samples += 1
+        self.updated_at = time.monotonic()
+
+    @property
+    def expected_cost(self) -> float:
+        """Expected seconds until a successful answer"""
+        return self.latency / max(self.success_rate, MIN_SUCCESS_RATE)
+
+
+class SourceRouter:
+    """
+    Orders candidate sources by live latency/success statistics
+
+    Statistics are kept per (source, indicator, country) in a bounded LRU map,
+    plus a per-source aggregate used for series that have no history yet.
+    """
+
+    def __init__(self, max_series: int = MAX_TRACKED_SERIES):
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[DataSource, str, str], SourceStats]" = OrderedDict()
+        self._sources: Dict[DataSource, SourceStats] = {}
+
+    def record(
+        self,
+        source: DataSource,
+        indicator_id: str,
+        country_code: str,
+        latency: float,
+        success: bool
+    ) -> None:
+        """
+        Record the outcome of one upstream call
+
+        Args:
+            source: Source that was called
+            indicator_id: Canonical indicator ID
+            country_code: Country code
+            latency: Call duration in seconds
+            success: Whether the source returned data
+        """
+        key = (source, indicator_id.upper(), country_code.upper())
+        stats = self._series.get(key)
+        if stats is None:
+            self._series[key] = SourceStats(latency, success)
+            if len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        else:
+            stats.update(latency, success)
+            self._series.move_to_end(key)
+
+        # The aggregate tracks latency only: "no data for this series" says
+        # nothing about how well the source serves other series
+        aggregate = self._sources.get(source)
+        if aggregate is None:
+            self._sources[source] = SourceStats(latency, True)
+        else:
+            aggregate.update(latency, True)
+
+    def _stats(self, source: DataSource, indicator_id: str, country_code: str) -> Optional[SourceStats]:
+        now = time.monotonic()
+        for stats in (self._series.get((source, indicator_id, country_code)), self._sources.get(source)):
+            if stats is not None and now - stats.updated_at < STATS_MAX_AGE:
+                return stats
+        return None
+
+    def order(
+        self,
+        indicator_id: str,
+        country_code: str,
+        candidates: Optional[Iterable[DataSource]] = None
+    ) -> List[DataSource]:
+        """
+        Order sources for an indicator/country pair
+
+        Args:
+            indicator_id: Canonical indicator ID
+            country_code: Country code
+            candidates: Sources to order (the static order for the country if None)
+
+        Returns:
+            Sources, most promising first
+        """
+        indicator_id = indicator_id.upper()
+        country_code = country_code.upper()
+        prior = static_source_order(country_code)
+        candidates = list(prior if candidates is None else candidates)
+
+        def score(source: DataSource) -> float:
+            rank = prior.index(source) if source in prior else len(prior)
+            stats = self._stats(source, indicator_id, country_code)
+            cost = stats.expected_cost if stats is not None else PRIOR_LATENCY
+            return cost + rank * PRIOR_RANK_PENALTY
+
+        return sorted(candidates, key=score)
+
+    def get_stats(self) -> dict:
+        """
+        Get router statistics
+
+        Returns:
+            Dictionary with per-source aggregate latency and tracked series count
+        """
+        return {
+            "tracked_series": len(self._series),
+            "sources": {
+                source.value: {"latency": round(stats.latency, 4), "samples": stats.samples}
+                for source, stats in self._sources.items()
+            }
+        }
+
+    def clear(self) -> None:
+        """Forget all statistics"""
+        self._series.clear()
+        self._sources.clear()
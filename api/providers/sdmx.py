@@ -0,0 +1,377 @@
+"""
+Incremental SDMX-JSON parser
+
+OECD SDMX-JSON messages put observations in nested ``dataSets[].series[key]
+.observations[time]`` maps, with the dimension values needed to decode the keys
+in a separate ``structure`` block that usually comes *after* the data. Loading
+the whole body with ``json.loads`` and walking it in Python keeps every
+intermediate dict alive at once, which is expensive for multi-country or
+long-horizon queries.
+
+The parser here reads the message incrementally (via ``ijson`` when it is
+installed), building one series object at a time and appending its
+observations to flat typed arrays of (series index, time index, value). The
+dimension indexes are decoded once, after the stream ends, and the flat arrays
+are split into NumPy-backed series with vectorised operations.
+"""
+from array import array
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+import numpy as np
+import logging
+
+try:
+    import ijson
+except ImportError:  # Optional dependency, fall back to json.loads
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+SERIES_PREFIX = "dataSets.item.series"
+OBSERVATIONS_PREFIX = "dataSets.item.observations"
+STRUCTURE_PREFIX = "structure"
+STRUCTURES_PREFIX = "structures.item"  # SDMX-JSON 2.0: a list, the first one describes the data
+# Messages from SDMX REST APIs wrap the data sets and structure in a "data" member
+DATA_PREFIX = "data."
+
+_QUARTER = re.compile(r"^(\d{4})-?Q([1-4])$")
+_SEMESTER = re.compile(r"^(\d{4})-?S([12])$")
+_MONTH = re.compile(r"^(\d{4})-?M?(\d{2})$")
+_WEEK = re.compile(r"^(\d{4})-?W(\d{2})$")
+
+
+def period_to_date(period: str) -> Optional[date]:
+    """
+    Convert an SDMX time period to the first day of that period
+
+    Supports annual (2020), semester (2020-S1), quarterly (2020-Q1),
+    monthly (2020-01, 2020-M01), weekly (2020-W05) and daily (2020-01-15) periods.
+    """
+    period = period.strip()
+    try:
+        if len(period) == 4 and period.isdigit():
+            return date(int(period), 1, 1)
+        match = _QUARTER.match(period)
+        if match:
+            return date(int(match.group(1)), (int(match.group(2)) - 1) * 3 + 1, 1)
+        match = _SEMESTER.match(period)
+        if match:
+            return date(int(match.group(1)), (int(match.group(2)) - 1) * 6 + 1, 1)
+        match = _MONTH.match(period)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), 1)
+        match = _WEEK.match(period)
+        if match:
+            return date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        return date.fromisoformat(period[:10])
+    except ValueError:
+        logger.warning(f"Could not parse SDMX period: {period}")
+        return None
+
+
+class SDMXSeries:
+    """A decoded SDMX series backed by NumPy arrays"""
+
+    __slots__ = ("dimensions", "dimension_names", "dates", "values")
+
+    def __init__(
+        self,
+        dimensions: Dict[str, str],
+        dimension_names: Dict[str, str],
+        dates: np.ndarray,
+        values: np.ndarray
+    ):
+        self.dimensions = dimensions  # dimension id -> value id, e.g. {"LOCATION": "USA"}
+        self.dimension_names = dimension_names  # dimension id -> value name
+        self.dates = dates
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class _Builder:
+    """Builds one JSON subtree from parser events and reports completion"""
+
+    def __init__(self):
+        self._builder = ijson.ObjectBuilder()
+        self._depth = 0
+
+    def event(self, event: str, value: Any) -> bool:
+        self._builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            self._depth += 1
+        elif event in ("end_map", "end_array"):
+            self._depth -= 1
+        return self._depth == 0
+
+    @property
+    def value(self) -> Any:
+        return self._builder.value
+
+
+class SDMXJSONParser:
+    """
+    Incremental SDMX-JSON parser
+
+    Usage:
+        parser = SDMXJSONParser()
+        for prefix, event, value in ijson.parse(body, use_float=True):
+            parser.feed(prefix, event, value)
+        series = parser.result()
+
+    Prefixes inside a top-level ``data`` member are read like top-level
+    ones. Messages that were already decoded (or when ijson is unavailable)
+    can be parsed with ``parse_sdmx_json``.
+    """
+
+    def __init__(self):
+        self._series_keys: List[str] = []
+        # Series key -> index, for messages with observation-level keys
+        self._series_index: Dict[str, int] = {}
+        self._obs_series = array("i")
+        self._obs_time = array("i")
+        self._obs_values = array("d")
+        self._structure: Optional[Dict[str, Any]] = None
+
+        self._pending_prefix: Optional[str] = None
+        self._pending_kind: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._builder: Optional[_Builder] = None
+
+    # -- event interface -------------------------------------------------
+
+    def feed(self, prefix: str, event: str, value: Any) -> None:
+        """Consume one ``ijson.parse`` event"""
+        if self._builder is not None:
+            if self._builder.event(event, value):
+                self._finish_subtree(self._builder.value)
+                self._builder = None
+            return
+
+        if prefix.startswith(DATA_PREFIX):
+            prefix = prefix[len(DATA_PREFIX):]
+        if event == "map_key":
+            if prefix == SERIES_PREFIX:
+                self._expect(f"{SERIES_PREFIX}.{value}", "series", value)
+            elif prefix == OBSERVATIONS_PREFIX:
+                self._expect(f"{OBSERVATIONS_PREFIX}.{value}", "observation", value)
+            return
+
+        if event in ("start_map", "start_array"):
+            if prefix == self._pending_prefix:
+                self._start_subtree(event, value)
+            elif event == "start_map" and (
+                prefix == STRUCTURE_PREFIX or (prefix == STRUCTURES_PREFIX and self._structure is None)
+            ):
+                self._pending_kind = "structure"
+                self._start_subtree(event, value)
+
+    def _expect(self, prefix: str, kind: str, key: str) -> None:
+        self._pending_prefix = prefix
+        self._pending_kind = kind
+        self._pending_key = key
+
+    def _start_subtree(self, event: str, value: Any) -> None:
+        self._builder = _Builder()
+        self._builder.event(event, value)
+        self._pending_prefix = None
+
+    def _finish_subtree(self, subtree: Any) -> None:
+        if self._pending_kind == "series":
+            self.add_series(self._pending_key, subtree.get("observations") or {})
+        elif self._pending_kind == "observation":
+            self.add_observation(self._pending_key, subtree)
+        elif self._pending_kind == "structure":
+            self._structure = subtree
+        self._pending_kind = None
+        self._pending_key = None
+
+    # -- decoded-object interface ----------------------------------------
+
+    def add_series(self, key: str, observations: Dict[str, List[Any]]) -> None:
+        """Append the observations of one ``dataSets[].series`` entry"""
+        index = len(self._series_keys)
+        self._series_keys.append(key)
+        self._obs_series.extend([index] * len(observations))
+        self._obs_time.extend(map(int, observations))
+        self._obs_values.extend([
+            float(obs[0]) if obs and obs[0] is not None else np.nan
+            for obs in observations.values()
+        ])
+
+    def add_observation(self, key: str, observation: List[Any]) -> None:
+        """
+        Append one ``dataSets[].observations`` entry (dimensionAtObservation=AllDimensions)
+
+        The last key component is the time index, the rest identify the series.
+        """
+        series_key, _, time_index = key.rpartition(":")
+        index = self._series_index.get(series_key)
+        if index is None:
+            index = len(self._series_keys)
+            self._series_keys.append(series_key)
+            self._series_index[series_key] = index
+        self._append(index, int(time_index), observation)
+
+    def set_structure(self, structure: Dict[str, Any]) -> None:
+        """Set the message ``structure`` block"""
+        self._structure = structure
+
+    def _append(self, series_index: int, time_index: int, observation: List[Any]) -> None:
+        value = observation[0] if observation else None
+        self._obs_series.append(series_index)
+        self._obs_time.append(time_index)
+        self._obs_values.append(float(value) if value is not None else np.nan)
+
+    @property
+    def has_series(self) -> bool:
+        """Whether any series or observations were added"""
+        return bool(self._series_keys)
+
+    # -- result ----------------------------------------------------------
+
+    def result(self) -> List[SDMXSeries]:
+        """
+        Decode dimension indexes and split observations into series
+
+        Returns:
+            List of decoded series with sorted dates and NaN-free values
+        """
+        if self._structure is None:
+            if self._series_keys:
+                logger.warning("SDMX-JSON message has no structure block")
+            return []
+
+        dimensions = self._structure.get("dimensions", {})
+        series_dims = dimensions.get("series") or []
+        observation_dims = dimensions.get("observation") or []
+        if not observation_dims:
+            return []
+
+        # AllDimensions messages put every dimension at observation level
+        time_dim = observation_dims[-1]
+        if not series_dims and self._series_index:
+            series_dims = observation_dims[:-1]
+
+        # Decode the time dimension once
+        time_dates = np.array(
+            [period_to_date(v.get("id", "")) or date.min for v in time_dim.get("values", [])],
+            dtype="datetime64[D]"
+        )
+
+        obs_series = np.frombuffer(self._obs_series, dtype=np.int32)
+        obs_time = np.frombuffer(self._obs_time, dtype=np.int32)
+        obs_values = np.frombuffer(self._obs_values, dtype=np.float64)
+
+        valid = np.isfinite(obs_values) & (obs_time < len(time_dates))
+        obs_series, obs_time, obs_values = obs_series[valid], obs_time[valid], obs_values[valid]
+        obs_dates = time_dates[obs_time]
+        valid = obs_dates != np.datetime64(date.min, "D")
+        obs_series, obs_dates, obs_values = obs_series[valid], obs_dates[valid], obs_values[valid]
+
+        # Group by series, then by date within each series
+        order = np.lexsort((obs_dates, obs_series))
+        obs_series, obs_dates, obs_values = obs_series[order], obs_dates[order], obs_values[order]
+        boundaries = np.flatnonzero(np.diff(obs_series)) + 1
+        starts = np.concatenate([[0], boundaries]) if len(obs_series) else np.array([], dtype=np.intp)
+        ends = np.concatenate([boundaries, [len(obs_series)]]) if len(obs_series) else starts
+
+        result = []
+        for start, end in zip(starts, ends):
+            key = self._series_keys[obs_series[start]]
+            ids, names = self._decode_key(key, series_dims)
+            result.append(SDMXSeries(ids, names, obs_dates[start:end], obs_values[start:end]))
+        return result
+
+    @staticmethod
+    def _decode_key(key: str, series_dims: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        ids: Dict[str, str] = {}
+        names: Dict[str, str] = {}
+        for dim, position in zip(series_dims, key.split(":")):
+            try:
+                value = dim.get("values", [])[int(position)]
+            except (ValueError, IndexError):
+                continue
+            ids[dim.get("id", "")] = value.get("id", "")
+            names[dim.get("id", "")] = value.get("name", value.get("id", ""))
+        return ids, names
+
+
+def parse_sdmx_json(body: Any) -> List[SDMXSeries]:
+    """
+    Parse an SDMX-JSON message
+
+    Args:
+        body: Raw bytes/str (parsed incrementally when ijson is installed)
+            or an already decoded message dict
+
+    Returns:
+        List of decoded series
+    """
+    parser = SDMXJSONParser()
+
+    if isinstance(body, (bytes, bytearray)) and ijson is not None:
+        # Two passes over the raw bytes with the C backend: series objects are
+        # built one at a time, then the structure block is picked out
+        root = _data_root(body)
+        for key, series in ijson.kvitems(body, root + SERIES_PREFIX, use_float=True):
+            parser.add_series(key, series.get("observations") or {})
+        if not parser.has_series:
+            # dimensionAtObservation=AllDimensions messages have no series level
+            for key, observation in ijson.kvitems(body, root + OBSERVATIONS_PREFIX, use_float=True):
+                parser.add_observation(key, observation)
+        structure = next(ijson.items(body, root + STRUCTURE_PREFIX, use_float=True), None)
+        if structure is None:
+            structure = next(ijson.items(body, root + STRUCTURES_PREFIX, use_float=True), None)
+        if structure is not None:
+            parser.set_structure(structure)
+        return parser.result()
+
+    message = json.loads(body) if isinstance(body, (bytes, bytearray, str)) else body
+    message = message.get("data", message)
+    for dataset in message.get("dataSets", []):
+        for key, series in (dataset.get("series") or {}).items():
+            parser.add_series(key, series.get("observations") or {})
+        for key, observation in (dataset.get("observations") or {}).items():
+            parser.add_observation(key, observation)
+
+    structure = message.get("structure")
+    if structure is None and message.get("structures"):
+        structure = message["structures"][0]
+    if structure is not None:
+        parser.set_structure(structure)
+    return parser.result()
+
+
+def _data_root(body: bytes) -> str:
+    """Prefix of the data sets in a raw message: ``DATA_PREFIX`` if they are wrapped in ``data``"""
+    for prefix, event, value in ijson.parse(body):
+        if prefix == "" and event == "map_key":
+            if value == "data":
+                return DATA_PREFIX
+            if value in ("dataSets", "structure", "structures"):
+                return ""
+    return ""
+
+
+async def parse_sdmx_json_stream(chunks: Any) -> List[SDMXSeries]:
+    """
+    Parse an SDMX-JSON message from an async byte stream
+
+    Args:
+        chunks: Object with an async ``read(n)`` method (e.g. ``aiohttp``'s
+            ``response.content``)
+
+    Returns:
+        List of decoded series
+    """
+    if ijson is None:
+        return parse_sdmx_json(await chunks.read())
+
+    parser = SDMXJSONParser()
+    async for prefix, event, value in ijson.parse_async(chunks, use_float=True):
+        parser.feed(prefix, event, value)
+    return parser.result()
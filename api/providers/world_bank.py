@@ -1,13 +1,17 @@
 """
 World Bank Data provider
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Union
 from datetime import date, datetime
+import asyncio
+import time
 from api.providers.base import BaseDataProvider
 from api.models.schemas import (
     DataPoint, EconomicIndicatorResponse, DataSource,
     Frequency, IndicatorCategory
 )
+from api.core.config import settings
+from api.utils.cache import CacheManager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,10 +37,17 @@ class WorldBankProvider(BaseDataProvider):
         "CURRENT_ACCOUNT": "BN.CAB.XOKA.GD.ZS",
     }
     
+    # Countries per bulk request, keeps the semicolon-joined URL path short
+    BULK_CHUNK_SIZE = 60
+    PER_PAGE = 1000
+    
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key)
         self.base_url = "https://api.worldbank.org/v2"
         self.name = "World Bank"
+        self._country_codes: Set[str] = set()
+        self._country_codes_failed_at: Optional[float] = None  # monotonic time of the last failed fetch
+        self._indicator_info_cache = CacheManager(default_ttl=settings.METADATA_CACHE_TTL)
     
     async def get_indicator(
         self,
@@ -47,32 +58,138 @@ class WorldBankProvider(BaseDataProvider):
         **kwargs
     ) -> Optional[EconomicIndicatorResponse]:
         """Fetch indicator data from World Bank"""
+        responses = await self.get_indicator_bulk(indicator_id, [country_code], start_date, end_date)
+        return responses.get(country_code.upper())
+    
+    async def get_indicator_bulk(
+        self,
+        indicator_id: str,
+        country_codes: Union[List[str], str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        most_recent: bool = False
+    ) -> Dict[str, EconomicIndicatorResponse]:
+        """
+        Fetch an indicator for many countries with as few requests as possible
         
-        # Map indicator ID
-        wb_indicator = self.INDICATOR_MAP.get(indicator_id.upper(), indicator_id)
+        Countries are joined with ``;`` in the URL path (or ``all``), pages are
+        requested with ``per_page`` and the combined response is split per
+        country. Indicator metadata comes from a separate long-lived cache.
         
-        # Build URL
-        url = f"{self.base_url}/country/{country_code}/indicator/{wb_indicator}"
+        Args:
+            indicator_id: Indicator identifier
+            country_codes: List of country codes, or "all" for every country
+                (regional and income aggregates are dropped; nothing is
+                fetched while the country list is unavailable)
+            start_date: Start date for data
+            end_date: End date for data
+            most_recent: Only fetch the latest non-empty value per country
+            
+        Returns:
+            Dictionary mapping country code to indicator response
+        """
+        wb_indicator = self.INDICATOR_MAP.get(indicator_id.upper(), indicator_id)
         
         params = {
             "format": "json",
-            "per_page": 1000
+            "per_page": self.PER_PAGE
         }
-        
-        if start_date:
+        if most_recent:
+            params["mrnev"] = 1
+        elif start_date:
             params["date"] = f"{start_date.year}:{end_date.year if end_date else datetime.now().year}"
         
-        # Fetch data
-        result = await self.fetch_with_retry(url, params)
-        if not result or len(result) < 2:
-            return None
+        country_filter = None
+        if country_codes == "all":
+            country_filter = await self._get_country_codes()
+            if country_filter is None:
+                # Aggregates (WLD, EUU, ...) could not be told apart from countries
+                logger.warning(f"World Bank country list unavailable, skipping cross-section of {wb_indicator}")
+                return {}
+            paths = ["all"]
+        else:
+            codes = list(dict.fromkeys(c.upper() for c in country_codes))
+            paths = [
+                ";".join(codes[i:i + self.BULK_CHUNK_SIZE])
+                for i in range(0, len(codes), self.BULK_CHUNK_SIZE)
+            ]
+        
+        chunks = await asyncio.gather(*(
+            self._fetch_all_pages(f"{self.base_url}/country/{path}/indicator/{wb_indicator}", params)
+            for path in paths
+        ))
+        items = [item for chunk in chunks for item in chunk]
+        if not items:
+            return {}
+        
+        by_country: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            # ``country.id`` is the ISO2 code (or an aggregate's own ID), so rows
+            # without an ISO3 code cannot be matched to a requested country
+            code = item.get('countryiso3code')
+            if not code or (country_filter and code not in country_filter):
+                continue
+            by_country.setdefault(code.upper(), []).append(item)
+        
+        indicator_info = await self._get_indicator_info(wb_indicator)
         
-        metadata = result[0]
-        data = result[1]
+        responses = {}
+        for code, country_items in by_country.items():
+            response = self._build_response(indicator_id, wb_indicator, code, country_items, indicator_info)
+            if response.data:
+                responses[code] = response
+        return responses
+    
+    async def get_cross_section(
+        self,
+        indicator_id: str,
+        on_date: Optional[date] = None
+    ) -> Dict[str, EconomicIndicatorResponse]:
+        """
+        Fetch an indicator for every country
         
-        if not data:
-            return None
+        Args:
+            indicator_id: Indicator identifier
+            on_date: Reference date; the latest non-empty value per country
+                is fetched when not given
+            
+        Returns:
+            Dictionary mapping country code to indicator response
+        """
+        if on_date:
+            # A few years of history so countries that lag in reporting still have a value
+            return await self.get_indicator_bulk(
+                indicator_id, "all", date(on_date.year - 5, 1, 1), on_date
+            )
+        return await self.get_indicator_bulk(indicator_id, "all", most_recent=True)
+    
+    async def _fetch_all_pages(self, url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fetch the first page, then any remaining pages concurrently"""
+        result = await self.fetch_with_retry(url, params)
+        if not result or len(result) < 2 or not result[1]:
+            return []
         
+        items = list(result[1])
+        pages = int(result[0].get('pages', 1) or 1) if isinstance(result[0], dict) else 1
+        if pages > 1:
+            rest = await asyncio.gather(*(
+                self.fetch_with_retry(url, {**params, "page": page})
+                for page in range(2, pages + 1)
+            ))
+            for page in rest:
+                if page and len(page) > 1 and page[1]:
+                    items.extend(page[1])
+        return items
+    
+    def _build_response(
+        self,
+        indicator_id: str,
+        wb_indicator: str,
+        country_code: str,
+        data: List[Dict[str, Any]],
+        indicator_info: Optional[Dict[str, Any]]
+    ) -> EconomicIndicatorResponse:
+        """Build an indicator response from World Bank observation items"""
         # Parse data points
         data_points = []
         for item in data:
@@ -89,9 +206,6 @@ class WorldBankProvider(BaseDataProvider):
         # Sort by date
         data_points.sort(key=lambda x: x.date)
         
-        # Get indicator metadata
-        indicator_info = await self._get_indicator_info(wb_indicator)
-        
         return EconomicIndicatorResponse(
             indicator_id=wb_indicator,
             name=indicator_info.get('name', indicator_id) if indicator_info else indicator_id,
@@ -111,15 +225,43 @@ class WorldBankProvider(BaseDataProvider):
         )
     
     async def _get_indicator_info(self, indicator_id: str) -> Optional[Dict[str, Any]]:
-        """Get indicator metadata"""
+        """Get indicator metadata (cached, it rarely changes)"""
+        info = self._indicator_info_cache.get(indicator_id)
+        if info is not None:
+            return info or None
+        
         url = f"{self.base_url}/indicator/{indicator_id}"
         params = {"format": "json"}
         
         result = await self.fetch_with_retry(url, params)
         if result and len(result) > 1 and result[1]:
-            return result[1][0]
+            info = result[1][0]
+            self._indicator_info_cache.set(indicator_id, info)
+            return info
+        
+        # Remember unknown indicators for a shorter time
+        self._indicator_info_cache.set(indicator_id, {}, ttl=settings.CACHE_TTL)
         return None
     
+    async def _get_country_codes(self) -> Optional[Set[str]]:
+        """
+        ISO3 codes of actual countries (excluding aggregates), fetched once
+        
+        Returns:
+            The codes, or None if the country list could not be fetched; it is
+            not requested again for NEGATIVE_CACHE_TTL seconds after a failure
+        """
+        if not self._country_codes:
+            if self._country_codes_failed_at is not None \
+                    and time.monotonic() - self._country_codes_failed_at < settings.NEGATIVE_CACHE_TTL:
+                return None
+            codes = {c['code'] for c in await self.list_countries()}
+            if not codes:
+                self._country_codes_failed_at = time.monotonic()
+                return None
+            self._country_codes = codes
+        return self._country_codes
+    
     async def list_indicators(self) -> List[Dict[str, Any]]:
         """List available indicators"""
         return [
@@ -138,7 +280,8 @@ class WorldBankProvider(BaseDataProvider):
         
         countries = []
         for country in result[1]:
-            if country.get('region', {}).get('value') != 'Aggregates':
+            # Aggregates have no region ("NA")
+            if country.get('region', {}).get('id') != 'NA':
                 countries.append({
                     "code": country['id'],
                     "name": country['name'],
@@ -0,0 +1,111 @@
+"""
+Admin endpoints (memory profiling)
+
+Only keys listed in ``ADMIN_API_KEYS`` may call them; without admin keys the
+endpoints answer 404.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import asyncio
+import tracemalloc
+
+from api.core.config import settings
+from api.core.quotas import admin_keys
+from api.providers.manager import provider_manager
+from api.utils.cache import cache_manager, compute_cache, negative_cache
+from api.utils.memory import SIZE_SAMPLE, memory_profiler, process_memory, stores
+from api.utils.metrics import http_request_duration, http_requests
+from api.utils.request_log import request_log
+from api.utils.series_store import series_store
+from api.utils.timing import TimedRoute
+
+GROUP_BY_PATTERN = "^(lineno|filename|traceback)$"
+
+# Stores that grow with traffic; the rate limiter registers its own state
+stores.register("cache.results", lambda: cache_manager.cache)
+stores.register("cache.compute", lambda: compute_cache.cache)
+stores.register("cache.negative", lambda: negative_cache.entries)
+stores.register("series_store.series", lambda: series_store._series)
+stores.register("series_store.panels", lambda: series_store._panels)
+stores.register("source_router.series", lambda: provider_manager.router._series)
+stores.register("request_log.buffer", lambda: request_log._rows)
+stores.register("metrics.http_requests", lambda: http_requests._values)
+stores.register("metrics.http_request_duration", lambda: http_request_duration._histograms)
+
+
+def require_admin(request: Request) -> None:
+    """Reject requests without an admin key"""
+    keys = admin_keys()
+    if not keys:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not keys.is_admin(request.headers.get(settings.API_KEY_NAME)):
+        raise HTTPException(status_code=403, detail="Admin API key required")
+
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(require_admin)])
+
+
+@router.get("/memory")
+async def memory_overview(
+    sample: int = Query(SIZE_SAMPLE, ge=1, le=10000, description="Entries measured per store")
+):
+    """
+    Worker memory: RSS, tracemalloc state and the size of each in-process store
+
+    Store sizes are estimated from ``sample`` entries each (larger samples are
+    more accurate and slower).
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        **process_memory(),
+        "tracing": memory_profiler.tracing,
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "snapshots": memory_profiler.snapshot_ids(),
+        "stores": stores.census(sample)
+    }
+
+
+@router.post("/memory/snapshots")
+async def take_snapshot(
+    limit: int = Query(20, ge=1, le=200, description="Allocation sites returned"),
+    group_by: str = Query("lineno", pattern=GROUP_BY_PATTERN),
+    frames: int = Query(10, ge=1, le=100, description="Frames kept per allocation (when tracing starts)")
+):
+    """
+    Take a tracemalloc snapshot
+
+    The first snapshot starts tracing (which slows allocations until
+    ``DELETE /admin/memory/snapshots``) and serves as the baseline; later ones
+    include the diff against the previous snapshot.
+    """
+    previous = memory_profiler.snapshot_ids()
+    snapshot = await asyncio.to_thread(memory_profiler.snapshot, frames)
+    result = {**snapshot, "top": await asyncio.to_thread(memory_profiler.top, snapshot["id"], limit, group_by)}
+    if previous:
+        result["compared_to"] = previous[-1]
+        result["diff"] = await asyncio.to_thread(memory_profiler.diff, previous[-1], snapshot["id"], limit, group_by)
+    return result
+
+
+@router.get("/memory/diff")
+async def diff_snapshots(
+    base: int = Query(..., description="Older snapshot id"),
+    target: int = Query(..., description="Newer snapshot id"),
+    limit: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern=GROUP_BY_PATTERN)
+):
+    """Allocation sites that changed most between two kept snapshots"""
+    try:
+        diff = await asyncio.to_thread(memory_profiler.diff, base, target, limit, group_by)
+    except KeyError:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown snapshot; kept: {memory_profiler.snapshot_ids()}"
+        )
+    return {"base": base, "target": target, "diff": diff}
+
+
+@router.delete("/memory/snapshots")
+async def stop_tracing():
+    """Stop tracing and drop all snapshots"""
+    memory_profiler.stop()
+    return {"tracing": False}
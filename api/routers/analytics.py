@@ -1,16 +1,29 @@
 """
 Analytics endpoints for economic data analysis
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional, Dict, Any, List
 from datetime import date, datetime, timedelta
-from api.models.schemas import AnalyticsRequest, AnalyticsResponse, DataSource
+from itertools import combinations
+import asyncio
+import json
+import numpy as np
+from api.models.schemas import (
+    AnalyticsRequest, AnalyticsResponse, CrossCorrelationRequest, DataSource
+)
 from api.providers.manager import provider_manager
+from api.utils.cache import compute_cache, ttl_for_series
+from api.utils.http_cache import conditional_response, make_etag
+from api.utils.expressions import DerivedExpression, ExpressionError
+from api.utils.timing import TimedRoute, span
+from api.utils.series import (
+    to_series, finite, align, cross_correlation, series_digest
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/calculate", response_model=AnalyticsResponse)
 async def calculate_analytics(request: AnalyticsRequest):
@@ -249,6 +262,8 @@ async def calculate_correlation(
 
 @router.get("/summary/{country}")
 async def get_economic_summary(
+    request: Request,
+    response: Response,
     country: str
 ) -> Dict[str, Any]:
     """
@@ -259,11 +274,11 @@ async def get_economic_summary(
     * `/api/v1/analytics/summary/USA` - Get US economic summary
     * `/api/v1/analytics/summary/GBR` - Get UK economic summary
     
-    Returns latest values for major economic indicators.
+    Returns latest values for major economic indicators. Supports conditional
+    requests (`If-None-Match` / `If-Modified-Since`) like the indicator endpoints.
     """
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=365)
+        start_date = date.today() - timedelta(days=365)
         
         # Key indicators to fetch
         indicators = ["GDP", "INFLATION", "UNEMPLOYMENT", "INTEREST_RATE", "GOVERNMENT_DEBT"]
@@ -273,13 +288,15 @@ async def get_economic_summary(
             "as_of": datetime.now().isoformat(),
             "indicators": {}
         }
+        fetched = []
         
         for indicator in indicators:
             try:
                 data = await provider_manager.get_indicator(
-                    indicator, country.upper(), start_date, end_date
+                    indicator, country.upper(), start_date
                 )
                 if data and data.data:
+                    fetched.append(data)
                     latest = data.data[-1]
                     summary["indicators"][indicator] = {
                         "name": data.name,
@@ -298,6 +315,16 @@ async def get_economic_summary(
                 detail=f"No economic data found for {country}"
             )
         
+        # "as_of" is the request time and deliberately not part of the tag
+        etag = make_etag(summary["country"], json.dumps(summary["indicators"], sort_keys=True))
+        not_modified = conditional_response(
+            request, response, etag,
+            max(data.last_updated.astimezone() for data in fetched),
+            min(ttl_for_series(data.frequency, data.last_updated) for data in fetched)
+        )
+        if not_modified:
+            return not_modified
+        
         return summary
         
     except HTTPException:
@@ -306,3 +333,265 @@ async def get_economic_summary(
         logger.error(f"Error getting economic summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/derived")
+async def calculate_derived_indicator(
+    expr: str = Query(..., description="Expression over indicator IDs, e.g. INTEREST_RATE - INFLATION"),
+    countries: str = Query(..., description="Comma-separated country codes, e.g. USA,GBR,DEU"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None)
+) -> Dict[str, Any]:
+    """
+    Evaluate a derived indicator expression for one or more countries
+    
+    ## Examples
+    
+    * `/api/v1/analytics/derived?expr=INTEREST_RATE - INFLATION&countries=USA` - Real interest rate
+    * `/api/v1/analytics/derived?expr=INTEREST_RATE / INFLATION&countries=USA,GBR,DEU` - Interest-to-inflation ratio
+    * `/api/v1/analytics/derived?expr=GDP / POPULATION&countries=FRA` - GDP per capita
+    
+    ## Syntax
+    
+    * Operators: `+`, `-`, `*`, `/`, `**` and parentheses
+    * Functions: `abs`, `log`, `exp`, `sqrt`, `diff`, `pct_change`
+    * Numeric constants, e.g. `GDP / 1000000000`
+    
+    Each input indicator is fetched once per country and series are aligned on
+    their common dates. Observations that are undefined (e.g. division by zero)
+    are dropped from the result.
+    """
+    try:
+        expression = DerivedExpression(expr)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    country_codes = _parse_country_list(countries)
+    
+    try:
+        if not end_date:
+            end_date = date.today()
+        if not start_date:
+            start_date = end_date - timedelta(days=365 * 5)
+        
+        indicators = sorted(expression.indicators)
+        results = {}
+        missing = {}
+        
+        # One multi-country fetch per input indicator
+        panels = await asyncio.gather(*(
+            provider_manager.get_indicator_bulk(indicator, country_codes, start_date, end_date)
+            for indicator in indicators
+        ))
+        
+        for country_code in country_codes:
+            fetched = [panel.get(country_code) for panel in panels]
+            
+            unavailable = [
+                indicator for indicator, data in zip(indicators, fetched)
+                if not data or not data.data
+            ]
+            if unavailable:
+                missing[country_code] = unavailable
+                continue
+            
+            inputs = {indicator: to_series(data) for indicator, data in zip(indicators, fetched)}
+            dates, values = finite(expression.evaluate(inputs, cache=compute_cache))
+            
+            results[country_code] = {
+                "data": [
+                    {"date": d.item().isoformat(), "value": float(v)}
+                    for d, v in zip(dates, values)
+                ],
+                "data_points": int(len(values)),
+                "sources": {
+                    indicator: data.source.value for indicator, data in zip(indicators, fetched)
+                }
+            }
+        
+        if not results:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Input indicators not available for any requested country: {missing}"
+            )
+        
+        return {
+            "expression": expression.expression,
+            "normalized": expression.normalized,
+            "indicators": indicators,
+            "period": {
+                "start": start_date,
+                "end": end_date
+            },
+            "countries": results,
+            "missing": missing
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error evaluating derived indicator '{expr}': {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cross-correlation")
+async def calculate_cross_correlation(request: CrossCorrelationRequest) -> Dict[str, Any]:
+    """
+    Lead/lag cross-correlation profiles for many indicator pairs and countries
+    
+    ## Example Request
+    
+    ```json
+    {
+        "indicators": ["INTEREST_RATE", "INFLATION", "UNEMPLOYMENT"],
+        "countries": ["USA", "GBR"],
+        "max_lag": 12
+    }
+    ```
+    
+    Without `pairs`, all pairs of `indicators` are scanned. For each country
+    every pair is aligned on the dates both of its series have and gets the
+    full lag profile from -max_lag to +max_lag periods, computed via FFT. A peak at a
+    positive lag means the leader moves before the follower. The period
+    defaults to the last 20 years.
+    """
+    pairs = request.pairs or [[a, b] for a, b in combinations(request.indicators, 2)]
+    if not pairs:
+        raise HTTPException(status_code=400, detail="At least one indicator pair is required")
+    
+    try:
+        end_date = request.end_date or date.today()
+        start_date = request.start_date or end_date - timedelta(days=365 * 20)
+        
+        indicators = sorted({indicator for pair in pairs for indicator in pair})
+        panels = await asyncio.gather(*(
+            provider_manager.get_indicator_bulk(indicator, request.countries, start_date, end_date)
+            for indicator in indicators
+        ))
+        series_by_country: Dict[str, Dict[str, Any]] = {c: {} for c in request.countries}
+        for indicator, panel in zip(indicators, panels):
+            for country_code, data in panel.items():
+                if country_code in series_by_country and data.data:
+                    series_by_country[country_code][indicator] = to_series(data)
+        
+        results = {}
+        missing = {}
+        for country_code, series in series_by_country.items():
+            country_pairs = [(a, b) for a, b in pairs if a in series and b in series]
+            if not country_pairs:
+                missing[country_code] = [i for i in indicators if i not in series]
+                continue
+            
+            cache_key = compute_cache.generate_key(
+                "cross_correlation", request.max_lag, country_pairs,
+                *(f"{i}:{series_digest(s)}" for i, s in sorted(series.items()))
+            )
+            with span("cache"):
+                result = compute_cache.get(cache_key)
+            if result is None:
+                with span("compute"):
+                    result = _cross_correlation_profiles(series, country_pairs, request.max_lag)
+                compute_cache.set(cache_key, result)
+            results[country_code] = result
+        
+        if not results:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Insufficient data for the requested pairs: {missing}"
+            )
+        
+        return {
+            "countries": results,
+            "missing": missing,
+            "max_lag": request.max_lag,
+            "period": {
+                "start": start_date,
+                "end": end_date
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating cross-correlation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _cross_correlation_profiles(
+    series: Dict[str, Any],
+    pairs: List[tuple],
+    max_lag: int
+) -> Dict[str, Any]:
+    """
+    Compute the lag profile of every pair of a country's series
+    
+    Each pair is aligned on the dates both of its series have, so a short
+    series does not cut the history of unrelated pairs. Pairs that end up on
+    the same dates are correlated together, one FFT per series.
+    """
+    groups: Dict[bytes, Dict[str, Any]] = {}
+    for leader, follower in pairs:
+        dates, left, right = align(series[leader], series[follower])
+        group = groups.setdefault(dates.tobytes(), {"dates": dates, "rows": {}, "pairs": []})
+        group["rows"][leader] = left
+        group["rows"][follower] = right
+        group["pairs"].append((leader, follower))
+    
+    results = {}
+    for group in groups.values():
+        dates = group["dates"]
+        if len(dates) < 3:
+            for leader, follower in group["pairs"]:
+                results[(leader, follower)] = {
+                    "leader": leader,
+                    "follower": follower,
+                    "data_points": int(len(dates)),
+                    "error": "Insufficient overlapping data points"
+                }
+            continue
+        
+        names = list(group["rows"])
+        row = {name: i for i, name in enumerate(names)}
+        matrix = np.vstack([group["rows"][name] for name in names])
+        lags, profiles = cross_correlation(matrix, [(row[a], row[b]) for a, b in group["pairs"]], max_lag)
+        
+        for (leader, follower), profile in zip(group["pairs"], profiles):
+            peak_lag = None
+            peak = None
+            interpretation = "Undefined (constant series)"
+            if np.isfinite(profile).any():
+                idx = int(np.nanargmax(np.abs(profile)))
+                peak_lag = int(lags[idx])
+                peak = round(float(profile[idx]), 4)
+                if peak_lag > 0:
+                    interpretation = f"{leader} leads {follower} by {peak_lag} periods"
+                elif peak_lag < 0:
+                    interpretation = f"{follower} leads {leader} by {-peak_lag} periods"
+                else:
+                    interpretation = f"{leader} and {follower} move together"
+            
+            results[(leader, follower)] = {
+                "leader": leader,
+                "follower": follower,
+                "data_points": int(len(dates)),
+                "aligned_period": {
+                    "start": dates[0].item().isoformat(),
+                    "end": dates[-1].item().isoformat()
+                },
+                "lags": lags.tolist(),
+                "correlations": [round(float(v), 4) if np.isfinite(v) else None for v in profile],
+                "peak_lag": peak_lag,
+                "peak_correlation": peak,
+                "interpretation": interpretation
+            }
+    
+    return {"pairs": [results[pair] for pair in pairs]}
+
+
+def _parse_country_list(countries: str, limit: int = 50) -> List[str]:
+    """Split a comma-separated country list into unique upper-case codes"""
+    codes = list(dict.fromkeys(c.strip().upper() for c in countries.split(",") if c.strip()))
+    if not codes:
+        raise HTTPException(status_code=400, detail="At least one country code is required")
+    if len(codes) > limit:
+        raise HTTPException(status_code=400, detail=f"Maximum {limit} countries allowed")
+    return codes
@@ -5,11 +5,12 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List, Dict
 from api.models.schemas import CountryInfo
 from api.providers.manager import provider_manager
+from api.utils.timing import TimedRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/", response_model=Dict)
 async def list_countries(
@@ -1,7 +1,7 @@
 """
 Economic indicators endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List, Dict
 from datetime import date, datetime, timedelta
 from api.models.schemas import (
@@ -9,14 +9,23 @@ from api.models.schemas import (
     ComparisonRequest, ComparisonResponse
 )
 from api.providers.manager import provider_manager
+from api.core.config import settings
+from api.utils.cache import ttl_for_series
+from api.utils.http_cache import conditional_response, make_etag
+from api.utils.timing import TimedRoute, span
+from api.utils.series import rank_values, series_digest, to_series
+from api.utils.series_store import series_store
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/{indicator}", response_model=EconomicIndicatorResponse)
 async def get_economic_indicator(
+    request: Request,
+    response: Response,
     indicator: str,
     country: str = Query(..., min_length=3, max_length=3, pattern="^[A-Z]{3}$", description="Country code (ISO 3166-1 alpha-3, e.g., USA, GBR, DEU)"),
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -42,14 +51,17 @@ async def get_economic_indicator(
     * **GOVERNMENT_DEBT** - Government Debt to GDP
     * **EXPORTS** - Exports of goods and services
     * **IMPORTS** - Imports of goods and services
+    
+    Responses carry `ETag` / `Last-Modified` headers; polling clients that send
+    `If-None-Match` or `If-Modified-Since` get an empty 304 while the series is
+    unchanged.
     """
     
     try:
-        # Set default date range if not provided
-        if not end_date:
-            end_date = date.today()
+        # Default to the last 5 years; without an end date the request is
+        # open-ended and can be answered from the local series store
         if not start_date:
-            start_date = end_date - timedelta(days=365 * 5)  # Last 5 years
+            start_date = (end_date or date.today()) - timedelta(days=365 * 5)
         
         result = await provider_manager.get_indicator(
             indicator_id=indicator.upper(),
@@ -65,12 +77,120 @@ async def get_economic_indicator(
                 detail=f"Indicator '{indicator}' not found for country '{country}'"
             )
         
+        etag = make_etag(
+            result.model_dump_json(exclude={"data", "last_updated"}),
+            series_digest(to_series(result))
+        )
+        not_modified = conditional_response(
+            request, response, etag, result.last_updated,
+            ttl_for_series(result.frequency, result.last_updated)
+        )
+        if not_modified:
+            return not_modified
+        
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching indicator {indicator} for {country}: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while fetching the indicator data.")
 
+@router.get("/{indicator}/cross-section", response_model=Dict)
+async def get_indicator_cross_section(
+    request: Request,
+    response: Response,
+    indicator: str,
+    on_date: Optional[date] = Query(None, alias="date", description="Reference date (YYYY-MM-DD); latest if omitted"),
+    countries: Optional[str] = Query(None, description="Comma-separated country codes to include (default: all)")
+):
+    """
+    Get one indicator for every country at a date, with ranks and percentiles
+    
+    ## Examples
+    
+    * `/api/v1/indicators/GDP_PER_CAPITA/cross-section` - Latest GDP per capita for all countries
+    * `/api/v1/indicators/INFLATION/cross-section?date=2022-12-31` - Inflation as of end of 2022
+    * `/api/v1/indicators/UNEMPLOYMENT/cross-section?countries=USA,GBR,DEU,FRA` - Subset of countries
+    
+    Each country reports its latest observation on or before `date`. Rank 1 is
+    the highest value; the percentile is the share of countries at or below it.
+    Panels are loaded from World Bank in a single bulk request and served from
+    the local series store until they are older than the TTL for the
+    indicator's frequency (days for annual data).
+    """
+    try:
+        indicator_id = indicator.upper()
+        source = DataSource.WORLD_BANK
+        scope = on_date.isoformat() if on_date else "latest"
+        
+        with span("store"):
+            age = series_store.panel_age(indicator_id, source, scope)
+            panel = series_store.panel(indicator_id, source)
+            ttl = next(iter(panel.values())).ttl if panel else settings.CACHE_TTL
+        if age is None or age > ttl:
+            await provider_manager.get_cross_section(indicator_id, on_date)
+        
+        with span("store"):
+            codes, dates, values = series_store.cross_section(indicator_id, source, on_date)
+        
+        if countries:
+            wanted = [c.strip().upper() for c in countries.split(",") if c.strip()]
+            mask = np.isin(codes, wanted)
+            codes, dates, values = codes[mask], dates[mask], values[mask]
+        
+        if not len(values):
+            raise HTTPException(
+                status_code=404,
+                detail=f"No cross-section data found for indicator '{indicator}'"
+            )
+        
+        last_modified = max(
+            series_store.get(indicator_id, code, source).response.last_updated.astimezone() for code in codes
+        )
+        etag = make_etag(indicator_id, scope, series_digest((dates, values)), ",".join(codes))
+        not_modified = conditional_response(request, response, etag, last_modified, ttl)
+        if not_modified:
+            return not_modified
+        
+        ranks, percentiles = rank_values(values)
+        order = np.argsort(ranks, kind="stable")
+        
+        template = series_store.get(indicator_id, codes[order[0]], source).response
+        rows = []
+        for i in order:
+            stored = series_store.get(indicator_id, codes[i], source)
+            rows.append({
+                "country_code": codes[i],
+                "country_name": stored.response.country_name,
+                "date": dates[i].item().isoformat(),
+                "value": float(values[i]),
+                "rank": int(ranks[i]),
+                "percentile": round(float(percentiles[i]), 2)
+            })
+        
+        return {
+            "indicator": indicator_id,
+            "name": template.name,
+            "unit": template.unit,
+            "source": source.value,
+            "as_of": scope,
+            "count": len(rows),
+            "statistics": {
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": float(values.mean()),
+                "median": float(np.median(values))
+            },
+            "countries": rows
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building cross-section for {indicator}: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while building the cross-section.")
+
 @router.get("/", response_model=Dict)
 async def list_indicators():
     """
@@ -109,18 +229,13 @@ async def compare_indicators(request: ComparisonRequest):
     This endpoint allows you to compare the same indicator across up to 10 countries.
     """
     try:
-        countries_data = {}
-        
-        for country_code in request.countries:
-            result = await provider_manager.get_indicator(
-                indicator_id=request.indicator.upper(),
-                country_code=country_code.upper(),
-                start_date=request.start_date,
-                end_date=request.end_date,
-                preferred_source=request.source
-            )
-            if result:
-                countries_data[country_code.upper()] = result
+        countries_data = await provider_manager.get_indicator_bulk(
+            indicator_id=request.indicator.upper(),
+            country_codes=request.countries,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            preferred_source=request.source
+        )
         
         if not countries_data:
             raise HTTPException(
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from api.utils.marketing_team import MarketingTeamManager
+from api.utils.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 team_manager = MarketingTeamManager()
 
 class CampaignRequest(BaseModel):
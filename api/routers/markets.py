@@ -5,11 +5,12 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from datetime import datetime
 from api.models.schemas import MarketData
+from api.utils.timing import TimedRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/indices", response_model=List[MarketData])
 async def get_market_indices(
@@ -0,0 +1,99 @@
+"""
+Monitoring endpoints (Prometheus metrics)
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from api.core.config import settings
+from api.core.resilience import CircuitBreaker
+from api.providers.manager import provider_manager
+from api.utils.cache import cache_manager, compute_cache, negative_cache
+from api.utils.loop_monitor import loop_monitor
+from api.utils.metrics import registry
+from api.utils.request_log import request_log
+from api.utils.series_store import series_store
+from api.utils.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@registry.collector
+def provider_metrics():
+    """Circuit breaker, throttle and routing state per provider"""
+    providers = list(provider_manager.providers.items())
+    breaker_states = (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)
+    yield "circuit_breaker_state", "gauge", "Circuit breaker state per provider (1 for the current state)", [
+        ({"provider": provider.name, "state": state}, int(provider.breaker.state == state))
+        for _, provider in providers for state in breaker_states
+    ]
+    yield "circuit_breaker_transitions_total", "counter", "Circuit breaker state changes per provider", [
+        ({"provider": provider.name, "transition": transition}, count)
+        for _, provider in providers for transition, count in list(provider.breaker.transitions.items())
+    ]
+
+    throttles = [(provider.name, provider.throttle.get_stats()) for _, provider in providers]
+    yield "upstream_throttle_rate", "gauge", "Current request rate allowed per provider (per second)", [
+        ({"provider": name}, stats["rate"]) for name, stats in throttles
+    ]
+    yield "upstream_in_flight", "gauge", "Upstream calls in progress per provider", [
+        ({"provider": name}, stats["in_flight"]) for name, stats in throttles
+    ]
+    yield "upstream_waiting", "gauge", "Calls waiting for the provider throttle", [
+        ({"provider": name}, stats["waiting"]) for name, stats in throttles
+    ]
+    yield "upstream_rate_limited_total", "counter", "429 responses that slowed the provider throttle", [
+        ({"provider": name}, stats["rate_limited"]) for name, stats in throttles
+    ]
+
+    sources = provider_manager.router.get_stats()["sources"]
+    yield "source_router_latency_seconds", "gauge", "Smoothed upstream latency used to order sources", [
+        ({"source": source}, stats["latency"]) for source, stats in sources.items()
+    ]
+
+
+@registry.collector
+def store_metrics():
+    """Sizes of the in-process stores"""
+    stats = series_store.get_stats()
+    yield "series_store_series", "gauge", "Series held in the local series store", [({}, stats["series"])]
+    yield "series_store_observations", "gauge", "Observations held in the local series store", [
+        ({}, stats["observations"])
+    ]
+    yield "series_store_revisions_total", "counter", "Upstream revisions detected in stored series", [
+        ({}, stats["revisions"])
+    ]
+    yield "cache_entries", "gauge", "Entries held per cache (including expired ones not yet evicted)", [
+        ({"cache": cache_manager.name}, len(cache_manager.cache)),
+        ({"cache": compute_cache.name}, len(compute_cache.cache)),
+        ({"cache": "negative"}, len(negative_cache))
+    ]
+    yield "negative_cache_bloom_false_positives_total", "counter", "Bloom filter hits not confirmed by an entry", [
+        ({}, negative_cache.bloom_false_positives)
+    ]
+    yield "request_log_dropped_total", "counter", "Request log rows dropped because the buffer was full", [
+        ({}, request_log.dropped)
+    ]
+
+
+@registry.collector
+def event_loop_metrics():
+    """Current event-loop lag estimate (the samples are in event_loop_lag_seconds)"""
+    yield "event_loop_lag_estimate_seconds", "gauge", "Smoothed event-loop lag used for load shedding", [
+        ({}, loop_monitor.lag)
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics
+
+    Request latency per route, cache hits/misses/evictions per cache, upstream
+    calls per provider, rate limit rejections, in-flight requests, circuit
+    breaker and throttle state.
+    """
+    if not settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -3,8 +3,14 @@ Caching utilities for Economic Data API
 """
 import hashlib
 import json
-from typing import Optional, Any
+import math
+import time
+from typing import Optional, Any, Mapping
 from datetime import datetime, timedelta
+from api.core.config import settings
+from api.models.schemas import Frequency
+from api.utils.series import PERIOD_DAYS
+from api.utils.metrics import cache_evictions, cache_requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,15 +21,20 @@ class CacheManager:
     For production, use Redis or Memcached
     """
     
-    def __init__(self, default_ttl: int = 3600):
+    def __init__(self, default_ttl: int = 3600, name: str = "results", max_entries: Optional[int] = None):
         """
         Initialize cache manager
         
         Args:
             default_ttl: Default time-to-live in seconds
+            name: Cache label in the hit/miss/eviction metrics
+            max_entries: Maximum number of entries, least recently used
+                dropped first (unbounded if None)
         """
         self.cache = {}
         self.default_ttl = default_ttl
+        self.name = name
+        self.max_entries = max_entries
     
     def generate_key(self, *args, **kwargs) -> str:
         """
@@ -54,6 +65,7 @@ class CacheManager:
             Cached value or None if not found or expired
         """
         if key not in self.cache:
+            cache_requests.inc(self.name, "miss")
             return None
         
         entry = self.cache[key]
@@ -61,8 +73,14 @@ class CacheManager:
         # Check if expired
         if datetime.now() > entry["expires_at"]:
             del self.cache[key]
+            cache_evictions.inc(self.name)
+            cache_requests.inc(self.name, "miss")
             return None
         
+        if self.max_entries is not None:
+            # Dicts keep insertion order: move the entry to the back
+            self.cache[key] = self.cache.pop(key)
+        cache_requests.inc(self.name, "hit")
         logger.debug(f"Cache hit: {key}")
         return entry["value"]
     
@@ -78,10 +96,15 @@ class CacheManager:
         if ttl is None:
             ttl = self.default_ttl
         
+        self.cache.pop(key, None)
         self.cache[key] = {
             "value": value,
             "expires_at": datetime.now() + timedelta(seconds=ttl)
         }
+        if self.max_entries is not None:
+            while len(self.cache) > self.max_entries:
+                del self.cache[next(iter(self.cache))]
+                cache_evictions.inc(self.name)
         logger.debug(f"Cache set: {key} (ttl={ttl}s)")
     
     def delete(self, key: str) -> None:
@@ -117,6 +140,7 @@ class CacheManager:
             del self.cache[key]
         
         if expired_keys:
+            cache_evictions.inc(self.name, amount=len(expired_keys))
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
         
         return len(expired_keys)
@@ -139,6 +163,203 @@ class CacheManager:
             "expired_entries": expired
         }
 
+def ttl_for_series(
+    frequency: Optional[Frequency],
+    last_updated: Optional[datetime] = None,
+    now: Optional[datetime] = None
+) -> int:
+    """
+    Time-to-live of a fetched series, derived from its frequency and update time
+
+    A series is not expected to change before its next release, roughly one
+    period after ``last_updated``, so it is cached until then, capped by the
+    frequency's ``CACHE_TTL_<FREQUENCY>`` setting (annual data for days, daily
+    data for hours). A release that is due but has not shown up yet is polled
+    every ``CACHE_TTL_MIN`` seconds; series more than a period overdue are
+    irregular or discontinued and get the cap again.
+
+    Providers that do not report an upstream update time stamp responses with
+    the fetch time, which makes their series last for the cap.
+
+    Args:
+        frequency: Series frequency (``CACHE_TTL`` for unknown frequencies)
+        last_updated: When the upstream last updated the series
+        now: Reference time (current time if None)
+
+    Returns:
+        TTL in seconds
+    """
+    cap = {
+        Frequency.DAILY: settings.CACHE_TTL_DAILY,
+        Frequency.WEEKLY: settings.CACHE_TTL_WEEKLY,
+        Frequency.MONTHLY: settings.CACHE_TTL_MONTHLY,
+        Frequency.QUARTERLY: settings.CACHE_TTL_QUARTERLY,
+        Frequency.ANNUAL: settings.CACHE_TTL_ANNUAL,
+    }.get(frequency)
+    if cap is None:
+        return settings.CACHE_TTL
+    if last_updated is None:
+        return cap
+
+    # Naive timestamps (providers stamping the fetch time) are local time
+    now = (now or datetime.now()).astimezone()
+    if last_updated.tzinfo is None:
+        now = now.replace(tzinfo=None)
+    period = timedelta(days=PERIOD_DAYS[frequency])
+    until_release = (last_updated + period - now).total_seconds()
+
+    if until_release > 0:
+        return int(max(min(until_release, cap), min(settings.CACHE_TTL_MIN, cap)))
+    if -until_release < period.total_seconds():
+        return min(settings.CACHE_TTL_MIN, cap)
+    return cap
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys
+
+    Membership tests never give false negatives; false positives occur at
+    roughly ``error_rate`` once ``capacity`` keys have been added.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initialize Bloom filter
+        
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false positive rate at capacity
+        """
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, key: str) -> None:
+        """Add a key"""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class NegativeCache:
+    """
+    Cache of series known to be unavailable upstream
+    
+    A Bloom filter answers the common "not known missing" case without
+    touching the entry store; only Bloom hits are confirmed against the
+    expiring entries. Bloom filters cannot forget keys, so the filter is
+    rebuilt from the live entries once per TTL. At most ``capacity`` entries
+    are kept; beyond that the oldest are dropped.
+    """
+    
+    def __init__(self, ttl: int = 600, capacity: int = 100000, error_rate: float = 0.01):
+        """
+        Initialize negative cache
+        
+        Args:
+            ttl: Time-to-live of a negative entry in seconds
+            capacity: Maximum number of negative entries (also sizes the Bloom filter)
+            error_rate: Bloom filter false positive rate
+        """
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._entries = CacheManager(default_ttl=ttl, name="negative")
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._rebuild_at = time.monotonic() + ttl
+        self.hits = 0
+        self.bloom_false_positives = 0
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Key for a series, e.g. make_key(indicator, country, start, end)"""
+        return "|".join("" if part is None else str(part).upper() for part in parts)
+    
+    def add(self, key: str) -> None:
+        """Record a key as unavailable"""
+        if time.monotonic() >= self._rebuild_at:
+            self._rebuild()
+        # All entries share one TTL, so insertion order is expiry order as long
+        # as a re-added key moves to the back
+        entries = self._entries.cache
+        entries.pop(key, None)
+        self._entries.set(key, True)
+        self._bloom.add(key)
+        while len(entries) > self.capacity:
+            del entries[next(iter(entries))]
+            cache_evictions.inc(self._entries.name)
+    
+    def contains(self, key: str) -> bool:
+        """Whether a key is known to be unavailable"""
+        if key not in self._bloom:
+            cache_requests.inc("negative", "miss")
+            return False
+        if self._entries.get(key) is None:
+            self.bloom_false_positives += 1
+            return False
+        self.hits += 1
+        return True
+    
+    def discard(self, key: str) -> None:
+        """Forget a key (e.g. after data for it was found)"""
+        self._entries.delete(key)
+    
+    @property
+    def entries(self) -> Mapping[str, dict]:
+        """The negative entries by key (including expired ones not yet evicted)"""
+        return self._entries.cache
+    
+    def __len__(self) -> int:
+        return len(self._entries.cache)
+    
+    def _rebuild(self) -> None:
+        self._entries.cleanup_expired()
+        self._bloom = BloomFilter(max(self.capacity, len(self._entries.cache)), self.error_rate)
+        for key in self._entries.cache:
+            self._bloom.add(key)
+        self._rebuild_at = time.monotonic() + self.ttl
+    
+    def clear(self) -> None:
+        """Remove all negative entries"""
+        self._entries.clear()
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._rebuild_at = time.monotonic() + self.ttl
+    
+    def get_stats(self) -> dict:
+        """
+        Get negative cache statistics
+        
+        Returns:
+            Dictionary with negative cache stats
+        """
+        return {
+            **self._entries.get_stats(),
+            "hits": self.hits,
+            "bloom_false_positives": self.bloom_false_positives
+        }
+
 # Global cache instance
 cache_manager = CacheManager()
 
+# Intermediate results of analytics computations, keyed by input series digests
+compute_cache = CacheManager(
+    default_ttl=settings.CACHE_TTL, name="compute", max_entries=settings.COMPUTE_CACHE_MAX_ENTRIES
+)
+
+# Global negative cache (series that no source could serve)
+negative_cache = NegativeCache(
+    ttl=settings.NEGATIVE_CACHE_TTL, capacity=settings.NEGATIVE_CACHE_CAPACITY
+)
+
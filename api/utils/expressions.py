@@ -0,0 +1,272 @@
+"""
+Derived indicator expressions
+
+A small arithmetic language over indicator IDs, e.g. ``INTEREST_RATE - INFLATION``
+or ``GOVERNMENT_DEBT / POPULATION``. Expressions are compiled into a DAG in which
+identical sub-expressions share a single node, so every input indicator is
+fetched once and every intermediate result is computed (and cached) once.
+"""
+import ast
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+import numpy as np
+
+from api.utils.cache import CacheManager
+from api.utils.timing import span
+from api.utils.series import Series, align, series_digest
+
+# Evaluated node value: a series or a scalar constant
+Value = Union[Series, float]
+
+BINARY_OPERATORS: Dict[type, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Pow: np.power,
+}
+
+UNARY_OPERATORS: Dict[type, Callable[[np.ndarray], np.ndarray]] = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+SYMBOLS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Pow: "**",
+    ast.USub: "-",
+    ast.UAdd: "+",
+}
+
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    out = np.full_like(values, np.nan)
+    out[1:] = values[1:] - values[:-1]
+    return out
+
+
+def _pct_change(values: np.ndarray) -> np.ndarray:
+    out = np.full_like(values, np.nan)
+    out[1:] = (values[1:] / values[:-1] - 1.0) * 100.0
+    return out
+
+
+FUNCTIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "abs": np.abs,
+    "log": np.log,
+    "exp": np.exp,
+    "sqrt": np.sqrt,
+    "diff": _diff,
+    "pct_change": _pct_change,
+}
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 64
+
+
+class ExpressionError(ValueError):
+    """Raised when a derived indicator expression is invalid"""
+
+
+class Node:
+    """A node of the expression DAG"""
+
+    __slots__ = ("key", "kind", "op", "children", "value", "indicators")
+
+    def __init__(self, key: str, kind: str, op=None, children: Tuple["Node", ...] = (), value=None):
+        self.key = key
+        self.kind = kind  # "indicator", "constant", "binary", "unary" or "call"
+        self.op = op
+        self.children = children
+        self.value = value
+        # Indicators this node depends on, used to key cached intermediate results
+        self.indicators: Tuple[str, ...] = (
+            (value,) if kind == "indicator"
+            else tuple(sorted({i for child in children for i in child.indicators}))
+        )
+
+
+class DerivedExpression:
+    """
+    Compiled derived indicator expression
+
+    Usage:
+        expr = DerivedExpression("INTEREST_RATE - INFLATION")
+        expr.indicators  # {"INTEREST_RATE", "INFLATION"}
+        dates, values = expr.evaluate({"INTEREST_RATE": ..., "INFLATION": ...})
+    """
+
+    def __init__(self, expression: str):
+        expression = expression.strip()
+        if not expression:
+            raise ExpressionError("Expression is empty")
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise ExpressionError(f"Expression exceeds {MAX_EXPRESSION_LENGTH} characters")
+
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise ExpressionError(f"Invalid expression syntax: {e.msg}") from e
+
+        self.expression = expression
+        self._nodes: Dict[str, Node] = {}
+        self.root = self._build(tree.body)
+        if not self.root.indicators:
+            raise ExpressionError("Expression must reference at least one indicator")
+        if len(self._nodes) > MAX_NODES:
+            raise ExpressionError(f"Expression exceeds {MAX_NODES} distinct terms")
+
+        self.indicators: Set[str] = {
+            node.value for node in self._nodes.values() if node.kind == "indicator"
+        }
+
+    @property
+    def normalized(self) -> str:
+        """Canonical form of the expression (fully parenthesised)"""
+        return self.root.key
+
+    def _intern(self, key: str, **kwargs) -> Node:
+        """Return the shared node for ``key``, creating it on first use"""
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(key, **kwargs)
+            self._nodes[key] = node
+        return node
+
+    def _build(self, node: ast.AST) -> Node:
+        if isinstance(node, ast.Name):
+            indicator = node.id.upper()
+            return self._intern(indicator, kind="indicator", value=indicator)
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            value = float(node.value)
+            return self._intern(repr(value), kind="constant", value=value)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            left = self._build(node.left)
+            right = self._build(node.right)
+            symbol = SYMBOLS[type(node.op)]
+            return self._intern(
+                f"({left.key} {symbol} {right.key})",
+                kind="binary", op=BINARY_OPERATORS[type(node.op)], children=(left, right)
+            )
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            operand = self._build(node.operand)
+            symbol = SYMBOLS[type(node.op)]
+            return self._intern(
+                f"({symbol}{operand.key})",
+                kind="unary", op=UNARY_OPERATORS[type(node.op)], children=(operand,)
+            )
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id.lower()
+            if name not in FUNCTIONS:
+                raise ExpressionError(
+                    f"Unknown function '{node.func.id}'. Available: {', '.join(sorted(FUNCTIONS))}"
+                )
+            if len(node.args) != 1 or node.keywords:
+                raise ExpressionError(f"Function '{name}' takes exactly one argument")
+            argument = self._build(node.args[0])
+            if not argument.indicators:  # constants, also under operators (``diff(-1)``)
+                raise ExpressionError(f"Function '{name}' must be applied to an indicator")
+            return self._intern(
+                f"{name}({argument.key})",
+                kind="call", op=FUNCTIONS[name], children=(argument,)
+            )
+
+        raise ExpressionError(f"Unsupported syntax in expression: {ast.dump(node)[:60]}")
+
+    def topological_order(self) -> List[Node]:
+        """Nodes ordered so that every node follows its children"""
+        order: List[Node] = []
+        seen: Set[str] = set()
+
+        def visit(node: Node):
+            if node.key in seen:
+                return
+            seen.add(node.key)
+            for child in node.children:
+                visit(child)
+            order.append(node)
+
+        visit(self.root)
+        return order
+
+    def evaluate(
+        self,
+        inputs: Dict[str, Series],
+        cache: Optional[CacheManager] = None
+    ) -> Series:
+        """
+        Evaluate the expression on aligned NumPy series
+
+        Every operation aligns its operands on their common dates, so an
+        intermediate result only depends on its own sub-expression and input
+        series. Cached intermediates are keyed by the sub-expression and the
+        content digests of its inputs, so they can be shared between
+        expressions, countries and requests without going stale.
+
+        Args:
+            inputs: Series for every indicator in ``self.indicators``
+            cache: Optional cache for intermediate results
+
+        Returns:
+            Tuple of (dates, values) for the expression
+        """
+        missing = self.indicators - set(inputs)
+        if missing:
+            raise ExpressionError(f"Missing input series: {', '.join(sorted(missing))}")
+
+        digests = {}
+        if cache is not None:
+            digests = {indicator: series_digest(inputs[indicator]) for indicator in self.indicators}
+
+        results: Dict[str, Value] = {}
+        for node in self.topological_order():
+            cache_key = None
+            if cache is not None and node.kind != "indicator" and node.indicators:
+                cache_key = cache.generate_key(
+                    "derived", node.key, *(digests[i] for i in node.indicators)
+                )
+                with span("cache"):
+                    cached = cache.get(cache_key)
+                if cached is not None:
+                    results[node.key] = cached
+                    continue
+
+            results[node.key] = self._evaluate_node(node, inputs, results)
+
+            if cache_key is not None:
+                cache.set(cache_key, results[node.key])
+
+        return results[self.root.key]
+
+    @staticmethod
+    def _evaluate_node(node: Node, inputs: Dict[str, Series], results: Dict[str, Value]) -> Value:
+        if node.kind == "indicator":
+            return inputs[node.value]
+        if node.kind == "constant":
+            return node.value
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            if node.kind == "binary":
+                left = results[node.children[0].key]
+                right = results[node.children[1].key]
+                if isinstance(left, float) and isinstance(right, float):
+                    return float(node.op(left, right))
+                if isinstance(left, float):
+                    return right[0], node.op(left, right[1])
+                if isinstance(right, float):
+                    return left[0], node.op(left[1], right)
+                dates, left_values, right_values = align(left, right)
+                return dates, node.op(left_values, right_values)
+
+            operand = results[node.children[0].key]
+            if isinstance(operand, float):
+                return float(node.op(np.float64(operand)))
+            return operand[0], node.op(operand[1])
+
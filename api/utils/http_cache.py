@@ -0,0 +1,137 @@
+"""
+HTTP conditional request helpers
+
+Data endpoints tag their responses with a strong ``ETag`` derived from the
+content hash of the series they serve and a ``Last-Modified`` date taken from
+the upstream update time. Requests whose ``If-None-Match`` (or, without it,
+``If-Modified-Since``) matches are answered with an empty 304 before the body
+is built or serialized. ``Cache-Control`` lets browsers and the nginx proxy
+cache reuse responses and revalidate them cheaply.
+"""
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+
+from fastapi import Request, Response
+
+from api.core.config import settings
+from api.utils.metrics import cache_requests
+
+
+def make_etag(*parts: str) -> str:
+    """
+    Build a strong entity tag from content fingerprints
+
+    Args:
+        *parts: Strings identifying the response content (e.g. series digests)
+
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def _to_http_date(value: datetime) -> datetime:
+    # Naive timestamps are local time; HTTP dates have second precision
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    max_age: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Validator and caching headers for a response
+
+    Args:
+        etag: Entity tag from ``make_etag``
+        last_modified: When the content last changed upstream
+        max_age: Seconds the response may be reused without revalidation
+            (capped by ``HTTP_CACHE_MAX_AGE``)
+
+    Returns:
+        Header dictionary
+    """
+    max_age = settings.HTTP_CACHE_MAX_AGE if max_age is None else min(max_age, settings.HTTP_CACHE_MAX_AGE)
+    # Responses depend on the API key when auth is on: keep them out of shared caches
+    scope = "private" if settings.ENABLE_AUTH else "public"
+    headers = {"ETag": etag, "Cache-Control": f"{scope}, max-age={max(0, int(max_age))}"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_to_http_date(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate the request's conditional headers (RFC 9110 section 13.2.2)
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only
+    considered when it is absent.
+
+    Args:
+        request: Incoming request
+        etag: Current entity tag
+        last_modified: Current modification time
+
+    Returns:
+        True if the client's cached copy is current
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: proxies (e.g. nginx gzip) may weaken our tags
+        return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _to_http_date(last_modified) <= since
+    return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    max_age: Optional[int] = None
+) -> Optional[Response]:
+    """
+    Apply caching headers and short-circuit requests for unchanged content
+
+    Usage:
+        not_modified = conditional_response(request, response, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+    Args:
+        request: Incoming request
+        response: Response the endpoint's result will be merged into
+        etag: Entity tag of the content
+        last_modified: When the content last changed upstream
+        max_age: Seconds the response may be reused without revalidation
+
+    Returns:
+        An empty 304 response if the client's copy is current, otherwise None
+        (the headers are then set on ``response``)
+    """
+    headers = cache_headers(etag, last_modified, max_age)
+    if is_not_modified(request, etag, last_modified):
+        cache_requests.inc("http", "hit")
+        return Response(status_code=304, headers=headers)
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        cache_requests.inc("http", "miss")  # revalidation of a stale copy
+    response.headers.update(headers)
+    return None
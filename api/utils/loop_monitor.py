@@ -0,0 +1,139 @@
+"""
+Event-loop lag monitor and slow-callback detector
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. The delay is the time ready callbacks wait for the loop, which grows with
+CPU-bound work in handlers and with the number of requests being served; it
+rises before response latency does, so admission control reacts to it.
+
+The lag is only known once the loop runs again, too late to see what blocked
+it. A watchdog thread therefore checks the task's heartbeat: when it is
+overdue by ``LOOP_SLOW_CALLBACK_THRESHOLD`` the thread samples the loop
+thread's stack, which is the stack of the callback holding the loop, and logs
+it once per stall.
+"""
+from collections import deque
+from typing import Deque, Dict, Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from api.core.config import settings
+from api.utils.metrics import event_loop_blocked, event_loop_lag
+
+logger = logging.getLogger(__name__)
+
+# Share of the previous estimate kept per sample: a spike raises the estimate
+# at once, then it halves every interval once the loop is responsive again
+LAG_DECAY = 0.5
+STACK_DEPTH = 20  # innermost frames logged per stall
+RECENT_STALLS = 20
+
+
+class LoopLagMonitor:
+    """
+    Tracks the event-loop lag of the running worker
+
+    Usage:
+        task = asyncio.create_task(loop_monitor.run())
+        loop_monitor.lag  # seconds, 0.0 while the monitor is not running
+    """
+
+    def __init__(self):
+        self.lag = 0.0  # current estimate (seconds)
+        self.max_lag = 0.0  # largest sample since startup
+        self.samples = 0
+        self.running = False
+        self.heartbeat = 0.0  # time.monotonic() of the task's last wake-up
+        self.blocked = 0  # stalls detected by the watchdog
+        self.recent_stalls: Deque[Dict] = deque(maxlen=RECENT_STALLS)
+        self._reported = 0.0  # heartbeat of the last reported stall
+
+    def observe(self, sample: float) -> None:
+        """Record one lag measurement (seconds)"""
+        self.lag = max(sample, self.lag * LAG_DECAY)
+        self.max_lag = max(self.max_lag, sample)
+        self.samples += 1
+        event_loop_lag.labels().observe(sample)
+
+    def reset(self) -> None:
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self.blocked = 0
+        self.recent_stalls.clear()
+
+    async def run(self, interval: float = None, threshold: float = None) -> None:
+        """
+        Measure the lag every ``interval`` seconds until cancelled
+
+        Args:
+            interval: Seconds between measurements (``LOOP_LAG_INTERVAL``)
+            threshold: Stall in seconds that triggers a stack sample
+                (``LOOP_SLOW_CALLBACK_THRESHOLD``, 0 for no watchdog)
+        """
+        interval = interval or settings.LOOP_LAG_INTERVAL
+        threshold = settings.LOOP_SLOW_CALLBACK_THRESHOLD if threshold is None else threshold
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        self.heartbeat = time.monotonic()
+        self.running = True
+        if threshold > 0:
+            threading.Thread(
+                target=self._watch, args=(threading.get_ident(), interval, threshold, stop),
+                name="loop-watchdog", daemon=True
+            ).start()
+        try:
+            while True:
+                expected = loop.time() + interval
+                await asyncio.sleep(interval)
+                self.heartbeat = time.monotonic()
+                self.observe(max(0.0, loop.time() - expected))
+        finally:
+            stop.set()
+            # A stale estimate must not keep shedding requests
+            self.running = False
+            self.lag = 0.0
+
+    def _watch(self, loop_thread: int, interval: float, threshold: float, stop: threading.Event) -> None:
+        """Watchdog thread: sample the loop's stack while the heartbeat is overdue"""
+        while not stop.wait(max(threshold / 4, 0.005)):
+            heartbeat = self.heartbeat
+            stalled = time.monotonic() - heartbeat - interval
+            if stalled >= threshold and heartbeat != self._reported:
+                self._reported = heartbeat
+                self.report_stall(sys._current_frames().get(loop_thread), stalled)
+
+    def report_stall(self, frame, stalled: float) -> None:
+        """Log the stack of the callback blocking the loop and count the stall"""
+        stack = traceback.extract_stack(frame, limit=STACK_DEPTH) if frame is not None else []
+        location = f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}" if stack else "unknown"
+        self.blocked += 1
+        event_loop_blocked.inc()
+        self.recent_stalls.append({
+            "timestamp": time.time(),
+            "blocked_ms": round(stalled * 1000, 1),
+            "location": location
+        })
+        logger.warning(
+            f"Event loop blocked for {stalled * 1000:.0f} ms (still running), at {location}:\n"
+            + "".join(traceback.format_list(stack))
+        )
+
+    def get_stats(self) -> dict:
+        last: Optional[Dict] = self.recent_stalls[-1] if self.recent_stalls else None
+        return {
+            "running": self.running,
+            "lag_ms": round(self.lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "samples": self.samples,
+            "blocked": self.blocked,
+            "last_blocked": last
+        }
+
+
+# Global monitor (one per worker process)
+loop_monitor = LoopLagMonitor()
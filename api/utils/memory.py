@@ -0,0 +1,232 @@
+"""
+Memory profiling
+
+``MemoryProfiler`` takes tracemalloc snapshots and diffs them to show which
+source lines allocated the memory a worker holds or gained. Tracing slows
+every allocation, so it only runs between the first snapshot and ``stop``.
+
+``stores`` is a census of the in-process containers that grow with traffic
+(caches, series store, limiter state, ...). Modules register their containers
+by name; sizes are estimated from a sample of entries so a census stays cheap
+on stores with millions of entries.
+"""
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Sized
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# Allocations of the profiler itself and of imports are not interesting
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+SIZE_SAMPLE = 50  # entries measured per store
+MAX_SNAPSHOTS = 5
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    Bytes held by an object and everything it references
+
+    Follows containers, instance ``__dict__`` and ``__slots__``; objects
+    reachable twice are counted once. Classes, functions and modules are
+    shared and not counted.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    pending = [obj]
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+        if hasattr(item, "__dict__"):
+            pending.append(item.__dict__)
+        for slot in getattr(type(item), "__slots__", ()):
+            if hasattr(item, slot):
+                pending.append(getattr(item, slot))
+    return total
+
+
+def estimate_size(container: Sized, sample: int = SIZE_SAMPLE) -> int:
+    """
+    Estimated deep size of a container from a sample of its entries
+
+    The container's own size plus the mean size of the first ``sample``
+    entries (key and value for mappings) times the number of entries.
+    Objects shared between entries are counted for each, so the estimate
+    errs on the high side.
+    """
+    count = len(container)
+    if not count:
+        return sys.getsizeof(container)
+    if isinstance(container, dict):
+        entries = list(islice(container.items(), sample))
+        measured = sum(deep_sizeof(key) + deep_sizeof(value) for key, value in entries)
+    else:
+        entries = list(islice(container, sample))
+        measured = sum(deep_sizeof(entry) for entry in entries)
+    if not entries:
+        return sys.getsizeof(container)
+    return sys.getsizeof(container) + measured * count // len(entries)
+
+
+class StoreCensus:
+    """
+    Named in-process stores measured on demand
+
+    Usage:
+        stores.register("cache.results", lambda: cache_manager.cache)
+        stores.census()  # {"cache.results": {"entries": ..., "bytes": ...}}
+    """
+
+    def __init__(self):
+        self._stores: Dict[str, Callable[[], Sized]] = {}
+
+    def register(self, name: str, container: Callable[[], Sized]) -> None:
+        """
+        Register a store (replaces one registered under the same name)
+
+        Args:
+            name: Store name
+            container: Returns the container, read at census time so stores
+                that are replaced (``clear`` rebinding a dict) are followed
+        """
+        self._stores[name] = container
+
+    def census(self, sample: int = SIZE_SAMPLE) -> Dict[str, Dict[str, int]]:
+        """Entries and estimated bytes per store, largest first"""
+        sizes = {}
+        for name, container in list(self._stores.items()):
+            store = container()
+            sizes[name] = {"entries": len(store), "bytes": estimate_size(store, sample)}
+        return dict(sorted(sizes.items(), key=lambda item: item[1]["bytes"], reverse=True))
+
+
+class MemoryProfiler:
+    """
+    tracemalloc snapshots of the worker
+
+    Usage:
+        first = memory_profiler.snapshot()  # starts tracing
+        ...
+        second = memory_profiler.snapshot()
+        memory_profiler.diff(first["id"], second["id"])
+        memory_profiler.stop()
+    """
+
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._taken: Dict[int, float] = {}
+        self._next_id = 1
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, frames: int = 1) -> Dict[str, Any]:
+        """
+        Take a snapshot, starting tracing first if needed
+
+        Only allocations made while tracing are seen, so the first snapshot
+        is a baseline to diff later ones against.
+
+        Args:
+            frames: Stack frames kept per allocation when tracing starts
+
+        Returns:
+            Snapshot id, time and traced memory
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snapshot_id] = snapshot
+        self._taken[snapshot_id] = time.time()
+        while len(self._snapshots) > self.max_snapshots:
+            dropped, _ = self._snapshots.popitem(last=False)
+            del self._taken[dropped]
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "id": snapshot_id,
+            "timestamp": self._taken[snapshot_id],
+            "traced_bytes": current,
+            "traced_peak_bytes": peak
+        }
+
+    def snapshot_ids(self) -> List[int]:
+        return list(self._snapshots)
+
+    def top(self, snapshot_id: int, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        Largest allocation sites of a snapshot
+
+        Raises:
+            KeyError: Unknown (or dropped) snapshot id
+        """
+        statistics = self._snapshots[snapshot_id].statistics(group_by)
+        return [
+            {"site": _site(stat.traceback), "bytes": stat.size, "count": stat.count}
+            for stat in statistics[:limit]
+        ]
+
+    def diff(self, old_id: int, new_id: int, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        Allocation sites that grew or shrank most between two snapshots
+
+        Raises:
+            KeyError: Unknown (or dropped) snapshot id
+        """
+        statistics = self._snapshots[new_id].compare_to(self._snapshots[old_id], group_by)
+        return [
+            {
+                "site": _site(stat.traceback),
+                "bytes": stat.size,
+                "bytes_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff
+            }
+            for stat in statistics[:limit]
+        ]
+
+    def stop(self) -> None:
+        """Stop tracing and drop the snapshots"""
+        tracemalloc.stop()
+        self._snapshots.clear()
+        self._taken.clear()
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    """``file:line`` of an allocation, innermost frame first"""
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback))
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Resident set size of the worker now (Linux only) and at its peak, in bytes"""
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "rss_bytes": rss,
+        "peak_rss_bytes": peak if sys.platform == "darwin" else peak * 1024  # kilobytes on Linux
+    }
+
+
+# Global instances (one per worker process)
+stores = StoreCensus()
+memory_profiler = MemoryProfiler()
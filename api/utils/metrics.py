@@ -0,0 +1,300 @@
+"""
+In-process metrics
+
+Counters, gauges and fixed-bucket histograms, rendered in the Prometheus text
+format by ``/metrics``. An update is a dict lookup and a few increments: no
+allocation after a label set's first use, no await and no lock. On the event
+loop that makes updates atomic; updates from worker threads may rarely lose
+an increment under contention, which is acceptable for monitoring data.
+Scrapes read a copy of each metric's label sets, so they never block or
+invalidate an update.
+
+Values that objects already track (breaker transitions, throttle state,
+store sizes) are not duplicated here; ``registry.collector`` functions read
+them at scrape time.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import math
+
+# Seconds; roughly 2.5x apart from 0.5 ms to a minute
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+Labels = Tuple[str, ...]
+# (labels, value) pairs of one metric, as produced by collectors
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds (Prometheus ``le``)
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one value"""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimate (the largest finite bound if it falls in the +Inf
+            bucket), or None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Count, mean and p50/p95/p99 in milliseconds"""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.sum / self.count if self.count else None),
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99))
+        }
+
+
+class _Metric:
+    """Name, help text and label names shared by all metric types"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def _label_dict(self, labels: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labels))
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter per label set
+
+    Usage:
+        upstream_requests.inc("fred", "ok")
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Samples:
+        return [(self._label_dict(labels), value) for labels, value in list(self._values.items())]
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Gauge(Counter):
+    """Value that goes up and down per label set"""
+
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class HistogramFamily(_Metric):
+    """
+    Histograms per label set
+
+    Usage:
+        stage_latency.labels("cache").observe(0.0002)
+        stage_latency.snapshot()  # {"cache": {"count": 1, ...}}
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        bounds: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, description, labelnames)
+        self.bounds = tuple(bounds)
+        self._histograms: Dict[Labels, Histogram] = {}
+
+    def labels(self, *labels: str) -> Histogram:
+        """Histogram for a label set, created on first use"""
+        histogram = self._histograms.get(labels)
+        if histogram is None:
+            histogram = self._histograms.setdefault(labels, Histogram(self.bounds))
+        return histogram
+
+    def items(self) -> Iterator[Tuple[Labels, Histogram]]:
+        return iter(list(self._histograms.items()))
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Summaries keyed by the label values joined with ``/``"""
+        return {"/".join(labels): histogram.snapshot() for labels, histogram in sorted(self.items())}
+
+    def clear(self) -> None:
+        self._histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Metrics exposed by ``/metrics``
+
+    Usage:
+        requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+
+        @registry.collector
+        def store_size():
+            yield "store_entries", "gauge", "Stored series", [({}, len(store))]
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, function: Callable) -> Callable:
+        """
+        Register a function returning ``(name, type, help, samples)`` tuples,
+        called on every scrape
+        """
+        self._collectors.append(function)
+        return function
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, description: str) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for metric in self._metrics:
+            header(metric.name, metric.type, metric.description)
+            if isinstance(metric, HistogramFamily):
+                for labels, histogram in metric.items():
+                    label_dict = metric._label_dict(labels)
+                    cumulative = 0
+                    for bound, count in zip((*histogram.bounds, math.inf), list(histogram.counts)):
+                        cumulative += count
+                        bucket_labels = _format_labels({**label_dict, "le": _format_value(bound)})
+                        lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(label_dict)} {_format_value(histogram.sum)}")
+                    lines.append(f"{metric.name}_count{_format_labels(label_dict)} {cumulative}")
+            else:
+                for labels, value in metric.samples():
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collect in self._collectors:
+            for name, kind, description, samples in collect():
+                header(name, kind, description)
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Time spent per request stage (store, cache, provider.<source>, upstream, handler, render, ...)
+stage_latency = registry.register(HistogramFamily(
+    "stage_duration_seconds", "Time spent in each request stage", ("stage",)
+))
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_request_duration = registry.register(HistogramFamily(
+    "http_request_duration_seconds", "HTTP request duration by route", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled"
+))
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")
+))
+cache_evictions = registry.register(Counter(
+    "cache_evictions_total", "Entries removed from a cache because they expired or did not fit", ("cache",)
+))
+upstream_requests = registry.register(Counter(
+    "upstream_requests_total",
+    "Upstream HTTP calls by provider and outcome (ok, rate_limited, client_error, server_error, timeout, bad_payload, error)",
+    ("provider", "outcome")
+))
+upstream_request_duration = registry.register(HistogramFamily(
+    "upstream_request_duration_seconds", "Upstream HTTP call duration by provider", ("provider",)
+))
+rate_limit_rejections = registry.register(Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter by tier and reason (rate/quota/cost)",
+    ("tier", "reason")
+))
+load_shed_rejections = registry.register(Counter(
+    "load_shed_rejections_total", "Requests rejected with 503 while overloaded by priority and reason (lag/in_flight)",
+    ("priority", "reason")
+))
+event_loop_lag = registry.register(HistogramFamily(
+    "event_loop_lag_seconds", "Delay of the loop monitor's timer (time callbacks wait for the event loop)"
+))
+event_loop_blocked = registry.register(Counter(
+    "event_loop_blocked_total", "Stalls of the event loop longer than the slow-callback threshold (stack logged)"
+))
@@ -0,0 +1,112 @@
+"""
+Sampling profiler for single requests
+
+A thread samples the event-loop thread's stack every ``interval`` seconds
+while one request is handled, and the samples are exported in the speedscope
+format (https://www.speedscope.app, also readable as a flame graph). Nothing
+runs until a profile is started, so untriggered requests pay nothing.
+
+Samples show everything the loop thread runs while the request is in flight,
+including callbacks of concurrent requests and the selector while the loop
+waits for I/O (time spent waiting on upstream calls); profile on a quiet
+worker for the clearest picture. Work in other threads is not sampled.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+import threading
+import time
+
+# Frames are identified by function, not line, so samples merge per call site
+FrameKey = Tuple[str, str, int]
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread from a background thread
+
+    Usage:
+        profiler = SamplingProfiler()
+        profiler.start()
+        ...
+        profiler.stop()
+        profiler.speedscope("GET /api/v1/indicators/GDP")
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        """
+        Initialize profiler
+
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample (defaults to the thread calling ``start``)
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.frames: List[FrameKey] = []
+        self.samples: List[List[int]] = []  # frame indices, outermost first
+        self.weights: List[float] = []
+        self.duration = 0.0
+        self._index: Dict[FrameKey, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started: Optional[float] = None
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling (a no-op if the profiler was never started)"""
+        if self._started is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _sample(self) -> None:
+        last = self._started
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self._index.get(key)
+                if index is None:
+                    index = self._index[key] = len(self.frames)
+                    self.frames.append(key)
+                stack.append(index)
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Profile as a speedscope file (sampled profile, seconds)"""
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "economic-data-api",
+            "shared": {
+                "frames": [{"name": function, "file": file, "line": line} for function, file, line in self.frames]
+            },
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": self.samples,
+                "weights": [round(weight, 6) for weight in self.weights]
+            }]
+        }
@@ -0,0 +1,111 @@
+"""
+Buffered API request logging
+
+Requests are appended to an in-memory buffer and written to the
+``api_request_logs`` table in batches from a worker thread, so logging never
+puts a database round trip on the request path.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+
+from api.core.config import settings
+from api.core.database import SessionLocal
+from api.core.quotas import DIGEST_PREFIX, hash_api_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogBuffer:
+    """
+    Collects request log rows and flushes them in batches
+
+    Usage:
+        request_log.record(request.url.path, ...)  # from middleware
+        await request_log.flush()                  # periodically / on shutdown
+    """
+
+    def __init__(self, max_buffer: int = 10000):
+        self.max_buffer = max_buffer
+        self._rows: List[Dict[str, Any]] = []
+        self.dropped = 0
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        status_code: int,
+        response_time: float,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> None:
+        """
+        Buffer one request
+
+        Args:
+            endpoint: Request path including the query string
+            method: HTTP method
+            status_code: Response status
+            response_time: Handling time in seconds
+            ip_address: Client address
+            user_agent: Client user agent
+            api_key: API key used, if any (stored as ``sha256:<hex digest>``,
+                never in plain text)
+        """
+        if len(self._rows) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._rows.append({
+            "endpoint": endpoint[:255],
+            "method": method,
+            "status_code": status_code,
+            "response_time": response_time,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "api_key": DIGEST_PREFIX + hash_api_key(api_key) if api_key else None,
+            "timestamp": datetime.now(timezone.utc)
+        })
+
+    async def flush(self) -> int:
+        """
+        Write buffered rows to the database
+
+        Returns:
+            Number of rows written
+        """
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} request log rows: {e}")
+            return 0
+        return len(rows)
+
+    @staticmethod
+    def _write(rows: List[Dict[str, Any]]) -> None:
+        from api.models.database import APIRequestLog
+
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(APIRequestLog, rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def run(self, interval: float = None) -> None:
+        """Flush the buffer every ``interval`` seconds until cancelled"""
+        interval = interval or settings.REQUEST_LOG_FLUSH_INTERVAL
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+
+# Global request log buffer
+request_log = RequestLogBuffer()
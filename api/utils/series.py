@@ -0,0 +1,166 @@
+"""
+NumPy helpers for working with indicator time series
+"""
+from typing import List, Tuple
+import hashlib
+import numpy as np
+
+from api.models.schemas import EconomicIndicatorResponse, Frequency
+
+# A series is a pair of equally sized arrays: unique, sorted datetime64[D] dates
+# and float64 values
+Series = Tuple[np.ndarray, np.ndarray]
+
+# Approximate length of one period of each frequency, in days
+PERIOD_DAYS = {
+    Frequency.DAILY: 1,
+    Frequency.WEEKLY: 7,
+    Frequency.MONTHLY: 31,
+    Frequency.QUARTERLY: 92,
+    Frequency.ANNUAL: 366,
+}
+
+
+def to_series(indicator: EconomicIndicatorResponse) -> Series:
+    """
+    Convert an indicator response into sorted NumPy arrays
+
+    Args:
+        indicator: Indicator response with data points
+
+    Returns:
+        Tuple of (dates, values) sorted by date; of several points with the
+        same date the last one is kept, so dates are unique as alignment
+        assumes
+    """
+    n = len(indicator.data)
+    dates = np.fromiter(
+        (np.datetime64(dp.date, "D") for dp in indicator.data),
+        dtype="datetime64[D]",
+        count=n
+    )
+    values = np.fromiter((dp.value for dp in indicator.data), dtype=np.float64, count=n)
+
+    order = np.argsort(dates, kind="stable")
+    dates, values = dates[order], values[order]
+    if n > 1:
+        last = np.append(dates[1:] != dates[:-1], True)
+        if not last.all():
+            dates, values = dates[last], values[last]
+    return dates, values
+
+
+def align(left: Series, right: Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Align two series on their common dates
+
+    Args:
+        left: First series
+        right: Second series
+
+    Returns:
+        Tuple of (common dates, left values, right values)
+    """
+    common, left_idx, right_idx = np.intersect1d(
+        left[0], right[0], assume_unique=True, return_indices=True
+    )
+    return common, left[1][left_idx], right[1][right_idx]
+
+
+def finite(series: Series) -> Series:
+    """Drop NaN and infinite observations from a series"""
+    mask = np.isfinite(series[1])
+    return series[0][mask], series[1][mask]
+
+
+def series_digest(series: Series) -> str:
+    """Content hash of a series, used to key cached computations"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series[0]).tobytes())
+    digest.update(np.ascontiguousarray(series[1]).tobytes())
+    return digest.hexdigest()
+
+
+def align_many(series: List[Series]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align several series on the dates they all have in common
+
+    Args:
+        series: Series to align
+
+    Returns:
+        Tuple of (common dates, values matrix of shape (len(series), len(dates)))
+    """
+    common = series[0][0]
+    for dates, _ in series[1:]:
+        common = np.intersect1d(common, dates, assume_unique=True)
+
+    matrix = np.empty((len(series), len(common)), dtype=np.float64)
+    for row, (dates, values) in enumerate(series):
+        _, _, idx = np.intersect1d(common, dates, assume_unique=True, return_indices=True)
+        matrix[row] = values[idx]
+    return common, matrix
+
+
+def cross_correlation(
+    matrix: np.ndarray,
+    pairs: List[Tuple[int, int]],
+    max_lag: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lagged cross-correlation profiles computed via FFT
+
+    Each row of ``matrix`` is standardised and transformed once, so the cost is
+    one FFT per series plus one inverse FFT per pair, instead of O(lags * n)
+    per pair. For a pair (i, j) the value at lag k is the correlation between
+    row i at time t and row j at time t + k: a peak at a positive lag means
+    series i leads series j by k periods.
+
+    Args:
+        matrix: Aligned values, one series per row
+        pairs: Row index pairs to correlate
+        max_lag: Largest lag (in periods) to report in each direction
+
+    Returns:
+        Tuple of (lags, correlations of shape (len(pairs), len(lags)))
+    """
+    n = matrix.shape[1]
+    max_lag = max(0, min(max_lag, n - 1))
+    lags = np.arange(-max_lag, max_lag + 1)
+    if not pairs or n == 0:
+        return lags, np.empty((0, len(lags)))
+
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1, keepdims=True)
+    std[std == 0] = np.nan
+    standardized = centered / std
+
+    # Zero-pad to at least 2n - 1 so the circular correlation does not wrap
+    nfft = 1 << int(np.ceil(np.log2(max(2 * n - 1, 1))))
+    spectra = np.fft.rfft(standardized, n=nfft, axis=1)
+
+    left, right = (np.array(idx) for idx in zip(*pairs))
+    profiles = np.fft.irfft(np.conj(spectra[left]) * spectra[right], n=nfft, axis=1) / n
+    return lags, profiles[:, lags % nfft]
+
+
+def rank_values(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Competition ranks (1 = highest) and percentiles of a set of values
+
+    Tied values share the best rank. The percentile is the share of values
+    less than or equal to each value.
+
+    Args:
+        values: Values to rank
+
+    Returns:
+        Tuple of (ranks, percentiles in 0-100)
+    """
+    n = len(values)
+    if n == 0:
+        return np.array([], dtype=np.int64), np.array([])
+    ascending = np.sort(values)
+    ranks = n - np.searchsorted(ascending, values, side="right") + 1
+    percentiles = np.searchsorted(ascending, values, side="right") / n * 100.0
+    return ranks, percentiles
@@ -0,0 +1,369 @@
+"""
+Local series store for Economic Data API
+
+Keeps the observations fetched from upstream providers as NumPy arrays, indexed
+by canonical indicator ID, source and country, so panel queries (one indicator
+across many countries) can be answered without going back upstream. Sources are
+kept apart because providers publish different measures under the same
+canonical ID (e.g. FRED's CPI level vs. World Bank's CPI inflation rate).
+
+The store is bounded in series (``SERIES_STORE_MAX_SERIES``) and observations
+(``SERIES_STORE_MAX_OBSERVATIONS``); the least recently written or read
+series are evicted first.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+from datetime import date, timedelta
+import time
+import numpy as np
+
+from api.core.config import settings
+from api.models.schemas import DataPoint, EconomicIndicatorResponse, DataSource
+from api.utils.cache import ttl_for_series
+from api.utils.metrics import cache_evictions, cache_requests
+from api.utils.series import to_series
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default for SeriesStore.put(covered_from=...): the response's first observation
+_FIRST_OBSERVATION = object()
+
+
+class StoredSeries:
+    """Observations for one indicator/country pair plus the response metadata"""
+
+    __slots__ = (
+        "indicator_id", "country_code", "dates", "values", "response", "updated_at",
+        "covered_from", "covered_to", "revised_dates"
+    )
+
+    def __init__(
+        self,
+        indicator_id: str,
+        country_code: str,
+        dates: np.ndarray,
+        values: np.ndarray,
+        response: EconomicIndicatorResponse,
+        covered_from: Optional[date] = None,
+        revised_dates: Optional[np.ndarray] = None,
+        covered_to: Optional[date] = None
+    ):
+        self.indicator_id = indicator_id
+        self.country_code = country_code
+        self.dates = dates
+        self.values = values
+        self.response = response
+        self.updated_at = time.time()
+        # Period fetched from upstream (None: full history / up to the present)
+        self.covered_from = covered_from
+        self.covered_to = covered_to
+        # Dates whose values changed in the latest merge
+        self.revised_dates = revised_dates if revised_dates is not None else dates[:0]
+
+    @property
+    def last_date(self) -> Optional[date]:
+        """Date of the most recent observation"""
+        return self.dates[-1].item() if len(self.dates) else None
+
+    @property
+    def ttl(self) -> int:
+        """Seconds the series stays fresh after it was fetched"""
+        return ttl_for_series(self.response.frequency, self.response.last_updated)
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the series was fetched less than its TTL ago"""
+        return time.time() - self.updated_at < self.ttl
+
+    def covers(self, start_date: Optional[date], end_date: Optional[date] = None) -> bool:
+        """
+        Whether the stored history spans a requested period
+
+        Args:
+            start_date: Start of the period (None: full history)
+            end_date: End of the period (None: up to the present)
+        """
+        if self.covered_to is not None and (end_date is None or end_date > self.covered_to):
+            return False
+        if self.covered_from is None:
+            return True
+        return start_date is not None and start_date >= self.covered_from
+
+    def to_response(self, start_date: Optional[date] = None) -> EconomicIndicatorResponse:
+        """
+        Build an indicator response from the stored observations
+
+        Args:
+            start_date: Drop observations before this date
+
+        Returns:
+            The latest response's metadata with the full stored data
+        """
+        mask = np.isfinite(self.values)
+        if start_date is not None:
+            mask &= self.dates >= np.datetime64(start_date, "D")
+        unit = self.response.data[0].unit if self.response.data else None
+        data = [
+            DataPoint(date=d, value=v, unit=unit)
+            for d, v in zip(self.dates[mask].tolist(), self.values[mask].tolist())
+        ]
+        return self.response.model_copy(update={"data": data})
+
+
+class SeriesStore:
+    """
+    In-process store of fetched series
+
+    Series written for the same indicator/source/country are merged:
+    observations are unioned by date and newer values replace older ones.
+    """
+
+    def __init__(self, max_series: int = None, max_observations: int = None):
+        """
+        Initialize store
+
+        Args:
+            max_series: Maximum number of series (SERIES_STORE_MAX_SERIES if None)
+            max_observations: Maximum number of observations over all series
+                (SERIES_STORE_MAX_OBSERVATIONS if None)
+        """
+        self.max_series = max_series or settings.SERIES_STORE_MAX_SERIES
+        self.max_observations = max_observations or settings.SERIES_STORE_MAX_OBSERVATIONS
+        self._series: Dict[Tuple[str, DataSource], Dict[str, StoredSeries]] = {}
+        self._panels: Dict[Tuple[str, DataSource, str], float] = {}
+        # Recency of every stored series, least recently used first
+        self._lru: "OrderedDict[Tuple[str, DataSource, str], None]" = OrderedDict()
+        self._observations = 0
+        self.revisions = 0
+        self.evictions = 0
+
+    def put(
+        self,
+        indicator_id: str,
+        response: EconomicIndicatorResponse,
+        covered_from: Union[date, None, object] = _FIRST_OBSERVATION,
+        covered_to: Optional[date] = None
+    ) -> StoredSeries:
+        """
+        Store (or merge) a fetched series
+
+        Values that differ from the stored ones on overlapping dates are
+        upstream revisions; they replace the old values and are reported in
+        ``revised_dates`` of the returned series.
+
+        Args:
+            indicator_id: Canonical indicator ID the series was requested as
+            response: Provider response
+            covered_from: Start date the response was requested from (None:
+                full history); defaults to its first observation
+            covered_to: End date the response was requested up to (None:
+                the present). Stored periods that do not overlap are not
+                joined: the one reaching further forward is kept as covered.
+
+        Returns:
+            The stored series
+        """
+        indicator_id = indicator_id.upper()
+        country_code = response.country_code.upper()
+        dates, values = to_series(response)
+        if covered_from is _FIRST_OBSERVATION:
+            covered_from = dates[0].item() if len(dates) else None
+        requested_to = covered_to
+        revised = dates[:0]
+
+        by_country = self._series.setdefault((indicator_id, response.source), {})
+        existing = by_country.get(country_code)
+        if existing is not None and len(existing.dates):
+            _, old_idx, new_idx = np.intersect1d(
+                existing.dates, dates, assume_unique=True, return_indices=True
+            )
+            changed = ~np.isclose(existing.values[old_idx], values[new_idx], equal_nan=True)
+            revised = dates[new_idx[changed]]
+            if len(revised):
+                self.revisions += len(revised)
+                logger.info(
+                    f"{len(revised)} revised observations of {indicator_id} for {country_code} "
+                    f"from {response.source}"
+                )
+
+            # New observations first so np.unique keeps them on duplicate dates
+            all_dates = np.concatenate([dates, existing.dates])
+            all_values = np.concatenate([values, existing.values])
+            dates, idx = np.unique(all_dates, return_index=True)
+            values = all_values[idx]
+            covered_from, covered_to = _merge_coverage(
+                (existing.covered_from, existing.covered_to), (covered_from, covered_to)
+            )
+
+        stored = StoredSeries(
+            indicator_id, country_code, dates, values, response, covered_from, revised, covered_to
+        )
+        if existing is not None and requested_to is not None:
+            # A bounded fetch did not refresh the recent end of the series
+            stored.updated_at = existing.updated_at
+        by_country[country_code] = stored
+        key = (indicator_id, response.source, country_code)
+        self._observations += len(dates) - (len(existing.dates) if existing is not None else 0)
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        self._evict()
+        return stored
+
+    def _evict(self) -> None:
+        """Drop least recently used series until the store is within its bounds (keeping the newest)"""
+        while len(self._lru) > 1 and (
+            len(self._lru) > self.max_series or self._observations > self.max_observations
+        ):
+            (indicator_id, source, country_code), _ = self._lru.popitem(last=False)
+            by_country = self._series[(indicator_id, source)]
+            self._observations -= len(by_country.pop(country_code).dates)
+            if not by_country:
+                del self._series[(indicator_id, source)]
+            # A panel missing a country must be loaded again before it is served
+            for panel in [p for p in self._panels if p[:2] == (indicator_id, source)]:
+                del self._panels[panel]
+            self.evictions += 1
+            cache_evictions.inc("series_store")
+
+    def get(
+        self,
+        indicator_id: str,
+        country_code: str,
+        source: Optional[DataSource] = None
+    ) -> Optional[StoredSeries]:
+        """
+        Get the stored series for an indicator/country pair
+
+        Args:
+            indicator_id: Canonical indicator ID
+            country_code: Country code
+            source: Source to read from (most recently updated if None)
+
+        Returns:
+            Stored series or None
+        """
+        indicator_id = indicator_id.upper()
+        country_code = country_code.upper()
+        if source is not None:
+            stored = self._series.get((indicator_id, source), {}).get(country_code)
+        else:
+            candidates = [
+                by_country[country_code] for (ind, _), by_country in self._series.items()
+                if ind == indicator_id and country_code in by_country
+            ]
+            stored = max(candidates, key=lambda s: s.updated_at, default=None)
+        cache_requests.inc("series_store", "miss" if stored is None else "hit")
+        if stored is not None:
+            self._lru.move_to_end((indicator_id, stored.response.source, country_code))
+        return stored
+
+    def panel(self, indicator_id: str, source: DataSource) -> Dict[str, StoredSeries]:
+        """All stored series for an indicator from one source, keyed by country code"""
+        return dict(self._series.get((indicator_id.upper(), source), {}))
+
+    def mark_panel(self, indicator_id: str, source: DataSource, scope: str) -> None:
+        """Record that a full cross-country panel was loaded for ``scope``"""
+        self._panels[(indicator_id.upper(), source, scope)] = time.time()
+
+    def panel_age(self, indicator_id: str, source: DataSource, scope: str) -> Optional[float]:
+        """Seconds since the panel for ``scope`` was loaded, or None"""
+        loaded_at = self._panels.get((indicator_id.upper(), source, scope))
+        return None if loaded_at is None else time.time() - loaded_at
+
+    def cross_section(
+        self,
+        indicator_id: str,
+        source: DataSource,
+        on_date: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest observation per country on or before ``on_date``
+
+        Args:
+            indicator_id: Canonical indicator ID
+            source: Source whose series make up the panel
+            on_date: Cut-off date (latest available if None)
+
+        Returns:
+            Tuple of (country codes, observation dates, values)
+        """
+        panel = [
+            s for s in self._series.get((indicator_id.upper(), source), {}).values()
+            if len(s.dates)
+        ]
+        if not panel:
+            return np.array([], dtype=object), np.array([], dtype="datetime64[D]"), np.array([])
+
+        codes = np.array([s.country_code for s in panel], dtype=object)
+        lengths = np.fromiter((len(s.dates) for s in panel), dtype=np.intp, count=len(panel))
+        owner = np.repeat(np.arange(len(panel)), lengths)
+        dates = np.concatenate([s.dates for s in panel])
+        values = np.concatenate([s.values for s in panel])
+
+        mask = np.isfinite(values)
+        if on_date is not None:
+            mask &= dates <= np.datetime64(on_date, "D")
+        owner, dates, values = owner[mask], dates[mask], values[mask]
+        if not len(owner):
+            return np.array([], dtype=object), np.array([], dtype="datetime64[D]"), np.array([])
+
+        # Sort by (country, date) and keep the last observation of each country
+        order = np.lexsort((dates, owner))
+        owner, dates, values = owner[order], dates[order], values[order]
+        last = np.append(owner[1:] != owner[:-1], True)
+        return codes[owner[last]], dates[last], values[last]
+
+    def clear(self) -> None:
+        """Remove all stored series"""
+        self._series.clear()
+        self._panels.clear()
+        self._lru.clear()
+        self._observations = 0
+        self.revisions = 0
+        self.evictions = 0
+
+    def get_stats(self) -> dict:
+        """
+        Get store statistics
+
+        Returns:
+            Dictionary with store stats
+        """
+        return {
+            "indicators": len({indicator for indicator, _ in self._series}),
+            "series": len(self._lru),
+            "observations": self._observations,
+            "max_series": self.max_series,
+            "max_observations": self.max_observations,
+            "panels": len(self._panels),
+            "revisions": self.revisions,
+            "evictions": self.evictions
+        }
+
+
+def _merge_coverage(
+    old: Tuple[Optional[date], Optional[date]],
+    new: Tuple[Optional[date], Optional[date]]
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Period covered by two merged fetches, as (from, to) with None for open ends
+
+    Overlapping (or adjacent) periods are joined. Otherwise there is a gap
+    the store cannot vouch for, so only the period reaching further forward
+    counts as covered.
+    """
+    (old_from, old_to), (new_from, new_to) = old, new
+    day = timedelta(days=1)
+    if (new_from is None or old_to is None or new_from <= old_to + day) \
+            and (old_from is None or new_to is None or old_from <= new_to + day):
+        start = None if old_from is None or new_from is None else min(old_from, new_from)
+        end = None if old_to is None or new_to is None else max(old_to, new_to)
+        return start, end
+    if new_to is None or (old_to is not None and new_to >= old_to):
+        return new
+    return old
+
+
+# Global series store instance
+series_store = SeriesStore()
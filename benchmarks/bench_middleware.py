@@ -0,0 +1,169 @@
+"""
+Benchmark: middleware stack overhead, BaseHTTPMiddleware vs. pure ASGI
+
+Builds the API's middleware stack (TrustedHost, CORS, security headers, rate
+limiting, auth) around one endpoint that returns a small cached payload, and
+drives it with raw ASGI calls (no network, no HTTP parsing) so the numbers
+show what the middleware itself costs on a cache hit:
+
+* before - the previous AuthMiddleware / RateLimitMiddleware
+           (BaseHTTPMiddleware) and the @app.middleware("http") security
+           headers function, rate limiting on the same GCRA limiter
+* after  - api.middleware.{auth,rate_limit,security} pure ASGI classes
+* bare   - the endpoint with only TrustedHost and CORS, for reference
+
+Usage:
+    python -m benchmarks.bench_middleware [--requests 20000]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from api.core.config import settings
+from api.middleware.auth import AuthMiddleware
+from api.middleware.rate_limit import GCRALimiter, RateLimitMiddleware
+from api.middleware.security import SecurityHeadersMiddleware
+
+PAYLOAD = {
+    "indicator_id": "GDP", "country_code": "USA", "source": "fred",
+    "data": [{"date": f"{2000 + i // 4}-{3 * (i % 4) + 1:02d}-01", "value": 20000.0 + i} for i in range(40)],
+}
+UNLIMITED = 10 ** 9
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The previous AuthMiddleware dispatch"""
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if any(
+            path == endpoint or (endpoint != "/" and path.startswith(endpoint.rstrip("/") + "/"))
+            for endpoint in AuthMiddleware.PUBLIC_ENDPOINTS
+        ):
+            return await call_next(request)
+        api_key = request.headers.get(settings.API_KEY_NAME)
+        if not api_key:
+            return JSONResponse(status_code=401, content={"error": "Authentication required"})
+        if settings.API_KEYS and api_key not in settings.API_KEYS:
+            return JSONResponse(status_code=403, content={"error": "Invalid API key"})
+        return await call_next(request)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The previous RateLimitMiddleware dispatch"""
+
+    def __init__(self, app, requests_per_minute: int, window_size: int = 60):
+        super().__init__(app)
+        self.requests_per_minute = requests_per_minute
+        self.limiter = GCRALimiter(requests_per_minute, window_size)
+
+    async def dispatch(self, request: Request, call_next):
+        client_id = request.headers.get("X-API-Key") or (request.client.host if request.client else "unknown")
+        current_time = time.time()
+        allowed, remaining, reset = self.limiter.check(client_id)
+        if not allowed:
+            return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Reset"] = str(int(current_time + reset))
+        return response
+
+
+async def legacy_security_headers(request: Request, call_next):
+    response = await call_next(request)
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+    response.headers["Content-Security-Policy"] = "default-src 'self'"
+    return response
+
+
+def build_app(stack: str) -> FastAPI:
+    """Endpoint plus the middleware stack, added in the same order as api.main"""
+    app = FastAPI()
+
+    @app.get("/api/v1/indicators/GDP")
+    async def indicator():
+        return PAYLOAD
+
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    if stack == "before":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_security_headers)
+        app.add_middleware(LegacyRateLimitMiddleware, requests_per_minute=UNLIMITED)
+        app.add_middleware(LegacyAuthMiddleware)
+    elif stack == "after":
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RateLimitMiddleware, requests_per_minute=UNLIMITED)
+        app.add_middleware(AuthMiddleware)
+    return app
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/v1/indicators/GDP",
+        "raw_path": b"/api/v1/indicators/GDP", "root_path": "", "query_string": b"country=USA",
+        "headers": [(b"host", b"localhost"), (b"x-api-key", b"bench-key"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 8000),
+    }
+
+
+async def drive(app, requests: int) -> float:
+    """Send ``requests`` GET requests through the ASGI app, return requests/sec"""
+    async def one():
+        delivered = False
+        disconnected = asyncio.get_running_loop().create_future()
+        status = None
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return await disconnected  # like a server: nothing until the client leaves
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(make_scope(), receive, send)
+        assert status == 200, status
+
+    for _ in range(200):  # warm up
+        await one()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await one()
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for stack in ("bare", "before", "after"):
+        app = build_app(stack)
+        results[stack] = max(asyncio.run(drive(app, args.requests)) for _ in range(args.repeat))
+    bare_latency = 1e6 / results["bare"]
+    for stack, rps in results.items():
+        overhead = 1e6 / rps - bare_latency
+        print(f"{stack:>7}: {rps:9.0f} req/s, {1e6 / rps:7.1f} us/request"
+              + (f" (middleware {overhead:6.1f} us)" if stack != "bare" else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: GCRA rate limiter vs. the per-client timestamp lists it replaced
+
+Replays a request stream spread over many distinct clients (10k by default)
+through the limiter state of RateLimitMiddleware and compares the cost per
+request and the memory held for client state:
+
+* baseline - a list of request timestamps per client, rebuilt on every request
+             under a global asyncio.Lock, with a sweep over every client once
+             more than 1000 are tracked (the previous middleware)
+* gcra     - api.middleware.rate_limit.GCRALimiter (one float per client in an
+             LRU map, no lock)
+
+Usage:
+    python -m benchmarks.bench_rate_limit [--clients 10000] [--requests 200000]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+
+from api.middleware.rate_limit import GCRALimiter
+
+LIMIT = 100
+WINDOW = 60.0
+
+
+class SlidingWindowLimiter:
+    """The previous middleware's bookkeeping, minus the HTTP plumbing"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.requests = defaultdict(list)
+        self.lock = asyncio.Lock()
+
+    async def check(self, client_id: str, now: float) -> bool:
+        async with self.lock:
+            self.requests[client_id] = [t for t in self.requests[client_id] if now - t < self.window]
+            if len(self.requests) > 1000:
+                stale = []
+                for cid, reqs in self.requests.items():
+                    valid = [t for t in reqs if now - t < self.window]
+                    if not valid:
+                        stale.append(cid)
+                    else:
+                        self.requests[cid] = valid
+                for cid in stale:
+                    del self.requests[cid]
+            if len(self.requests[client_id]) >= self.limit:
+                return False
+            self.requests[client_id].append(now)
+            return True
+
+    @property
+    def state(self):
+        return self.requests
+
+
+class GCRAAdapter:
+    def __init__(self, limit: int, window: float):
+        self.limiter = GCRALimiter(limit, window)
+
+    async def check(self, client_id: str, now: float) -> bool:
+        return self.limiter.check(client_id, now)[0]
+
+    @property
+    def state(self):
+        return self.limiter._tat
+
+
+def make_stream(clients: int, requests: int, rate: float, seed: int = 0):
+    """(client, timestamp) pairs; client popularity is Zipf-like, like real traffic"""
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(clients)]
+    ids = rng.choices([f"10.0.{i // 256}.{i % 256}" for i in range(clients)], weights, k=requests)
+    # Every client shows up at least once so the tracked set reaches `clients`
+    ids[:clients] = [f"10.0.{i // 256}.{i % 256}" for i in range(clients)]
+    return [(client, i / rate) for i, client in enumerate(ids)]
+
+
+async def replay(limiter, stream) -> tuple:
+    allowed = 0
+    started = time.perf_counter()
+    for client, now in stream:
+        allowed += await limiter.check(client, now)
+    return time.perf_counter() - started, allowed
+
+
+def state_size(state: dict) -> int:
+    """Bytes held by a client map: the dict, its keys and values (and list items)"""
+    size = sys.getsizeof(state)
+    for key, value in state.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(t) for t in value)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--baseline-requests", type=int, default=12000,
+                        help="requests replayed through the baseline (it is O(clients) per request)")
+    parser.add_argument("--rate", type=float, default=5000.0, help="aggregate requests per second")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, limit {LIMIT} per {WINDOW:.0f}s, {args.rate:.0f} req/s aggregate")
+    for name, factory, n in (
+        ("baseline", SlidingWindowLimiter, args.baseline_requests),
+        ("gcra", GCRAAdapter, args.requests),
+    ):
+        stream = make_stream(args.clients, max(n, args.clients), args.rate)
+        limiter = factory(LIMIT, WINDOW)
+        elapsed, allowed = asyncio.run(replay(limiter, stream))
+        memory = state_size(limiter.state)
+        print(f"{name:>10}: {elapsed / len(stream) * 1e6:8.2f} us/request over {len(stream)} requests, "
+              f"{allowed / len(stream):.1%} allowed, client state {memory / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
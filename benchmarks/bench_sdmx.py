@@ -0,0 +1,117 @@
+"""
+Benchmark: streaming SDMX-JSON parser vs. json.loads + dict walk
+
+Generates a synthetic multi-megabyte SDMX-JSON message (many countries x
+subjects x monthly periods) and compares wall time and peak traced memory of:
+
+* baseline  - json.loads of the whole body, then walking the nested
+              series/observation dicts into per-series lists of (date, value)
+* streaming - api.providers.sdmx.parse_sdmx_json (one series object at a
+              time via ijson, flat typed arrays, dimension indexes decoded once)
+
+Wall time is measured without tracing; peak memory in a separate traced run.
+
+Usage:
+    python -m benchmarks.bench_sdmx [--countries 40] [--subjects 6] [--periods 720]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from api.providers import sdmx
+from api.providers.sdmx import parse_sdmx_json, period_to_date
+
+
+def make_message(countries: int, subjects: int, periods: int, seed: int = 0) -> bytes:
+    """Build a synthetic SDMX-JSON 1.0 message with series-level keys"""
+    rng = random.Random(seed)
+    series = {}
+    for c in range(countries):
+        for s in range(subjects):
+            observations = {
+                str(t): [round(rng.gauss(100, 15), 4), 0]
+                for t in range(periods)
+                if rng.random() > 0.02
+            }
+            series[f"{c}:{s}:0"] = {"attributes": [0], "observations": observations}
+
+    structure = {
+        "name": "Synthetic dataflow",
+        "dimensions": {
+            "series": [
+                {"id": "LOCATION", "values": [{"id": f"C{c:02d}", "name": f"Country {c}"} for c in range(countries)]},
+                {"id": "SUBJECT", "values": [{"id": f"S{s}", "name": f"Subject {s}"} for s in range(subjects)]},
+                {"id": "MEASURE", "values": [{"id": "IDX", "name": "Index"}]},
+            ],
+            "observation": [
+                {"id": "TIME_PERIOD", "values": [
+                    {"id": f"{1960 + t // 12}-{t % 12 + 1:02d}", "name": ""} for t in range(periods)
+                ]}
+            ],
+        },
+    }
+    # Like OECD responses, the structure block follows the data
+    message = {"header": {"id": "bench"}, "dataSets": [{"action": "Information", "series": series}], "structure": structure}
+    return json.dumps(message).encode()
+
+
+def baseline(body: bytes):
+    """Whole-body decode and a Python walk over the nested dicts"""
+    message = json.loads(body)
+    structure = message["structure"]["dimensions"]
+    series_dims = structure["series"]
+    periods = structure["observation"][0]["values"]
+    result = []
+    for key, entry in message["dataSets"][0]["series"].items():
+        dims = {d["id"]: d["values"][int(i)]["id"] for d, i in zip(series_dims, key.split(":"))}
+        points = sorted(
+            (period_to_date(periods[int(t)]["id"]), obs[0])
+            for t, obs in entry["observations"].items()
+            if obs[0] is not None
+        )
+        result.append((dims, points))
+    return result
+
+
+def measure(fn, body: bytes):
+    started = time.perf_counter()
+    result = fn(body)
+    elapsed = time.perf_counter() - started
+    return result, elapsed
+
+
+def peak_memory(fn, body: bytes) -> int:
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--countries", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=6)
+    parser.add_argument("--periods", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    body = make_message(args.countries, args.subjects, args.periods)
+    print(f"Message: {len(body) / 1e6:.1f} MB, {args.countries * args.subjects} series, "
+          f"ijson backend: {sdmx.ijson.backend if sdmx.ijson else 'not installed (json fallback)'}")
+
+    for name, fn in (("baseline", baseline), ("streaming", parse_sdmx_json)):
+        timings = []
+        for _ in range(args.repeat):
+            result, elapsed = measure(fn, body)
+            timings.append(elapsed)
+        peak = peak_memory(fn, body)
+        observations = sum(len(r[1]) if isinstance(r, tuple) else len(r) for r in result)
+        print(f"{name:>10}: best {min(timings) * 1000:8.1f} ms, peak traced memory {peak / 1e6:7.1f} MB, "
+              f"{len(result)} series / {observations} observations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for the memory profiling admin endpoints
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.core.config import settings
+from api.main import app
+from api.utils.memory import StoreCensus, deep_sizeof, estimate_size, memory_profiler
+
+ADMIN_KEY = "admin-test-key"
+client = TestClient(app, headers={"X-API-Key": ADMIN_KEY})  # own rate limit budget
+
+retained = []
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEYS", [ADMIN_KEY])
+    yield
+    if memory_profiler.tracing:
+        memory_profiler.stop()
+    retained.clear()
+
+
+class TestStoreCensus:
+    """Test store size estimates"""
+
+    def test_deep_sizeof_counts_shared_objects_once(self):
+        shared = list(range(100))
+        assert deep_sizeof([shared, shared]) < deep_sizeof([shared, list(range(100))])
+
+    def test_sampled_estimate(self):
+        store = {f"key-{i}": [i + j / 10 for j in range(1, 11)] for i in range(2000)}
+        exact = deep_sizeof(store)
+        assert estimate_size(store, sample=50) == pytest.approx(exact, rel=0.1)
+
+        census = StoreCensus()
+        census.register("small", lambda: [1])
+        census.register("large", lambda: store)
+        sizes = census.census()
+        assert list(sizes) == ["large", "small"]
+        assert sizes["large"]["entries"] == 2000
+
+
+class TestMemoryEndpoints:
+    """Test gating, the census and snapshot diffs"""
+
+    def test_requires_admin_key(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_API_KEYS", [])
+        assert client.get("/admin/memory").status_code == 404
+        monkeypatch.setattr(settings, "ADMIN_API_KEYS", ["another-key"])
+        assert client.get("/admin/memory").status_code == 403
+
+    def test_overview(self, admin):
+        body = client.get("/admin/memory").json()
+        assert body["tracing"] is False
+        assert {"cache.results", "series_store.series", "rate_limit.default"} <= set(body["stores"])
+        assert body["peak_rss_bytes"] > 0
+
+    def test_snapshot_diff(self, admin):
+        first = client.post("/admin/memory/snapshots").json()
+        assert "diff" not in first
+        retained.extend(bytearray(1024) for _ in range(500))
+        second = client.post("/admin/memory/snapshots?limit=50").json()
+        assert second["compared_to"] == first["id"]
+        grown = [site for site in second["diff"] if "test_admin.py" in site["site"]]
+        assert grown and grown[0]["bytes_diff"] >= 500 * 1024
+
+        diff = client.get(f"/admin/memory/diff?base={first['id']}&target={second['id']}").json()
+        assert diff["diff"][0]["site"]
+        assert client.get("/admin/memory/diff?base=999&target=1000").status_code == 404
+
+        assert client.delete("/admin/memory/snapshots").json() == {"tracing": False}
+        assert not memory_profiler.tracing
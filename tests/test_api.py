@@ -1,9 +1,11 @@
 """
 Unit tests for API endpoints
 """
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from api.main import app
+from api.routers.analytics import _cross_correlation_profiles
 
 client = TestClient(app)
 
@@ -156,6 +158,37 @@ class TestAnalyticsEndpoints:
             }
         )
         assert response.status_code in [404, 500]
+    
+    def test_derived_invalid_expression(self):
+        """Test derived indicator with an invalid expression"""
+        response = client.get(
+            "/api/v1/analytics/derived",
+            params={"expr": "GDP +", "countries": "USA"}
+        )
+        assert response.status_code == 400
+    
+    def test_cross_correlation_invalid_pairs(self):
+        """Test cross-correlation with malformed pairs"""
+        response = client.post(
+            "/api/v1/analytics/cross-correlation",
+            json={"countries": ["USA"], "pairs": [["INFLATION"]]}
+        )
+        assert response.status_code == 422
+    
+    def test_cross_correlation_pairs_are_aligned_separately(self):
+        """Test that a short series only limits the pairs it is part of"""
+        dates = np.arange("2000-01", "2010-01", dtype="datetime64[M]").astype("datetime64[D]")
+        rng = np.random.default_rng(0)
+        series = {
+            "A": (dates, rng.normal(size=len(dates))),
+            "B": (dates, rng.normal(size=len(dates))),
+            "C": (dates[-2:], np.array([1.0, 2.0]))
+        }
+        result = _cross_correlation_profiles(series, [("A", "B"), ("A", "C")], max_lag=3)
+        long_pair, short_pair = result["pairs"]
+        assert long_pair["data_points"] == len(dates)
+        assert len(long_pair["correlations"]) == 7
+        assert short_pair["data_points"] == 2 and "error" in short_pair
 
 
 class TestRateLimiting:
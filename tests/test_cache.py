@@ -0,0 +1,159 @@
+"""
+Unit tests for caching utilities
+"""
+import time
+from datetime import date, datetime, timedelta, timezone
+import pytest
+
+from api.core.config import settings
+from api.core.resilience import CircuitBreaker
+from api.models.schemas import DataPoint, DataSource, EconomicIndicatorResponse, Frequency
+from api.providers.manager import ProviderManager
+from api.utils.cache import BloomFilter, CacheManager, NegativeCache, negative_cache, ttl_for_series
+from api.utils.series_store import series_store
+
+
+class TestSeriesTTL:
+    """Test frequency-aware series TTLs"""
+
+    def test_capped_by_frequency(self):
+        now = datetime.now()
+        assert ttl_for_series(Frequency.ANNUAL, now) == settings.CACHE_TTL_ANNUAL
+        assert ttl_for_series(Frequency.DAILY, now) == settings.CACHE_TTL_DAILY
+        assert ttl_for_series(Frequency.ANNUAL) > ttl_for_series(Frequency.MONTHLY) > ttl_for_series(Frequency.DAILY)
+        assert ttl_for_series(None) == settings.CACHE_TTL
+
+    def test_until_next_release(self):
+        now = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+        updated = now - timedelta(hours=22)  # next daily release in 2 hours
+        assert ttl_for_series(Frequency.DAILY, updated, now) == 2 * 3600
+
+    def test_overdue_release_is_polled(self):
+        now = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+        assert ttl_for_series(Frequency.MONTHLY, now - timedelta(days=35), now) == settings.CACHE_TTL_MIN
+        # More than a period overdue: irregular or discontinued
+        assert ttl_for_series(Frequency.MONTHLY, now - timedelta(days=90), now) == settings.CACHE_TTL_MONTHLY
+
+
+class TestCacheManager:
+    """Test the bounded cache"""
+
+    def test_max_entries_drops_least_recently_used(self):
+        cache = CacheManager(name="bounded", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "b" is now the least recently used
+        cache.set("c", 3)
+        assert list(cache.cache) == ["a", "c"]
+        cache.set("a", 4)
+        cache.set("d", 5)
+        assert list(cache.cache) == ["a", "d"]
+        assert cache.get("a") == 4
+
+
+class TestBloomFilter:
+    """Test Bloom filter membership"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"key-{i}")
+        assert all(f"key-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+class TestNegativeCache:
+    """Test negative cache expiry and Bloom front"""
+
+    def test_entries_expire(self):
+        cache = NegativeCache(ttl=1, capacity=100)
+        key = cache.make_key("GDP", "xyz", None, None)
+        assert not cache.contains(key)
+        cache.add(key)
+        assert cache.contains(key)
+        cache.entries[key]["expires_at"] = cache.entries[key]["expires_at"].min
+        assert not cache.contains(key)
+        assert cache.get_stats()["bloom_false_positives"] == 1
+
+    def test_rebuild_drops_expired_keys_from_filter(self):
+        cache = NegativeCache(ttl=0, capacity=100)
+        cache.add("A")
+        time.sleep(0.01)
+        cache.add("B")
+        assert "A" not in cache._bloom
+        assert "B" in cache._bloom
+
+    def test_capacity_drops_oldest_entries(self):
+        cache = NegativeCache(ttl=600, capacity=2)
+        for key in ("A", "B", "C"):
+            cache.add(key)
+        cache.add("B")  # re-added: now the newest
+        cache.add("D")
+        assert list(cache.entries) == ["B", "D"]
+        assert len(cache) == 2
+        assert not cache.contains("A") and not cache.contains("C")
+        assert cache.contains("B") and cache.contains("D")
+
+
+class FakeProvider:
+    def __init__(self, fail: bool = False, result: EconomicIndicatorResponse = None):
+        self.calls = 0
+        self.fail = fail
+        self.result = result
+        self.breaker = CircuitBreaker("fake", 100, 60)
+
+    async def get_indicator(self, *args, **kwargs):
+        self.calls += 1
+        if self.fail:
+            self.breaker.record_failure()
+        return self.result
+
+
+class TestManagerNegativeCaching:
+    """Test that only clean misses are cached"""
+
+    def setup_method(self):
+        negative_cache.clear()
+
+    def teardown_method(self):
+        negative_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_clean_miss_is_cached(self):
+        manager = ProviderManager()
+        provider = FakeProvider()
+        manager.providers = {DataSource.WORLD_BANK: provider}
+
+        assert await manager.get_indicator("GDP", "XYZ") is None
+        assert await manager.get_indicator("GDP", "XYZ") is None
+        assert await manager.get_indicator_bulk("GDP", ["XYZ"]) == {}
+        assert provider.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_failure_is_not_cached(self):
+        manager = ProviderManager()
+        provider = FakeProvider(fail=True)
+        manager.providers = {DataSource.WORLD_BANK: provider}
+
+        await manager.get_indicator("GDP", "XYZ")
+        await manager.get_indicator("GDP", "XYZ")
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_found_series_is_forgotten(self):
+        result = EconomicIndicatorResponse(
+            indicator_id="GDP", name="GDP", category="gdp", frequency="annual", source=DataSource.WORLD_BANK,
+            country_code="XYZ", country_name="XYZ", data=[DataPoint(date=date(2020, 1, 1), value=1.0)],
+            last_updated=datetime.now()
+        )
+        manager = ProviderManager()
+        manager.providers = {DataSource.WORLD_BANK: FakeProvider(result=result)}
+        # Recorded missing by a concurrent request while this one was in flight
+        key = manager._missing_key("GDP", "XYZ", None, None)
+        negative_cache.add(key)
+
+        assert await manager._get_from_sources("GDP", "XYZ", None, None, [DataSource.WORLD_BANK]) is result
+        assert not negative_cache.contains(key)
+        series_store.clear()
+
@@ -0,0 +1,68 @@
+"""
+Unit tests for derived indicator expressions
+"""
+import numpy as np
+import pytest
+
+from api.utils.cache import CacheManager
+from api.utils.expressions import DerivedExpression, ExpressionError
+
+
+def make_series(dates, values):
+    return np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=np.float64)
+
+
+class TestDerivedExpression:
+    """Test parsing and evaluation of derived indicator expressions"""
+
+    def test_indicators_are_collected_once(self):
+        expr = DerivedExpression("(INTEREST_RATE - INFLATION) / abs(INTEREST_RATE - INFLATION)")
+        assert expr.indicators == {"INTEREST_RATE", "INFLATION"}
+        # Shared sub-expression is a single DAG node
+        keys = [node.key for node in expr.topological_order()]
+        assert keys.count("(INTEREST_RATE - INFLATION)") == 1
+
+    def test_evaluate_aligns_on_common_dates(self):
+        expr = DerivedExpression("interest_rate - inflation")
+        inputs = {
+            "INTEREST_RATE": make_series(["2020-01-01", "2021-01-01", "2022-01-01"], [1.0, 2.0, 5.0]),
+            "INFLATION": make_series(["2021-01-01", "2022-01-01", "2023-01-01"], [3.0, 4.0, 6.0]),
+        }
+        dates, values = expr.evaluate(inputs)
+        assert [str(d) for d in dates] == ["2021-01-01", "2022-01-01"]
+        np.testing.assert_allclose(values, [-1.0, 1.0])
+
+    def test_constants_and_functions(self):
+        expr = DerivedExpression("pct_change(GDP) * 2")
+        dates, values = expr.evaluate({"GDP": make_series(["2020-01-01", "2021-01-01"], [100.0, 110.0])})
+        assert np.isnan(values[0])
+        assert values[1] == pytest.approx(20.0)
+
+    def test_intermediate_results_are_cached(self):
+        cache = CacheManager()
+        inputs = {
+            "GDP": make_series(["2020-01-01"], [10.0]),
+            "POPULATION": make_series(["2020-01-01"], [2.0]),
+        }
+        DerivedExpression("GDP / POPULATION").evaluate(inputs, cache=cache)
+        assert cache.get_stats()["active_entries"] == 1
+
+        # A different expression reuses the cached sub-expression
+        _, values = DerivedExpression("(GDP / POPULATION) + 1").evaluate(inputs, cache=cache)
+        assert values[0] == pytest.approx(6.0)
+        assert cache.get_stats()["active_entries"] == 2
+
+    @pytest.mark.parametrize("expression", [
+        "",
+        "GDP +",
+        "__import__('os')",
+        "GDP.value",
+        "log(GDP, 2)",
+        "1 + 2",
+        "GDP + diff(-1)",
+        "GDP * pct_change(2 * 3)",
+        "GDP if INFLATION else 0",
+    ])
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(ExpressionError):
+            DerivedExpression(expression)
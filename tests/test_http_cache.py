@@ -0,0 +1,92 @@
+"""
+Unit tests for HTTP conditional requests on data endpoints
+"""
+from datetime import date, datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+
+from api.core.quotas import ANONYMOUS_TIER
+from api.main import app
+from api.middleware.rate_limit import RateLimitMiddleware
+from api.models.schemas import (
+    DataPoint, DataSource, EconomicIndicatorResponse, Frequency, IndicatorCategory
+)
+from api.providers.manager import provider_manager
+
+client = TestClient(app)
+
+
+def make_response(values):
+    return EconomicIndicatorResponse(
+        indicator_id="GDP",
+        name="Gross Domestic Product",
+        category=IndicatorCategory.GDP,
+        frequency=Frequency.QUARTERLY,
+        source=DataSource.FRED,
+        country_code="USA",
+        country_name="United States",
+        data=[
+            DataPoint(date=date(2024, 1 + 3 * i, 1), value=value, unit="billion USD")
+            for i, value in enumerate(values)
+        ],
+        last_updated=datetime(2024, 5, 30, 12, 0, tzinfo=timezone.utc)
+    )
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serve canned GDP data instead of calling the providers"""
+    state = {"values": [27000.0, 27500.0], "calls": 0}
+
+    async def get_indicator(*args, **kwargs):
+        state["calls"] += 1
+        return make_response(state["values"])
+
+    monkeypatch.setattr(provider_manager, "get_indicator", get_indicator)
+    # The app's limiter is shared with the other test modules: rate limit these
+    # requests separately so they do not depend on how fast the suite runs
+    monkeypatch.setattr(RateLimitMiddleware, "identify", lambda self, scope: (ANONYMOUS_TIER, __name__))
+    return state
+
+
+class TestConditionalRequests:
+    """Test ETag / Last-Modified handling"""
+
+    def test_validators_and_cache_control(self, upstream):
+        response = client.get("/api/v1/indicators/GDP?country=USA")
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["last-modified"] == "Thu, 30 May 2024 12:00:00 GMT"
+        assert response.headers["cache-control"].startswith("public, max-age=")
+
+    def test_if_none_match_returns_304(self, upstream):
+        etag = client.get("/api/v1/indicators/GDP?country=USA").headers["etag"]
+
+        response = client.get("/api/v1/indicators/GDP?country=USA", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # Weak form (e.g. after nginx gzip) matches too
+        response = client.get("/api/v1/indicators/GDP?country=USA", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+
+    def test_changed_data_changes_etag(self, upstream):
+        etag = client.get("/api/v1/indicators/GDP?country=USA").headers["etag"]
+        upstream["values"] = [27000.0, 27600.0]  # revision
+
+        response = client.get("/api/v1/indicators/GDP?country=USA", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_if_modified_since(self, upstream):
+        url = "/api/v1/indicators/GDP?country=USA"
+        assert client.get(url, headers={"If-Modified-Since": "Thu, 30 May 2024 12:00:00 GMT"}).status_code == 304
+        assert client.get(url, headers={"If-Modified-Since": "Wed, 29 May 2024 12:00:00 GMT"}).status_code == 200
+
+    def test_summary_etag_ignores_request_time(self, upstream):
+        first = client.get("/api/v1/analytics/summary/USA")
+        assert first.status_code == 200
+
+        response = client.get("/api/v1/analytics/summary/USA", headers={"If-None-Match": first.headers["etag"]})
+        assert response.status_code == 304
@@ -0,0 +1,149 @@
+"""
+Unit tests for the background ingestion scheduler
+"""
+from datetime import date, datetime
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api import ingestion
+from api.core.config import settings
+from api.core.database import Base
+from api.ingestion import IngestionScheduler, parse_indicator_endpoint, persist_series, popular_series
+from api.models.database import APIRequestLog
+from api.models.schemas import DataPoint, DataSource, EconomicIndicatorResponse
+from api.providers.manager import ProviderManager
+from api.utils.cache import negative_cache
+from api.utils.series_store import series_store
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """In-memory database behind ``ingestion.SessionLocal``, shared with worker threads"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)
+    monkeypatch.setattr(ingestion, "SessionLocal", session)
+    return session
+
+
+class TestPopularity:
+    """Test mapping logged requests to series"""
+
+    def test_parse_indicator_endpoint(self):
+        assert parse_indicator_endpoint("/api/v1/indicators/gdp?country=usa") == ("GDP", "USA")
+        assert parse_indicator_endpoint(
+            "/api/v1/indicators/INFLATION?start_date=2020-01-01&country=DEU"
+        ) == ("INFLATION", "DEU")
+        assert parse_indicator_endpoint("/api/v1/indicators/compare") is None
+        assert parse_indicator_endpoint("/api/v1/indicators/GDP/cross-section") is None
+        assert parse_indicator_endpoint("/api/v1/countries/USA?country=USA") is None
+
+    def test_popular_series_counts_revalidated_requests(self, database):
+        db = database()
+        for status_code in (200, 304, 304):
+            db.add(APIRequestLog(endpoint="/api/v1/indicators/CPI?country=DEU", status_code=status_code))
+        for status_code in (200, 200, 500, 500):
+            db.add(APIRequestLog(endpoint="/api/v1/indicators/GDP?country=USA", status_code=status_code))
+        db.commit()
+        db.close()
+
+        assert popular_series(limit=5, window_hours=24) == [("CPI", "DEU"), ("GDP", "USA")]
+
+
+class FakeManager:
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    async def refresh_indicator(self, indicator_id, country_code):
+        self.calls.append((indicator_id, country_code))
+        return None if (indicator_id, country_code) in self.missing else object()
+
+
+class TestIngestionScheduler:
+    """Test scheduling with bounded concurrency"""
+
+    @pytest.mark.asyncio
+    async def test_due_series_are_refreshed_once_per_interval(self, monkeypatch):
+        manager = FakeManager(missing={("M2", "USA")})
+        scheduler = IngestionScheduler(manager=manager, concurrency=2, persist=False)
+        monkeypatch.setattr(scheduler, "targets", lambda: [("GDP", "USA"), ("M2", "USA")])
+        monkeypatch.setattr(scheduler, "_interval", lambda stored: 3600)
+
+        assert await scheduler.run_once() == 2
+        assert sorted(manager.calls) == [("GDP", "USA"), ("M2", "USA")]
+        assert scheduler.get_stats() == {"targets": 2, "queued": 2, "refreshed": 1, "failed": 1}
+
+        # Nothing is due again before the interval has passed
+        assert await scheduler.run_once() == 0
+
+    @pytest.mark.asyncio
+    async def test_readded_series_are_scheduled_once(self, monkeypatch):
+        manager = FakeManager()
+        scheduler = IngestionScheduler(manager=manager, persist=False)
+        targets = [("GDP", "USA"), ("M2", "USA")]
+        monkeypatch.setattr(scheduler, "targets", lambda: list(targets))
+        monkeypatch.setattr(scheduler, "_interval", lambda stored: 3600)
+        monkeypatch.setattr(settings, "INGESTION_TARGETS_REFRESH", 0)
+
+        assert await scheduler.run_once() == 2
+        targets.pop()
+        assert await scheduler.run_once() == 0
+        assert scheduler.get_stats()["queued"] == 1
+
+        # Re-added before its old heap entry came due: refreshed now, and
+        # only the new entry is kept
+        targets.append(("M2", "USA"))
+        assert await scheduler.run_once() == 1
+        assert scheduler.get_stats()["queued"] == 2
+
+        later = time.monotonic() + 7200
+        monkeypatch.setattr(ingestion.time, "monotonic", lambda: later)
+        manager.calls.clear()
+        assert await scheduler.run_once() == 2
+        assert sorted(manager.calls) == [("GDP", "USA"), ("M2", "USA")]
+
+
+class TestPersistedSeries:
+    """Test serving series refreshed by a standalone daemon"""
+
+    def setup_method(self):
+        series_store.clear()
+        negative_cache.clear()
+
+    def teardown_method(self):
+        series_store.clear()
+
+    @pytest.mark.asyncio
+    async def test_store_misses_read_persisted_series(self, database, monkeypatch):
+        monkeypatch.setattr(settings, "INGESTION_READ_PERSISTED", True)
+        response = EconomicIndicatorResponse(
+            indicator_id="NY.GDP.PCAP.CD", name="GDP per capita", category="gdp", frequency="annual",
+            source=DataSource.WORLD_BANK, country_code="BRA", country_name="Brazil",
+            data=[DataPoint(date=date(year, 1, 1), value=float(year - 2014)) for year in range(2015, 2024)],
+            last_updated=datetime.now()
+        )
+        # What the daemon process wrote (a full-history fetch); the API process has never seen it
+        persist_series([series_store.put("GDP_PER_CAPITA", response, covered_from=None)])
+        series_store.clear()
+
+        manager = ProviderManager()
+        calls = []
+
+        async def fetch_with_retry(url, params=None):
+            calls.append(url)
+            return None
+
+        manager.providers[DataSource.WORLD_BANK].fetch_with_retry = fetch_with_retry
+
+        result = await manager.get_indicator("GDP_PER_CAPITA", "BRA")
+        assert calls == []
+        assert [point.value for point in result.data] == [float(year - 2014) for year in range(2015, 2024)]
+
+        series_store.clear()
+        bulk = await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA"])
+        assert calls == []
+        assert len(bulk["BRA"].data) == 9
@@ -0,0 +1,121 @@
+"""
+Unit tests for event-loop lag monitoring and load shedding
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.middleware.load_shed import LoadSheddingMiddleware
+from api.utils.loop_monitor import LoopLagMonitor
+from api.utils.metrics import event_loop_blocked, event_loop_lag, load_shed_rejections
+
+
+def make_app(monitor: LoopLagMonitor, **limits) -> FastAPI:
+    test_app = FastAPI()
+
+    @test_app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @test_app.get("/api/v1/indicators/{indicator}")
+    async def indicator(indicator: str):
+        return {"indicator": indicator}
+
+    @test_app.get("/api/v1/analytics/summary/{country}")
+    async def summary(country: str):
+        return {"country": country}
+
+    test_app.add_middleware(
+        LoadSheddingMiddleware, monitor=monitor, low_priority_paths=["/api/v1/analytics"], **limits
+    )
+    return test_app
+
+
+class TestLoopLagMonitor:
+    """Test lag measurement and the decaying estimate"""
+
+    def test_observe_decays(self):
+        monitor = LoopLagMonitor()
+        monitor.observe(0.4)
+        monitor.observe(0.0)
+        assert monitor.lag == pytest.approx(0.2)
+        assert monitor.max_lag == pytest.approx(0.4)
+
+    @pytest.mark.asyncio
+    async def test_measures_blocked_loop(self):
+        monitor = LoopLagMonitor()
+        task = asyncio.create_task(monitor.run(interval=0.01))
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.02)
+        assert monitor.max_lag >= 0.08
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert monitor.lag == 0.0 and not monitor.running
+
+    @pytest.mark.asyncio
+    async def test_watchdog_logs_blocking_stack(self, caplog):
+        def crunch_numbers():
+            time.sleep(0.2)
+
+        monitor = LoopLagMonitor()
+        blocked_before = event_loop_blocked.value()
+        samples_before = event_loop_lag.labels().count
+        task = asyncio.create_task(monitor.run(interval=0.01, threshold=0.05))
+        await asyncio.sleep(0.03)
+        with caplog.at_level("WARNING", logger="api.utils.loop_monitor"):
+            crunch_numbers()
+            await asyncio.sleep(0.03)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert monitor.blocked == 1  # reported once per stall
+        assert event_loop_blocked.value() == blocked_before + 1
+        assert event_loop_lag.labels().count > samples_before
+        assert "in crunch_numbers" in monitor.get_stats()["last_blocked"]["location"]
+        assert "Event loop blocked" in caplog.text and "time.sleep(0.2)" in caplog.text
+
+
+class TestLoadShedding:
+    """Test admission by priority"""
+
+    def test_lag_sheds_low_priority_first(self):
+        monitor = LoopLagMonitor()
+        client = TestClient(make_app(monitor, lag_threshold=0.1, critical_lag=0.5, retry_after=7))
+        assert client.get("/api/v1/analytics/summary/USA").status_code == 200
+
+        before = load_shed_rejections.value("low", "lag")
+        monitor.observe(0.2)
+        response = client.get("/api/v1/analytics/summary/USA")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "7"
+        assert response.json()["error"] == "Service overloaded"
+        assert load_shed_rejections.value("low", "lag") == before + 1
+        assert client.get("/api/v1/indicators/GDP").status_code == 200
+
+        monitor.observe(1.0)
+        assert client.get("/api/v1/indicators/GDP").status_code == 503
+        assert client.get("/health").status_code == 200  # exempt
+
+    @pytest.mark.asyncio
+    async def test_in_flight_threshold(self):
+        release = asyncio.Event()
+        test_app = make_app(LoopLagMonitor(), in_flight_threshold=1, max_in_flight=0)
+
+        @test_app.get("/slow")
+        async def slow():
+            await release.wait()
+            return {}
+
+        transport = httpx.ASGITransport(app=test_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.05)
+            assert (await client.get("/api/v1/analytics/summary/USA")).status_code == 503
+            assert (await client.get("/api/v1/indicators/GDP")).status_code == 200  # no hard limit
+            release.set()
+            assert (await pending).status_code == 200
+            assert (await client.get("/api/v1/analytics/summary/USA")).status_code == 200
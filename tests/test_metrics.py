@@ -0,0 +1,87 @@
+"""
+Unit tests for the Prometheus metrics endpoint
+"""
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.providers.manager import provider_manager
+from api.utils.cache import CacheManager
+from api.utils.metrics import Counter, HistogramFamily, MetricsRegistry, cache_evictions, cache_requests
+
+client = TestClient(app, headers={"X-API-Key": "metrics-test"})  # own rate limit budget
+
+
+def sample(text: str, line_prefix: str) -> float:
+    """Value of the first exposition line starting with ``line_prefix``"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in metrics")
+
+
+class TestRegistry:
+    """Test the text exposition format"""
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+        latency = registry.register(HistogramFamily("latency_seconds", "Latency", ("route",), bounds=(0.1, 1.0)))
+        requests.inc('/a"b')
+        requests.inc('/a"b')
+        latency.labels("/a").observe(0.05)
+        latency.labels("/a").observe(0.5)
+        latency.labels("/a").observe(5.0)
+
+        @registry.collector
+        def sizes():
+            yield "entries", "gauge", "Entries", [({"cache": "x"}, 3)]
+
+        lines = registry.render().splitlines()
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/a\\"b"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+        assert 'latency_seconds_count{route="/a"} 3' in lines
+        assert 'entries{cache="x"} 3' in lines
+
+    def test_cache_counters(self):
+        cache = CacheManager(name="test")
+        cache.set("key", 1, ttl=-1)
+        cache.get("key")  # expired: evicted and a miss
+        cache.set("key", 1)
+        cache.get("key")
+        assert cache_requests.value("test", "hit") == 1
+        assert cache_requests.value("test", "miss") == 1
+        assert cache_evictions.value("test") == 1
+
+
+class TestMetricsEndpoint:
+    """Test /metrics on the application"""
+
+    def test_exposition(self):
+        client.get("/api/v1/sources")
+        client.get("/api/v1/no-such-route")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        text = response.text
+        assert sample(text, 'http_requests_total{method="GET",route="/api/v1/sources",status="200"}') >= 1
+        assert sample(text, 'http_requests_total{method="GET",route="<unmatched>",status="404"}') >= 1
+        assert sample(text, 'http_request_duration_seconds_count{method="GET",route="/api/v1/sources"}') >= 1
+        assert sample(text, "http_requests_in_flight") == 1  # the scrape itself
+        assert 'circuit_breaker_state{provider="FRED",state="closed"}' in text
+        assert "# TYPE series_store_series gauge" in text
+
+    def test_route_templates_bound_labels(self, monkeypatch):
+        async def get_indicator(*args, **kwargs):
+            return None
+
+        monkeypatch.setattr(provider_manager, "get_indicator", get_indicator)
+        client.get("/api/v1/indicators/GDP?country=USA")
+        client.get("/api/v1/indicators/CPI?country=USA")
+        text = client.get("/metrics").text
+        assert 'http_requests_total{method="GET",route="/api/v1/indicators/{indicator}",status=' in text
+        assert 'route="/api/v1/indicators/GDP"' not in text
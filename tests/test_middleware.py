@@ -0,0 +1,126 @@
+"""
+Unit tests for the ASGI middleware stack
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import StreamingResponse
+
+from api.core.config import settings
+from api.core.quotas import hash_api_key
+from api.middleware.auth import AuthMiddleware
+from api.middleware.rate_limit import RateLimitMiddleware
+from api.middleware.request_log import RequestLogMiddleware
+from api.middleware.security import SecurityHeadersMiddleware
+from api.utils.request_log import RequestLogBuffer
+
+
+def make_client(requests_per_minute: int = 100) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/data")
+    async def data():
+        return {"value": 1}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=requests_per_minute)
+    app.add_middleware(AuthMiddleware)
+    return TestClient(app)
+
+
+class TestMiddlewareStack:
+    """Test headers, auth and rate limiting as raw ASGI middleware"""
+
+    def test_headers_added(self):
+        response = make_client().get("/data", headers={"X-API-Key": "key"})
+        assert response.status_code == 200
+        assert response.headers["x-frame-options"] == "DENY"
+        assert response.headers["content-security-policy"] == "default-src 'self'"
+        assert response.headers["x-ratelimit-limit"] == "100"
+        assert response.headers["x-ratelimit-remaining"] == "99"
+
+    def test_streaming_response_passes_through(self):
+        response = make_client().get("/stream", headers={"X-API-Key": "key"})
+        assert response.text == "chunk0;chunk1;chunk2;"
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert "x-ratelimit-remaining" in response.headers
+
+    def test_auth(self, monkeypatch):
+        monkeypatch.setattr(settings, "API_KEYS", ["good"])
+        client = make_client()
+        assert client.get("/data").status_code == 401
+        assert client.get("/data", headers={"X-API-Key": "bad"}).status_code == 403
+        assert client.get("/data", headers={"X-API-Key": "good"}).status_code == 200
+        # Public endpoints only, not every path under "/"
+        assert client.get("/docs").status_code == 200
+
+    def test_rate_limit_exceeded(self):
+        client = make_client(requests_per_minute=2)
+        statuses = [client.get("/data", headers={"X-API-Key": "key"}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        response = client.get("/data", headers={"X-API-Key": "key"})
+        assert int(response.headers["retry-after"]) > 0
+        # Other clients are unaffected
+        assert client.get("/data", headers={"X-API-Key": "other"}).status_code == 200
+
+    def test_tiers_and_route_costs(self, monkeypatch):
+        monkeypatch.setattr(settings, "API_KEYS", ["basic-key"])
+        monkeypatch.setattr(settings, "API_KEY_TIERS", {"pro-key": "pro"})
+        monkeypatch.setattr(settings, "RATE_LIMIT_TIERS", {"pro": {"requests": 50, "daily_quota": 7}})
+        monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_COSTS", {"/data": 3, "/stream": 0})
+        client = make_client(requests_per_minute=5)
+
+        response = client.get("/data", headers={"X-API-Key": "basic-key"})
+        assert response.headers["x-ratelimit-limit"] == "5"
+        assert response.headers["x-ratelimit-remaining"] == "2"
+        assert "x-quota-remaining" not in response.headers
+        assert client.get("/data", headers={"X-API-Key": "basic-key"}).status_code == 429
+
+        pro = [client.get("/data", headers={"X-API-Key": "pro-key"}) for _ in range(3)]
+        assert [r.status_code for r in pro] == [200, 200, 429]
+        assert pro[0].headers["x-ratelimit-limit"] == "50"
+        assert pro[1].headers["x-quota-remaining"] == "1"
+        assert pro[2].json()["error"] == "Daily quota exceeded"
+
+        # Zero-cost routes are not limited
+        response = client.get("/stream", headers={"X-API-Key": "pro-key"})
+        assert response.status_code == 200
+        assert "x-ratelimit-remaining" not in response.headers
+
+    def test_limiter_is_keyed_by_key_digest(self):
+        limiter = RateLimitMiddleware(app=None)
+        scope = {"type": "http", "headers": [(b"x-api-key", b"limiter-secret-key")], "client": ("10.0.0.1", 1)}
+        assert limiter.identify(scope) == ("default", hash_api_key("limiter-secret-key"))
+        assert limiter.identify({"type": "http", "headers": [], "client": ("10.0.0.1", 1)}) == ("anonymous", "10.0.0.1")
+
+    def test_cost_above_tier_limit(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_COSTS", {"/data": 10})
+        client = make_client(requests_per_minute=5)
+        response = client.get("/data", headers={"X-API-Key": "cost-key"})
+        assert response.status_code == 403
+        assert response.json()["error"] == "Request cost exceeds tier limit"
+        assert "retry-after" not in response.headers
+
+    def test_request_log_stores_no_raw_key(self):
+        app = FastAPI()
+
+        @app.get("/data")
+        async def data():
+            return {"value": 1}
+
+        buffer = RequestLogBuffer()
+        app.add_middleware(RequestLogMiddleware, buffer=buffer)
+        client = TestClient(app)
+        client.get("/data", headers={"X-API-Key": "live-secret-key"})
+        client.get("/data")
+
+        keyed, anonymous = buffer._rows
+        assert keyed["api_key"] == "sha256:" + hash_api_key("live-secret-key")
+        assert anonymous["api_key"] is None
+        assert not any("live-secret-key" in str(value) for row in buffer._rows for value in row.values())
@@ -0,0 +1,74 @@
+"""
+Unit tests for on-demand request profiling
+"""
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.core.quotas import hash_api_key
+from api.middleware.profiling import ProfilingMiddleware
+from api.utils.profiler import SamplingProfiler
+
+ADMIN_KEY = "admin-test"
+
+
+def frame_names(profile: dict) -> set:
+    frames = profile["shared"]["frames"]
+    return {frames[index]["name"] for sample in profile["profiles"][0]["samples"] for index in sample}
+
+
+@pytest.fixture
+def client(tmp_path):
+    test_app = FastAPI()
+
+    @test_app.get("/work")
+    async def work():
+        crunch_numbers()
+        return {"done": True}
+
+    def crunch_numbers():
+        time.sleep(0.05)
+
+    test_app.add_middleware(
+        ProfilingMiddleware, admin_keys=[f"sha256:{hash_api_key(ADMIN_KEY)}"], directory=str(tmp_path)
+    )
+    return TestClient(test_app)
+
+
+class TestProfiling:
+    """Test triggering, gating and the speedscope output"""
+
+    def test_not_triggered(self, client, tmp_path):
+        response = client.get("/work", headers={"X-API-Key": ADMIN_KEY})
+        assert response.json() == {"done": True}
+        assert "x-profile-id" not in response.headers
+
+        # Flags from non-admin keys are ignored
+        response = client.get("/work?profile=1", headers={"X-API-Key": "someone-else"})
+        assert "x-profile-id" not in response.headers
+        assert not list(tmp_path.iterdir())
+
+    def test_stored_profile(self, client, tmp_path):
+        response = client.get("/work", headers={"X-API-Key": ADMIN_KEY, "X-Profile": "1"})
+        assert response.json() == {"done": True}
+        path = tmp_path / f"{response.headers['x-profile-id']}.speedscope.json"
+        profile = json.loads(path.read_text())
+        assert profile["profiles"][0]["type"] == "sampled"
+        assert len(profile["profiles"][0]["samples"]) == len(profile["profiles"][0]["weights"])
+        assert "crunch_numbers" in frame_names(profile)
+
+    def test_returned_profile(self, client):
+        response = client.get("/work?profile=return", headers={"X-API-Key": ADMIN_KEY})
+        assert response.headers["x-profiled-status"] == "200"
+        profile = response.json()
+        assert profile["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+        assert profile["name"] == "GET /work (200)"
+        assert "crunch_numbers" in frame_names(profile)
+
+    def test_stop_without_start(self):
+        profiler = SamplingProfiler()
+        profiler.stop()
+        assert profiler.duration == 0.0
+        assert profiler.samples == []
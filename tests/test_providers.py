@@ -0,0 +1,460 @@
+"""
+Unit tests for data providers (upstream HTTP calls are replaced by canned responses)
+"""
+import json
+from datetime import date
+import pytest
+
+from api.providers import base
+from api.providers.fred import FREDProvider
+from api.providers.oecd import OECDProvider
+from api.providers.sdmx import parse_sdmx_json, parse_sdmx_json_stream, period_to_date
+from api.providers.world_bank import WorldBankProvider
+from api.models.schemas import DataSource, Frequency
+from api.providers.manager import ProviderManager
+from api.utils.cache import negative_cache
+from api.utils.metrics import stage_latency
+from api.utils.series_store import series_store
+
+
+class FakeStream:
+    """Async byte stream handing out a body in small chunks"""
+
+    def __init__(self, body: bytes, chunk_size: int = 64):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def read(self, n: int = -1) -> bytes:
+        size = self.chunk_size if n < 0 else min(n, self.chunk_size)
+        chunk, self.body = self.body[:size], self.body[size:]
+        return chunk
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.content = FakeStream(body)
+
+
+class FakeUpstream:
+    """Records requested URLs and answers from a handler"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    async def __call__(self, url, params=None, headers=None, max_retries=None, reader=None):
+        self.calls.append((url, dict(params or {})))
+        result = self.handler(url, params or {})
+        if reader is not None:
+            return await reader(FakeResponse(result))
+        return result
+
+
+def sdmx_message(structure_last: bool = True) -> bytes:
+    """Two-series SDMX-JSON message with a missing value and unsorted periods"""
+    data = {"dataSets": [{"series": {
+        "0:0": {"observations": {"2": [3.5], "0": [1.5], "1": [None]}},
+        "0:1": {"observations": {"0": [10.0], "1": [11.0]}},
+    }}]}
+    structure = {"structure": {"dimensions": {
+        "series": [
+            {"id": "LOCATION", "values": [{"id": "USA", "name": "United States"}]},
+            {"id": "MEASURE", "values": [{"id": "AGRWTH", "name": "Annual growth rate (%)"},
+                                         {"id": "IDX2015", "name": "2015=100"}]},
+        ],
+        "observation": [
+            {"id": "TIME_PERIOD", "values": [{"id": "2020-Q1"}, {"id": "2020-Q2"}, {"id": "2020-Q3"}]},
+        ],
+    }}}
+    parts = [data, structure] if structure_last else [structure, data]
+    return json.dumps({k: v for part in parts for k, v in part.items()}).encode()
+
+
+class TestSDMXParser:
+    """Test SDMX-JSON decoding"""
+
+    def test_period_to_date(self):
+        assert period_to_date("2021") == date(2021, 1, 1)
+        assert period_to_date("2021-Q3") == date(2021, 7, 1)
+        assert period_to_date("2021-M04") == date(2021, 4, 1)
+        assert period_to_date("2021-S2") == date(2021, 7, 1)
+        assert period_to_date("2021-03-15") == date(2021, 3, 15)
+        assert period_to_date("bogus") is None
+
+    @pytest.mark.parametrize("structure_last", [True, False])
+    def test_bytes_and_decoded_messages_agree(self, structure_last):
+        body = sdmx_message(structure_last)
+        for message in (body, json.loads(body)):
+            growth, index = parse_sdmx_json(message)
+            assert growth.dimensions == {"LOCATION": "USA", "MEASURE": "AGRWTH"}
+            assert growth.dates.tolist() == [date(2020, 1, 1), date(2020, 7, 1)]
+            assert growth.values.tolist() == [1.5, 3.5]
+            assert index.dimension_names["MEASURE"] == "2015=100"
+            assert len(index) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("structure_last", [True, False])
+    async def test_streamed_and_decoded_messages_agree(self, structure_last):
+        body = sdmx_message(structure_last)
+        streamed = await parse_sdmx_json_stream(FakeStream(body))
+        decoded = parse_sdmx_json(json.loads(body))
+        assert [series.dimensions for series in streamed] == [series.dimensions for series in decoded]
+        for a, b in zip(streamed, decoded):
+            assert a.dates.tolist() == b.dates.tolist()
+            assert a.values.tolist() == b.values.tolist()
+
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("structure_key", ["structure", "structures"])
+    async def test_messages_wrapped_in_data(self, structure_key):
+        message = json.loads(sdmx_message())
+        if structure_key == "structures":
+            message["structures"] = [message.pop("structure")]
+        body = json.dumps({"meta": {"id": "IREF000001"}, "data": message}).encode()
+
+        for parsed in (
+            parse_sdmx_json(body),
+            parse_sdmx_json(json.loads(body)),
+            await parse_sdmx_json_stream(FakeStream(body)),
+        ):
+            growth, index = parsed
+            assert growth.dimensions == {"LOCATION": "USA", "MEASURE": "AGRWTH"}
+            assert growth.values.tolist() == [1.5, 3.5]
+            assert len(index) == 2
+
+
+class TestOECDProvider:
+    """Test the OECD provider and streamed SDMX-JSON fetching"""
+
+    @pytest.mark.asyncio
+    async def test_get_indicator_needs_dataset_configuration(self):
+        provider = OECDProvider()
+        provider.fetch_with_retry = FakeUpstream(lambda url, params: sdmx_message())
+
+        assert await provider.get_indicator("INFLATION", "USA") is None
+        assert provider.fetch_with_retry.calls == []
+
+    @pytest.mark.asyncio
+    async def test_unparseable_payload_is_not_retried(self, monkeypatch):
+        calls = []
+
+        class Response:
+            status = 200
+            headers = {}
+            content = FakeStream(b'{"dataSets": [{"series": ')
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        class Session:
+            def __init__(self, **kwargs):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def get(self, url, params=None, headers=None):
+                calls.append(url)
+                return Response()
+
+        monkeypatch.setattr(base.aiohttp, "ClientSession", Session)
+        provider = OECDProvider()
+        provider.breaker.reset()
+        payload = await provider.fetch_with_retry(
+            provider.base_url, reader=lambda response: parse_sdmx_json_stream(response.content)
+        )
+        assert payload is None
+        assert len(calls) == 1  # MAX_RETRIES > 1, but a bad payload is not retried
+        assert provider.breaker.get_stats()["consecutive_failures"] == 0
+
+
+class TestWorldBankProvider:
+    """Test World Bank bulk fetching"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_fetch_splits_countries_and_pages(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "Inflation, consumer prices (annual %)"}]]
+            if params.get("page", 1) == 1:
+                return [{"pages": 2}, [
+                    {"countryiso3code": "BRA", "country": {"value": "Brazil"}, "date": "2023", "value": 4.6},
+                    {"countryiso3code": "BRA", "country": {"value": "Brazil"}, "date": "2022", "value": 9.3},
+                ]]
+            return [{"pages": 2}, [
+                {"countryiso3code": "IND", "country": {"value": "India"}, "date": "2023", "value": 5.6},
+            ]]
+
+        provider = WorldBankProvider()
+        provider.fetch_with_retry = FakeUpstream(handler)
+
+        result = await provider.get_indicator_bulk("INFLATION", ["BRA", "IND"])
+        assert set(result) == {"BRA", "IND"}
+        assert [dp.value for dp in result["BRA"].data] == [9.3, 4.6]
+        assert result["IND"].country_name == "India"
+
+        urls = [url for url, _ in provider.fetch_with_retry.calls]
+        assert urls.count(f"{provider.base_url}/country/BRA;IND/indicator/FP.CPI.TOTL.ZG") == 2
+
+        # Indicator metadata is cached between calls
+        await provider.get_indicator_bulk("INFLATION", ["BRA", "IND"])
+        metadata_calls = [url for url, _ in provider.fetch_with_retry.calls if "/country/" not in url]
+        assert len(metadata_calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_country_is_not_substituted(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "Inflation, consumer prices (annual %)"}]]
+            # Rows of an aggregate or without an ISO3 code, never the requested country
+            return [{"pages": 1}, [
+                {"countryiso3code": "", "country": {"id": "BR", "value": "Brazil"}, "date": "2023", "value": 4.6},
+                {"countryiso3code": "ARG", "country": {"id": "AR", "value": "Argentina"},
+                 "date": "2023", "value": 133.5},
+            ]]
+
+        provider = WorldBankProvider()
+        provider.fetch_with_retry = FakeUpstream(handler)
+
+        assert await provider.get_indicator("INFLATION", "BRA") is None
+        assert set(await provider.get_indicator_bulk("INFLATION", ["BRA", "ARG"])) == {"ARG"}
+
+    @pytest.mark.asyncio
+    async def test_cross_section_drops_aggregates(self):
+        country_list = {"available": False}
+
+        def handler(url, params):
+            if url.endswith("/country"):
+                if not country_list["available"]:
+                    return None
+                return [{"pages": 1}, [
+                    {"id": "BRA", "name": "Brazil", "region": {"id": "LCN", "value": "Latin America & Caribbean"}},
+                    {"id": "WLD", "name": "World", "region": {"id": "NA", "value": "Aggregates"}},
+                ]]
+            if "/country/" not in url:
+                return [{}, [{"name": "Inflation, consumer prices (annual %)"}]]
+            return [{"pages": 1}, [
+                {"countryiso3code": "WLD", "country": {"id": "1W", "value": "World"}, "date": "2023", "value": 5.8},
+                {"countryiso3code": "BRA", "country": {"id": "BR", "value": "Brazil"}, "date": "2023", "value": 4.6},
+            ]]
+
+        provider = WorldBankProvider()
+        provider.fetch_with_retry = FakeUpstream(handler)
+
+        # Without the country list the panel is skipped, and the list is not
+        # requested again on every cross-section
+        assert await provider.get_cross_section("INFLATION") == {}
+        assert await provider.get_cross_section("INFLATION") == {}
+        assert [url for url, _ in provider.fetch_with_retry.calls] == [f"{provider.base_url}/country"]
+
+        country_list["available"] = True
+        provider._country_codes_failed_at = None
+        assert set(await provider.get_cross_section("INFLATION")) == {"BRA"}
+
+
+class TestBulkFetch:
+    """Test the manager's bulk path"""
+
+    def setup_method(self):
+        series_store.clear()
+        negative_cache.clear()
+
+    def teardown_method(self):
+        series_store.clear()
+        negative_cache.clear()
+
+    @staticmethod
+    def manager_with(handler) -> ProviderManager:
+        manager = ProviderManager()
+        world_bank = manager.providers[DataSource.WORLD_BANK]
+        world_bank.fetch_with_retry = FakeUpstream(handler)
+        world_bank.breaker.reset()
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_fresh_stored_series_are_not_refetched(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            codes = url.split("/country/")[1].split("/")[0].split(";")
+            return [{"pages": 1}, [{"countryiso3code": code, "date": "2023", "value": 1.0} for code in codes]]
+
+        manager = self.manager_with(handler)
+        upstream = manager.providers[DataSource.WORLD_BANK].fetch_with_retry
+        first = await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA"])
+        assert set(first) == {"BRA"}
+
+        second = await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA", "IND"])
+        assert set(second) == {"BRA", "IND"}
+        data_urls = [url for url, _ in upstream.calls if "/country/" in url]
+        assert [url.split("/")[-3] for url in data_urls] == ["BRA", "IND"]
+
+    @pytest.mark.asyncio
+    async def test_bounded_bulk_fetch_is_not_served_for_open_ended_requests(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            first, last = (int(year) for year in params["date"].split(":"))
+            return [{"pages": 1}, [
+                {"countryiso3code": "BRA", "date": str(year), "value": float(year)}
+                for year in range(first, min(last, 2023) + 1)
+            ]]
+
+        manager = self.manager_with(handler)
+        upstream = manager.providers[DataSource.WORLD_BANK].fetch_with_retry
+        old = await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA"], date(2000, 1, 1), date(2005, 12, 31))
+        assert len(old["BRA"].data) == 6
+
+        calls = len(upstream.calls)
+        recent = await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA"], date(2020, 10, 1))
+        assert len(upstream.calls) > calls
+        assert [dp.value for dp in recent["BRA"].data][-3:] == [2021.0, 2022.0, 2023.0]
+
+    @pytest.mark.asyncio
+    async def test_outcomes_feed_the_source_router(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            codes = url.split("/country/")[1].split("/")[0].split(";")
+            return [{"pages": 1}, [
+                {"countryiso3code": code, "date": "2023", "value": 1.0} for code in codes if code != "IND"
+            ]]
+
+        manager = self.manager_with(handler)
+        await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA", "IND"])
+        stats = manager.router._series
+        assert stats[(DataSource.WORLD_BANK, "GDP_PER_CAPITA", "BRA")].success_rate == 1.0
+        assert stats[(DataSource.WORLD_BANK, "GDP_PER_CAPITA", "IND")].success_rate == 0.0
+
+        await manager.get_indicator(
+            "GDP_PER_CAPITA", "ARG", end_date=date(2023, 12, 31), preferred_source=DataSource.WORLD_BANK
+        )
+        assert stats[(DataSource.WORLD_BANK, "GDP_PER_CAPITA", "ARG")].samples == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_call_is_timed(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            return [{"pages": 1}, [{"countryiso3code": "BRA", "date": "2023", "value": 1.0}]]
+
+        manager = self.manager_with(handler)
+        before = {stage: stage_latency.labels(stage).count for stage in ("provider.world_bank", "cache")}
+        await manager.get_indicator_bulk("GDP_PER_CAPITA", ["BRA"])
+        assert stage_latency.labels("provider.world_bank").count == before["provider.world_bank"] + 1
+        assert stage_latency.labels("cache").count > before["cache"]
+
+    @pytest.mark.asyncio
+    async def test_preferred_source_must_serve_the_series(self):
+        manager = self.manager_with(lambda url, params: [{"pages": 1}, []])
+
+        # World Bank does not carry policy rates
+        result = await manager.get_indicator_bulk(
+            "INTEREST_RATE", ["BRA"], preferred_source=DataSource.WORLD_BANK
+        )
+        assert result == {}
+        assert manager.providers[DataSource.WORLD_BANK].fetch_with_retry.calls == []
+
+
+class TestFREDProvider:
+    """Test FRED fetching"""
+
+    @pytest.mark.asyncio
+    async def test_series_info_is_cached(self):
+        def handler(url, params):
+            if url.endswith("/series"):
+                return {"seriess": [{"title": "Unemployment Rate", "units": "Percent", "frequency": "Monthly",
+                                     "last_updated": "2024-03-08T07:44:02"}]}
+            return {"observations": [{"date": "2024-01-01", "value": "3.7"}, {"date": "2024-02-01", "value": "."}]}
+
+        provider = FREDProvider(api_key="test")
+        provider.fetch_with_retry = FakeUpstream(handler)
+
+        first = await provider.get_indicator("UNEMPLOYMENT", "USA")
+        second = await provider.get_indicator("UNEMPLOYMENT", "USA")
+        assert first.name == second.name == "Unemployment Rate"
+        assert [dp.value for dp in first.data] == [3.7]
+
+        series_calls = [url for url, _ in provider.fetch_with_retry.calls if url.endswith("/series")]
+        assert len(series_calls) == 1
+
+
+class TestDeltaSync:
+    """Test incremental refresh of stored series"""
+
+    def setup_method(self):
+        series_store.clear()
+        negative_cache.clear()
+
+    def teardown_method(self):
+        series_store.clear()
+
+    @pytest.mark.asyncio
+    async def test_refresh_fetches_overlap_and_detects_revisions(self):
+        calls = []
+
+        def handler(url, params):
+            calls.append(params.get("date"))
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            if params.get("date"):
+                return [{"pages": 1}, [
+                    {"countryiso3code": "BRA", "date": "2023", "value": 9.5},
+                    {"countryiso3code": "BRA", "date": "2024", "value": 10.0},
+                ]]
+            return [{"pages": 1}, [
+                {"countryiso3code": "BRA", "date": str(year), "value": float(year - 2014)}
+                for year in range(2015, 2024)
+            ]]
+
+        manager = ProviderManager()
+        world_bank = manager.providers[DataSource.WORLD_BANK]
+        world_bank.fetch_with_retry = FakeUpstream(handler)
+        world_bank.breaker.reset()  # shared with earlier tests that hit the real upstream
+
+        first = await manager.get_indicator("GDP_PER_CAPITA", "BRA")
+        assert len(first.data) == 9
+
+        # Annual data stays fresh for days: served without going upstream
+        fetches = len(calls)
+        cached = await manager.get_indicator("GDP_PER_CAPITA", "BRA")
+        assert len(calls) == fetches
+        assert len(cached.data) == 9
+
+        stored = series_store.get("GDP_PER_CAPITA", "BRA", DataSource.WORLD_BANK)
+        stored.updated_at -= stored.ttl  # expire it
+        second = await manager.get_indicator("GDP_PER_CAPITA", "BRA")
+        delta_range = [c for c in calls if c][-1]
+        assert delta_range.startswith("2019:") or delta_range.startswith("2020:")
+        assert [dp.value for dp in second.data[-2:]] == [9.5, 10.0]
+        assert len(second.data) == 10
+
+        stored = series_store.get("GDP_PER_CAPITA", "BRA", DataSource.WORLD_BANK)
+        assert stored.revised_dates.tolist() == [date(2023, 1, 1)]
+
+    @pytest.mark.asyncio
+    async def test_bounded_fetch_is_not_served_for_open_ended_requests(self):
+        def handler(url, params):
+            if "/country/" not in url:
+                return [{}, [{"name": "GDP per capita"}]]
+            first, last = (int(year) for year in params["date"].split(":"))
+            return [{"pages": 1}, [
+                {"countryiso3code": "BRA", "date": str(year), "value": float(year)}
+                for year in range(first, min(last, 2023) + 1)
+            ]]
+
+        manager = ProviderManager()
+        world_bank = manager.providers[DataSource.WORLD_BANK]
+        world_bank.fetch_with_retry = FakeUpstream(handler)
+        world_bank.breaker.reset()
+
+        old = await manager.get_indicator("GDP_PER_CAPITA", "BRA", date(2000, 1, 1), date(2005, 12, 31))
+        assert len(old.data) == 6
+        recent = await manager.get_indicator("GDP_PER_CAPITA", "BRA", date(2020, 10, 1))
+        assert [dp.value for dp in recent.data][-3:] == [2021.0, 2022.0, 2023.0]
@@ -0,0 +1,166 @@
+"""
+Unit tests for the GCRA rate limiter
+"""
+import pytest
+
+from api.core.config import settings
+from api.core.quotas import APIKeyRegistry, DailyQuota, RouteCosts, Tier, admin_keys, hash_api_key
+from api.middleware.rate_limit import GCRALimiter, QuotaLimiter, RedisGCRALimiter
+
+
+def make_limiter(requests: int, daily_quota: int = 0) -> QuotaLimiter:
+    return QuotaLimiter({"default": Tier("default", requests, daily_quota)}, window=60)
+
+
+class UnreachableRedis:
+    """Redis client whose scripts fail like a refused connection"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.calls += 1
+            raise ConnectionError("Connection refused")
+        return run
+
+
+class TestGCRALimiter:
+    """Test burst, refill and client eviction"""
+
+    def test_burst_then_reject(self):
+        limiter = GCRALimiter(limit=10, window=60)
+        results = [limiter.check("client", now=0.0) for _ in range(11)]
+        assert all(allowed for allowed, _, _ in results[:10])
+        assert [remaining for _, remaining, _ in results[:10]] == list(range(9, -1, -1))
+
+        allowed, remaining, retry_after = results[10]
+        assert not allowed and remaining == 0
+        assert abs(retry_after - 6.0) < 1e-6  # one emission interval
+
+    def test_quota_refills_at_steady_rate(self):
+        limiter = GCRALimiter(limit=10, window=60)
+        for _ in range(10):
+            limiter.check("client", now=0.0)
+        assert not limiter.check("client", now=5.9)[0]
+        assert limiter.check("client", now=6.0)[0]
+        # A full window later the whole burst is available again
+        assert limiter.check("client", now=66.0)[1] == 9
+
+    def test_clients_are_independent(self):
+        limiter = GCRALimiter(limit=1, window=60)
+        assert limiter.check("a", now=0.0)[0]
+        assert not limiter.check("a", now=0.0)[0]
+        assert limiter.check("b", now=0.0)[0]
+
+    def test_least_recently_seen_client_is_evicted(self):
+        limiter = GCRALimiter(limit=5, window=60, max_clients=3)
+        for client in ("a", "b", "c"):
+            limiter.check(client, now=0.0)
+        limiter.check("a", now=1.0)
+        limiter.check("d", now=2.0)
+        assert len(limiter) == 3
+        assert "b" not in limiter._tat and "a" in limiter._tat
+
+    def test_cost_weighted_requests(self):
+        limiter = GCRALimiter(limit=10, window=60)
+        assert limiter.check("client", now=0.0, cost=8) == (True, 2, 48.0)
+        allowed, _, retry_after = limiter.check("client", now=0.0, cost=5)
+        assert not allowed
+        assert abs(retry_after - 18.0) < 1e-6  # until 5 units have refilled
+        assert limiter.check("client", now=0.0, cost=2)[0]
+
+
+class TestQuotas:
+    """Test key tiers, route costs and daily quotas"""
+
+    def test_registry_looks_up_hashed_keys(self):
+        registry = APIKeyRegistry(["plain"], {"sha256:" + hash_api_key("secret"): "pro"})
+        assert registry.tier_for("plain") == "default"
+        assert registry.tier_for("secret") == "pro"
+        assert registry.tier_for("unknown") is None
+        # Without configured keys any key is in the default tier
+        assert APIKeyRegistry().tier_for("anything") == "default"
+
+    def test_admin_keys_follow_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_API_KEYS", ["root", "sha256:" + hash_api_key("ops")])
+        keys = admin_keys()
+        assert keys.is_admin("root") and keys.is_admin("ops")
+        assert not keys.is_admin("guest") and not keys.is_admin(None)
+        assert admin_keys() is keys  # digests are not recomputed per request
+        monkeypatch.setattr(settings, "ADMIN_API_KEYS", [])
+        assert not admin_keys()
+
+    def test_route_costs(self):
+        costs = RouteCosts({"/health": 0, "/api/v1/indicators/*/cross-section": 10})
+        assert costs.cost("/health") == 0
+        assert costs.cost("/api/v1/indicators/GDP/cross-section") == 10
+        assert costs.cost("/api/v1/indicators/GDP") == 1
+
+    def test_daily_quota_resets_each_day(self):
+        quota = DailyQuota(max_clients=2)
+        assert quota.consume("a", 5, day=1) == 5
+        assert quota.consume("a", 3, day=1) == 8
+        assert quota.used("a", day=2) == 0
+        quota.consume("b", 1, day=1)
+        quota.consume("c", 1, day=1)
+        assert quota.used("a", day=1) == 0  # evicted
+
+    def test_daily_quota_enforced(self):
+        limiter = make_limiter(requests=100, daily_quota=10)
+        decisions = [limiter.check("default", "client", cost=4) for _ in range(3)]
+        assert [d.allowed for d in decisions] == [True, True, False]
+        assert [d.quota_remaining for d in decisions] == [6, 2, 2]
+        assert decisions[2].quota_exceeded
+        assert 0 < decisions[2].reset <= 86400  # until the next UTC day
+        # A cheaper request still fits
+        assert limiter.check("default", "client", cost=2).quota_remaining == 0
+
+    def test_rejected_requests_do_not_use_quota(self):
+        limiter = make_limiter(requests=2, daily_quota=100)
+        decisions = [limiter.check("default", "client", now=0.0) for _ in range(3)]
+        assert [d.allowed for d in decisions] == [True, True, False]
+        assert not decisions[2].quota_exceeded
+        assert limiter.daily.used("client", next(iter(limiter.daily._used.values()))[0]) == 2
+
+
+class TestRedisGCRALimiter:
+    """Test the limiter shared across workers"""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_limits(self):
+        client = UnreachableRedis()
+        limiter = RedisGCRALimiter(client, make_limiter(requests=2))
+
+        results = [await limiter.check("default", "client") for _ in range(3)]
+        assert [result.allowed for result in results] == [True, True, False]
+        # Redis is not retried on every request while it is down
+        assert client.calls == 1
+        assert limiter.fallback_checks == 3
+
+    @pytest.mark.asyncio
+    async def test_workers_share_the_quota(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")  # Lua scripting in fakeredis
+        client = fakeredis.FakeAsyncRedis()
+        workers = [RedisGCRALimiter(client, make_limiter(requests=4)) for _ in range(2)]
+
+        results = [await workers[i % 2].check("default", "client") for i in range(5)]
+        assert [result.allowed for result in results] == [True, True, True, True, False]
+        assert [result.remaining for result in results[:4]] == [3, 2, 1, 0]
+        assert 14 < results[4].reset <= 15  # next slot one emission interval away
+        assert all(result.quota_remaining is None for result in results)
+        assert all(worker.fallback_checks == 0 for worker in workers)
+
+    @pytest.mark.asyncio
+    async def test_shared_daily_quota(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeAsyncRedis()
+        workers = [RedisGCRALimiter(client, make_limiter(requests=100, daily_quota=10)) for _ in range(2)]
+
+        results = [await workers[i % 2].check("default", "client", cost=4) for i in range(3)]
+        assert [result.allowed for result in results] == [True, True, False]
+        assert [result.quota_remaining for result in results] == [6, 2, 2]
+        assert results[2].quota_exceeded
+        assert results[0].remaining == 96
@@ -0,0 +1,127 @@
+"""
+Unit tests for upstream resilience (throttling and circuit breakers)
+"""
+import asyncio
+import time
+import pytest
+
+from api.core.resilience import CircuitBreaker, ProviderThrottle, parse_retry_after
+from api.models.schemas import DataSource
+from api.providers.manager import ProviderManager
+
+
+class TestParseRetryAfter:
+    """Test Retry-After header parsing"""
+
+    def test_seconds(self):
+        assert parse_retry_after("7") == 7.0
+
+    def test_http_date(self):
+        delay = parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+        assert delay == 0.0
+
+    def test_missing_or_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestProviderThrottle:
+    """Test the token bucket, in-flight cap and AIMD adjustment"""
+
+    @pytest.mark.asyncio
+    async def test_in_flight_is_capped(self):
+        throttle = ProviderThrottle("test", requests_per_second=1000, max_in_flight=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with throttle:
+                peak = max(peak, throttle.get_stats()["in_flight"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(10)))
+        assert peak == 2
+        assert throttle.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_is_enforced_after_burst(self):
+        throttle = ProviderThrottle("test", requests_per_second=50, max_in_flight=100)
+        started = time.monotonic()
+        for _ in range(60):  # 50-token burst, then 10 more at 50/s
+            async with throttle:
+                pass
+        assert time.monotonic() - started >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_aimd_and_retry_after_pause(self):
+        throttle = ProviderThrottle("test", requests_per_second=100, max_in_flight=10)
+        throttle.record_rate_limited(retry_after=0.1)
+        assert throttle.rate == 50
+        assert throttle.get_stats()["rate_limited"] == 1
+
+        started = time.monotonic()
+        async with throttle:
+            pass
+        assert time.monotonic() - started >= 0.09
+
+        for _ in range(5):
+            throttle.record_success()
+        assert throttle.rate == 75
+        for _ in range(100):
+            throttle.record_success()
+        assert throttle.rate == throttle.max_rate
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+
+    def test_opens_after_threshold_and_probes_after_timeout(self):
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+        time.sleep(0.06)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()  # the probe
+        assert not breaker.allow_request()  # everyone else waits for it
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.get_stats()["transitions"] == {
+            "closed->open": 1, "open->half_open": 1, "half_open->closed": 1
+        }
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_manager_skips_open_source(self):
+        manager = ProviderManager()
+        calls = []
+
+        class Provider:
+            def __init__(self, source, result):
+                self.source, self.result = source, result
+                self.breaker = CircuitBreaker(source.value, 1, 60)
+
+            async def get_indicator(self, *args, **kwargs):
+                calls.append(self.source)
+                return self.result
+
+        manager.providers = {
+            DataSource.FRED: Provider(DataSource.FRED, None),
+            DataSource.WORLD_BANK: Provider(DataSource.WORLD_BANK, None),
+        }
+        manager.providers[DataSource.FRED].breaker.record_failure()
+
+        await manager.get_indicator("GDP", "USA")
+        assert calls == [DataSource.WORLD_BANK]
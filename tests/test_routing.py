@@ -0,0 +1,76 @@
+"""
+Unit tests for provider source routing and capability registry
+"""
+from api.models.schemas import DataSource
+from api.providers.fred import FREDProvider
+from api.providers.manager import ProviderManager
+from api.providers.oecd import OECDProvider
+from api.providers.routing import IndicatorRegistry, SourceRouter, static_source_order
+from api.providers.world_bank import WorldBankProvider
+
+
+class TestSourceRouter:
+    """Test static priors and live re-ranking"""
+
+    def test_static_prior(self):
+        router = SourceRouter()
+        assert router.order("GDP", "usa")[0] == DataSource.FRED
+        assert router.order("GDP", "DEU")[0] == DataSource.OECD
+        assert router.order("GDP", "BRA")[0] == DataSource.WORLD_BANK
+        assert tuple(router.order("GDP", "BRA")) == static_source_order("BRA")
+
+    def test_failing_source_is_demoted_per_series(self):
+        router = SourceRouter()
+        for _ in range(3):
+            router.record(DataSource.FRED, "GDP_PER_CAPITA", "USA", 0.2, False)
+            router.record(DataSource.WORLD_BANK, "GDP_PER_CAPITA", "USA", 0.4, True)
+
+        assert router.order("GDP_PER_CAPITA", "USA")[0] == DataSource.WORLD_BANK
+        # Other series keep FRED first: its aggregate latency is still good
+        assert router.order("UNEMPLOYMENT", "USA")[0] == DataSource.FRED
+
+    def test_faster_source_wins(self):
+        router = SourceRouter()
+        for _ in range(5):
+            router.record(DataSource.OECD, "INFLATION", "FRA", 4.0, True)
+            router.record(DataSource.WORLD_BANK, "INFLATION", "FRA", 0.3, True)
+        assert router.order("INFLATION", "FRA")[0] == DataSource.WORLD_BANK
+
+    def test_candidates_and_bounded_memory(self):
+        router = SourceRouter(max_series=2)
+        for country in ("AAA", "BBB", "CCC"):
+            router.record(DataSource.WORLD_BANK, "GDP", country, 0.1, True)
+        assert router.get_stats()["tracked_series"] == 2
+        assert router.order("GDP", "USA", [DataSource.OECD, DataSource.WORLD_BANK]) == [
+            DataSource.WORLD_BANK, DataSource.OECD
+        ]
+
+
+class TestIndicatorRegistry:
+    """Test capability routing"""
+
+    def setup_method(self):
+        self.registry = IndicatorRegistry.from_providers({
+            DataSource.FRED: FREDProvider(),
+            DataSource.WORLD_BANK: WorldBankProvider(),
+            DataSource.OECD: OECDProvider(),
+        })
+
+    def test_canonical_ids_respect_coverage(self):
+        assert set(self.registry.capable_sources("GDP", "USA")) == {
+            DataSource.FRED, DataSource.WORLD_BANK, DataSource.OECD
+        }
+        assert self.registry.capable_sources("M2", "USA") == [DataSource.FRED]
+        assert self.registry.capable_sources("HOUSING_STARTS", "DEU") == []
+        assert self.registry.capable_sources("POPULATION", "BRA") == [DataSource.WORLD_BANK]
+
+    def test_native_and_unknown_ids(self):
+        assert self.registry.capable_sources("unrate", "USA") == [DataSource.FRED]
+        assert self.registry.capable_sources("SP.POP.TOTL", "BRA") == [DataSource.WORLD_BANK]
+        assert self.registry.capable_sources("SOMETHING_ELSE", "USA") is None
+
+    def test_manager_only_orders_capable_sources(self):
+        manager = ProviderManager()
+        assert manager._get_source_order("DEU", "POPULATION") == [DataSource.WORLD_BANK]
+        assert manager._get_source_order("BRA", "INTEREST_RATE") == []
+        assert len(manager._get_source_order("BRA", "CUSTOM_SERIES")) == len(manager.providers)
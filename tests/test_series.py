@@ -0,0 +1,168 @@
+"""
+Unit tests for NumPy series helpers
+"""
+from datetime import date, datetime
+import numpy as np
+
+from api.models.schemas import DataPoint, DataSource, EconomicIndicatorResponse
+from api.utils.series import align, align_many, cross_correlation, rank_values, series_digest, to_series
+from api.utils.series_store import SeriesStore
+
+
+def make_response(country, points, source=DataSource.WORLD_BANK):
+    return EconomicIndicatorResponse(
+        indicator_id="NY.GDP.PCAP.CD",
+        name="GDP per capita",
+        category="gdp",
+        frequency="annual",
+        source=source,
+        country_code=country,
+        country_name=country,
+        data=[DataPoint(date=date(year, 1, 1), value=value) for year, value in points],
+        last_updated=datetime.now()
+    )
+
+
+def brute_force_ccf(x, y, lag):
+    """Reference lagged correlation: corr(x[t], y[t + lag])"""
+    zx = (x - x.mean()) / x.std()
+    zy = (y - y.mean()) / y.std()
+    n = len(x)
+    if lag >= 0:
+        return (zx[:n - lag] * zy[lag:]).sum() / n
+    return (zx[-lag:] * zy[:n + lag]).sum() / n
+
+
+class TestCrossCorrelation:
+    """Test FFT-based cross-correlation"""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(42)
+        matrix = rng.normal(size=(3, 50))
+        lags, profiles = cross_correlation(matrix, [(0, 1), (2, 0)], max_lag=5)
+        assert lags.tolist() == list(range(-5, 6))
+        for (i, j), profile in zip([(0, 1), (2, 0)], profiles):
+            expected = [brute_force_ccf(matrix[i], matrix[j], k) for k in lags]
+            np.testing.assert_allclose(profile, expected, atol=1e-10)
+
+    def test_detects_lead(self):
+        rng = np.random.default_rng(7)
+        leader = rng.normal(size=120)
+        follower = np.roll(leader, 4)
+        lags, profiles = cross_correlation(np.vstack([leader, follower]), [(0, 1)], max_lag=8)
+        assert lags[np.argmax(profiles[0])] == 4
+
+    def test_constant_series_is_undefined(self):
+        matrix = np.vstack([np.ones(10), np.arange(10.0)])
+        _, profiles = cross_correlation(matrix, [(0, 1)], max_lag=2)
+        assert np.isnan(profiles).all()
+
+
+class TestAlignment:
+    """Test series alignment helpers"""
+
+    def test_align_many(self):
+        a = (np.array(["2020-01-01", "2021-01-01", "2022-01-01"], dtype="datetime64[D]"), np.array([1.0, 2.0, 3.0]))
+        b = (np.array(["2021-01-01", "2022-01-01"], dtype="datetime64[D]"), np.array([5.0, 6.0]))
+        dates, matrix = align_many([a, b])
+        assert len(dates) == 2
+        np.testing.assert_array_equal(matrix, [[2.0, 3.0], [5.0, 6.0]])
+
+    def test_duplicate_dates_are_deduplicated(self):
+        left = to_series(make_response("USA", [(2021, 1.0), (2020, 5.0), (2021, 2.0), (2022, 3.0)]))
+        assert left[0].tolist() == [date(2020, 1, 1), date(2021, 1, 1), date(2022, 1, 1)]
+        assert left[1].tolist() == [5.0, 2.0, 3.0]  # the last 2021 point wins
+
+        right = to_series(make_response("DEU", [(2020, 10.0), (2021, 20.0), (2022, 30.0)]))
+        dates, left_values, right_values = align(left, right)
+        assert len(dates) == 3
+        assert list(zip(left_values, right_values)) == [(5.0, 10.0), (2.0, 20.0), (3.0, 30.0)]
+
+    def test_digest_changes_with_values(self):
+        dates = np.array(["2020-01-01"], dtype="datetime64[D]")
+        assert series_digest((dates, np.array([1.0]))) != series_digest((dates, np.array([2.0])))
+
+
+class TestSeriesStore:
+    """Test the local series store"""
+
+    def test_put_merges_observations(self):
+        store = SeriesStore()
+        store.put("GDP_PER_CAPITA", make_response("USA", [(2020, 1.0), (2021, 2.0)]))
+        stored = store.put("GDP_PER_CAPITA", make_response("USA", [(2021, 2.5), (2022, 3.0)]))
+        assert len(stored.dates) == 3
+        np.testing.assert_array_equal(stored.values, [1.0, 2.5, 3.0])
+        assert stored.revised_dates.tolist() == [date(2021, 1, 1)]
+        assert store.get_stats()["revisions"] == 1
+
+    def test_coverage_and_response_slicing(self):
+        store = SeriesStore()
+        store.put("GDP", make_response("USA", [(2020, 1.0), (2021, 2.0)]), covered_from=None)
+        stored = store.put("GDP", make_response("USA", [(2022, 3.0)]), covered_from=date(2021, 1, 1))
+        assert stored.covered_from is None and stored.covers(None)
+        assert [dp.value for dp in stored.to_response(date(2021, 1, 1)).data] == [2.0, 3.0]
+
+        partial = store.put("GDP", make_response("GBR", [(2021, 5.0)]))
+        assert partial.covers(date(2021, 6, 1))
+        assert not partial.covers(date(2020, 1, 1)) and not partial.covers(None)
+
+    def test_bounded_fetches_do_not_cover_the_present(self):
+        store = SeriesStore()
+        bounded = store.put(
+            "GDP", make_response("BRA", [(2000, 1.0), (2005, 2.0)]),
+            covered_from=date(2000, 1, 1), covered_to=date(2005, 12, 31)
+        )
+        assert bounded.covers(date(2001, 1, 1), date(2004, 12, 31))
+        assert not bounded.covers(date(2001, 1, 1)) and not bounded.covers(date(2020, 10, 1))
+
+        # An overlapping open-ended fetch extends the period to the present
+        joined = store.put("GDP", make_response("BRA", [(2005, 2.0), (2010, 3.0)]), covered_from=date(2004, 1, 1))
+        assert joined.covers(date(2000, 1, 1))
+
+        # One with a gap only covers its own period
+        store.put(
+            "GDP", make_response("GBR", [(2000, 1.0)]),
+            covered_from=date(2000, 1, 1), covered_to=date(2005, 12, 31)
+        )
+        gap = store.put("GDP", make_response("GBR", [(2021, 5.0)]), covered_from=date(2020, 10, 1))
+        assert gap.covers(date(2020, 10, 1)) and not gap.covers(date(2004, 1, 1))
+
+    def test_sources_are_kept_apart(self):
+        store = SeriesStore()
+        store.put("INFLATION", make_response("USA", [(2020, 1.0)]))
+        store.put("INFLATION", make_response("USA", [(2020, 300.0)], source=DataSource.FRED))
+        assert store.get("INFLATION", "USA", DataSource.WORLD_BANK).values[0] == 1.0
+        assert store.get("INFLATION", "USA", DataSource.FRED).values[0] == 300.0
+
+    def test_cross_section_picks_latest_on_or_before_date(self):
+        store = SeriesStore()
+        store.put("GDP", make_response("USA", [(2020, 1.0), (2022, 3.0)]))
+        store.put("GDP", make_response("GBR", [(2019, 5.0), (2021, 6.0)]))
+        codes, dates, values = store.cross_section("GDP", DataSource.WORLD_BANK, date(2021, 6, 30))
+        result = dict(zip(codes, values))
+        assert result == {"USA": 1.0, "GBR": 6.0}
+
+    def test_least_recently_used_series_are_evicted(self):
+        store = SeriesStore(max_series=2, max_observations=100)
+        store.put("GDP", make_response("USA", [(2020, 1.0)]))
+        store.put("GDP", make_response("GBR", [(2020, 2.0)]))
+        store.mark_panel("GDP", DataSource.WORLD_BANK, "latest")
+        assert store.get("GDP", "USA") is not None  # now more recent than GBR
+        store.put("GDP", make_response("DEU", [(2020, 3.0)]))
+        assert store.get("GDP", "GBR") is None
+        assert store.get("GDP", "USA") is not None
+        assert store.panel_age("GDP", DataSource.WORLD_BANK, "latest") is None  # incomplete now
+
+        # Observations are bounded too
+        store = SeriesStore(max_series=10, max_observations=5)
+        store.put("GDP", make_response("USA", [(2020, 1.0), (2021, 2.0), (2022, 3.0)]))
+        store.put("GDP", make_response("GBR", [(2020, 1.0), (2021, 2.0)]))
+        store.put("GDP", make_response("GBR", [(2022, 3.0)]))
+        assert store.get("GDP", "USA") is None
+        assert store.get_stats()["observations"] == 3
+        assert store.get_stats()["evictions"] == 1
+
+    def test_rank_values(self):
+        ranks, percentiles = rank_values(np.array([10.0, 30.0, 20.0, 30.0]))
+        assert ranks.tolist() == [4, 1, 3, 1]
+        assert percentiles.tolist() == [25.0, 100.0, 50.0, 100.0]
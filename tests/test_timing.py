@@ -0,0 +1,121 @@
+"""
+Unit tests for stage timing and the Server-Timing header
+"""
+from datetime import date, datetime, timezone
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.middleware.timing import ServerTimingMiddleware
+from api.models.schemas import (
+    DataPoint, DataSource, EconomicIndicatorResponse, Frequency, IndicatorCategory
+)
+from api.providers.manager import provider_manager
+from api.utils.metrics import Histogram, stage_latency
+from api.utils.series_store import series_store
+from api.utils.timing import RequestTimings, TimedRoute, span
+
+
+def parse_server_timing(value: str) -> dict:
+    metrics = {}
+    for metric in value.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TestHistogram:
+    """Test bucket counts and quantile estimates"""
+
+    def test_quantiles(self):
+        histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+        for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 5:
+            histogram.observe(value)
+        assert histogram.counts == [50, 45, 5, 0]
+        assert histogram.quantile(0.5) == pytest.approx(0.01)
+        assert 0.01 < histogram.quantile(0.9) < 0.1
+        assert 0.1 < histogram.quantile(0.99) <= 1.0
+        assert Histogram().quantile(0.5) is None
+
+    def test_overflow_bucket(self):
+        histogram = Histogram(bounds=(0.01, 0.1))
+        histogram.observe(5.0)
+        assert histogram.counts == [0, 0, 1]
+        assert histogram.quantile(0.99) == 0.1
+
+
+class TestSpans:
+    """Test span recording and the header format"""
+
+    def test_span_outside_request_only_updates_histograms(self):
+        before = stage_latency.labels("test.stage").count
+        with span("test.stage"):
+            pass
+        assert stage_latency.labels("test.stage").count == before + 1
+
+    def test_header_value(self):
+        timings = RequestTimings()
+        timings.add("provider.world_bank", 0.120)
+        timings.add("upstream", 0.040)
+        timings.add("upstream", 0.060)
+        metrics = parse_server_timing(timings.header_value())
+        assert metrics["provider.world_bank"] == {"dur": "120.0"}
+        assert metrics["upstream"] == {"dur": "100.0", "desc": '"2x"'}
+
+    def test_handler_and_render_stages(self):
+        test_app = FastAPI()
+        test_app.router.route_class = TimedRoute
+
+        @test_app.get("/items/{item_id}")
+        async def item(item_id: int):
+            with span("cache"):
+                return {"item": item_id}
+
+        test_app.add_middleware(ServerTimingMiddleware, send_header=True)
+        response = TestClient(test_app).get("/items/3")
+        assert response.json() == {"item": 3}  # parameters still resolved through the wrapper
+        metrics = parse_server_timing(response.headers["server-timing"])
+        assert {"cache", "handler", "render", "total"} <= set(metrics)
+        assert float(metrics["total"]["dur"]) >= float(metrics["handler"]["dur"])
+
+
+class TestIndicatorTiming:
+    """Test the stages reported for an indicator request"""
+
+    @pytest.fixture
+    def fred(self, monkeypatch):
+        provider = provider_manager.providers.get(DataSource.FRED)
+        if provider is None:
+            pytest.skip("FRED provider disabled")
+        provider.breaker.reset()
+        series_store.clear()
+
+        async def get_indicator(*args, **kwargs):
+            with span("upstream"):
+                pass
+            return EconomicIndicatorResponse(
+                indicator_id="GDP", name="Gross Domestic Product", category=IndicatorCategory.GDP,
+                frequency=Frequency.QUARTERLY, source=DataSource.FRED,
+                country_code="USA", country_name="United States",
+                data=[DataPoint(date=date(2024, 1, 1), value=27000.0, unit="billion USD")],
+                last_updated=datetime(2024, 5, 30, tzinfo=timezone.utc)
+            )
+
+        monkeypatch.setattr(provider, "get_indicator", get_indicator)
+        yield provider
+        series_store.clear()
+
+    def test_server_timing_header(self, fred):
+        client = TestClient(app, headers={"X-API-Key": "timing-test"})  # own rate limit budget
+        first = parse_server_timing(
+            client.get("/api/v1/indicators/GDP?country=USA&source=fred").headers["server-timing"]
+        )
+        assert {"store", "provider.fred", "upstream", "handler", "render", "total"} <= set(first)
+
+        # The second request is answered from the series store
+        second = parse_server_timing(
+            client.get("/api/v1/indicators/GDP?country=USA&source=fred").headers["server-timing"]
+        )
+        assert "store" in second and "provider.fred" not in second
+        assert stage_latency.labels("provider.fred").count >= 1